@@ -1,37 +1,190 @@
 # analyse.py
 import numpy as np
-import pandas as pd
-import joblib, json
+import json
 import os
+import hashlib
+import contextlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Sequence
 
-from API.entry import ExoplanetEntry, Disposition
+from API.entry import ExoplanetEntry, Disposition, Quantity, DatasetType
+from API.trees import TreeEnsemble
+from API.cache import MISSING, cacheFromEnv, rowKeys
+from API import metrics
+from API.artifacts import (
+    loadModel,
+    readManifest,
+    verifyManifest,
+    artifactSignature,
+    NATIVE_FILE,
+    TREES_FILE,
+    PICKLE_FILE,
+    COLUMNS_FILE,
+    THRESHOLDS_FILE,
+)
 
-# Model and files were prepared
-# Se prepararon el modelo y los archivos
-_MODEL = None
-_THR = None
-_COLUMNS = None
+MODEL_DIR = "./model"
 
 
-def _load_model_and_thresholds():
-    """Loads the model and thresholds from saved files."""
+@dataclass
+class _ModelBundle:
+    # One loaded and validated artifact set was defined
+    # Se definió un conjunto de artefactos cargado y validado
+    model: object
+    thr: dict
+    columns: list
+    plan: "_FeaturePlan"
+    version: str
+    signature: Optional[str]
+    loaded_at: float
+
+
+# Active model was kept in a single reference so swapping it is atomic
+# El modelo activo se guardó en una sola referencia para que su cambio sea atómico
+_ACTIVE: Optional[_ModelBundle] = None
+_LOAD_LOCK = threading.Lock()
+_WATCHER_PID: Optional[int] = None
+_FAILED_SIGNATURE: Optional[str] = None
+
+
+def _load_bundle(model_dir: str = MODEL_DIR) -> _ModelBundle:
+    """Loads, validates and warms up the artifact set in `model_dir`."""
     # Model and config files were loaded
     # Se cargaron los archivos del modelo y configuración
-    global _MODEL, _THR, _COLUMNS
-    if _MODEL is None:
-        if not os.path.exists("./model/model_lgb.pkl"):
-            raise FileNotFoundError("Model file ./model/model_lgb.pkl not found. Train the model first.")
-        if not os.path.exists("./model/thresholds.json"):
-            raise FileNotFoundError("Threshold file ./model/thresholds.json not found. Train the model first.")
-        if not os.path.exists("./model/columns_used.json"):
-            raise FileNotFoundError("Columns file ./model/columns_used.json not found. Train the model first.")
-        
-        _MODEL = joblib.load("./model/model_lgb.pkl")
-        with open("./model/thresholds.json") as f:
-            _THR = json.load(f)
-        with open("./model/columns_used.json") as f:
-            _COLUMNS = json.load(f)
-    return _MODEL, _THR, _COLUMNS
+    t0 = time.perf_counter()
+    if not any(os.path.exists(os.path.join(model_dir, n)) for n in (NATIVE_FILE, TREES_FILE, PICKLE_FILE)):
+        raise FileNotFoundError(f"Model file not found in {model_dir}. Train the model first.")
+    if not os.path.exists(os.path.join(model_dir, THRESHOLDS_FILE)):
+        raise FileNotFoundError(f"Threshold file {model_dir}/{THRESHOLDS_FILE} not found. Train the model first.")
+    if not os.path.exists(os.path.join(model_dir, COLUMNS_FILE)):
+        raise FileNotFoundError(f"Columns file {model_dir}/{COLUMNS_FILE} not found. Train the model first.")
+
+    signature = artifactSignature(model_dir)
+    manifest = readManifest(model_dir)
+    if manifest is not None:
+        verifyManifest(model_dir, manifest)
+    model = loadModel(model_dir)
+    with open(os.path.join(model_dir, THRESHOLDS_FILE)) as f:
+        thr = json.load(f)
+    with open(os.path.join(model_dir, COLUMNS_FILE)) as f:
+        columns = json.load(f)
+
+    # Artifact set was validated before it could serve traffic
+    # Se validó el conjunto de artefactos antes de que pudiera atender tráfico
+    if not isinstance(columns, list) or not all(isinstance(c, str) for c in columns):
+        raise ValueError("columns_used.json must be a list of column names")
+    tau_low, tau_high = float(thr["tau_low"]), float(thr["tau_high"])
+    if not 0.0 <= tau_low <= tau_high <= 1.0:
+        raise ValueError(f"Invalid thresholds: tau_low={tau_low}, tau_high={tau_high}")
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None and hasattr(model, "num_feature"):
+        n_features = model.num_feature()
+    if n_features is not None and int(n_features) != len(columns):
+        raise ValueError(f"Model expects {n_features} features but columns_used.json lists {len(columns)}")
+
+    plan = _FeaturePlan(columns)
+    warm, _ = plan.encode([_WARMUP_ENTRY])
+    prob = float(_predict_positive(model, warm)[0])
+    if not 0.0 <= prob <= 1.0:
+        raise ValueError(f"Warm-up prediction returned {prob}")
+
+    if manifest is not None:
+        version = manifest["version"]
+    else:
+        version = "legacy-" + hashlib.sha256(str(signature).encode()).hexdigest()[:8]
+    metrics.inc("sidereus_model_loads_total")
+    metrics.setGauge("sidereus_model_load_seconds", time.perf_counter() - t0)
+    return _ModelBundle(model, thr, columns, plan, version, signature, time.time())
+
+
+def _current_bundle() -> _ModelBundle:
+    """Returns the active artifact set, loading it once per process on first use."""
+    global _ACTIVE
+    bundle = _ACTIVE
+    if bundle is None:
+        # Only one thread loaded the model; the rest waited for it
+        # Solo un hilo cargó el modelo; el resto lo esperó
+        with _LOAD_LOCK:
+            if _ACTIVE is None:
+                _ACTIVE = _load_bundle(MODEL_DIR)
+            bundle = _ACTIVE
+    return bundle
+
+
+def reloadModel(force: bool = False) -> bool:
+    """Loads the artifact set again if it changed on disk and swaps it in; returns True on swap."""
+    global _ACTIVE, _FAILED_SIGNATURE
+    with _LOAD_LOCK:
+        current = _ACTIVE
+        signature = artifactSignature(MODEL_DIR)
+        if not force and current is not None and signature in (current.signature, _FAILED_SIGNATURE):
+            return False
+        try:
+            bundle = _load_bundle(MODEL_DIR)
+        except Exception as e:
+            # Old version kept serving when the new one was incomplete or invalid
+            # La versión anterior siguió atendiendo cuando la nueva estaba incompleta o era inválida
+            _FAILED_SIGNATURE = signature
+            print(f"[WARN] Model reload skipped: {e}")
+            return False
+        if current is not None and bundle.version == current.version and not force:
+            current.signature = bundle.signature
+            return False
+        _ACTIVE = bundle
+    _CACHE.retire(bundle.version)
+    print(f"[INFO] Model version {bundle.version} is now active")
+    return True
+
+
+def _reset_after_fork() -> None:
+    # Lock was recreated in the child in case the parent held it while forking
+    # Se recreó el candado en el hijo por si el padre lo tenía al hacer fork
+    global _LOAD_LOCK
+    _LOAD_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _watch(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            reloadModel()
+        except Exception as e:
+            print(f"[WARN] Model watcher error: {e}")
+
+
+def startModelWatcher() -> None:
+    """Starts the hot-reload polling thread once per serving process; CLIs and scripts never call it."""
+    # Watcher thread was started once per process (threads do not survive fork)
+    # Se inició el hilo vigilante una vez por proceso (los hilos no sobreviven al fork)
+    global _WATCHER_PID
+    interval = float(os.getenv("SIDEREUS_MODEL_POLL_S", "10"))
+    if interval <= 0 or _WATCHER_PID == os.getpid():
+        return
+    with _LOAD_LOCK:
+        if _WATCHER_PID == os.getpid():
+            return
+        _WATCHER_PID = os.getpid()
+    threading.Thread(target=_watch, args=(interval,), name="model-watcher", daemon=True).start()
+
+
+def activeModelInfo() -> dict:
+    """Version and load time of the active model, loading it if needed."""
+    bundle = _current_bundle()
+    return {
+        "model_version": bundle.version,
+        "model_loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(bundle.loaded_at)),
+    }
+
+
+def _load_model_and_thresholds():
+    """Loads the model and thresholds from saved files."""
+    bundle = _current_bundle()
+    return bundle.model, bundle.thr, bundle.columns
 
 
 def _entry_to_row(entry: ExoplanetEntry) -> dict[str, float]:
@@ -88,47 +241,182 @@ def _entry_to_row(entry: ExoplanetEntry) -> dict[str, float]:
     return row
 
 
-def calculateDisposition(entry: ExoplanetEntry) -> Disposition:
-    """Calculates the exoplanet disposition using the model."""
-    # Model and thresholds were loaded
-    # Se cargaron el modelo y los umbrales
-    try:
-        model, thr, columns_used = _load_model_and_thresholds()
-    except Exception as e:
-        print(f"[WARN] Model not available: {e}")
-        return Disposition.AMBIGUOUS_CANDIDATE
+_QUANTITY_FEATURES = (
+    "orbital_period", "transit_epoch", "transit_duration", "transit_depth",
+    "planet_radius", "equilibrium_temp", "insolation",
+    "stellar_temp", "stellar_logg", "stellar_radius",
+)
+_DERIVED_FEATURES = (
+    "depth_over_duration", "log_depth", "log_duration",
+    "log_orbital_period", "log_planet_radius",
+)
+_ROW_FEATURES = _QUANTITY_FEATURES + _DERIVED_FEATURES
 
-    try:
-        # Entry was converted for the model
-        # Se convirtió la entrada para el modelo
-        entry_row = _entry_to_row(entry)
-        
-        # DataFrame was created with required columns
-        # Se creó el DataFrame con las columnas requeridas
-        x_dict = {}
-        for col in columns_used:
-            if col in entry_row:
-                x_dict[col] = [entry_row[col]]
-            else:
-                # Default value was set for missing columns
-                # Se asignó valor por defecto a columnas faltantes
-                x_dict[col] = [0 if col.startswith('isnan_') or col.startswith('dataset_') else -999]
-        
-        x = pd.DataFrame(x_dict)
-        
-        # Missing values were replaced
-        # Se reemplazaron los valores faltantes
-        x = x.fillna(-999)
-
-        # Probability was predicted
-        # Se predijo la probabilidad
-        prob = float(model.predict_proba(x)[:, 1][0])
-    except Exception as e:
-        print(f"[WARN] Prediction failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return Disposition.AMBIGUOUS_CANDIDATE
 
+class _FeaturePlan:
+    """Column-index plan compiled once from columns_used.json to encode entries with NumPy."""
+
+    def __init__(self, columns_used: Sequence[str]):
+        self.columns = list(columns_used)
+        self.width = len(self.columns)
+        pos = {c: i for i, c in enumerate(self.columns)}
+
+        # Constant columns were precomputed with the same defaults as _entry_to_row
+        # Se precalcularon las columnas constantes con los mismos valores que _entry_to_row
+        self.defaults = np.array(
+            [0.0 if c.startswith("isnan_") or c.startswith("dataset_") else -999.0 for c in self.columns],
+            dtype=np.float64,
+        )
+        if "dataset_UNKNOWN" in pos:
+            self.defaults[pos["dataset_UNKNOWN"]] = 1.0
+
+        # Source feature index -> target column index pairs were fixed
+        # Se fijaron los pares índice de característica -> índice de columna
+        self.value_src = np.array([i for i, f in enumerate(_ROW_FEATURES) if f in pos], dtype=np.intp)
+        self.value_dst = np.array([pos[f] for f in _ROW_FEATURES if f in pos], dtype=np.intp)
+        self.flag_src = np.array([i for i, f in enumerate(_ROW_FEATURES) if f"isnan_{f}" in pos], dtype=np.intp)
+        self.flag_dst = np.array([pos[f"isnan_{f}"] for f in _ROW_FEATURES if f"isnan_{f}" in pos], dtype=np.intp)
+        self.score_dst = pos.get("score", -1)
+        self.dataset_dst = {c[len("dataset_"):]: i for c, i in pos.items() if c.startswith("dataset_")}
+
+    @staticmethod
+    def _raw_values(entry: ExoplanetEntry) -> list:
+        # Anything but an entry (e.g. a raw payload dict) was rejected instead of scored as all-missing
+        # Se rechazó todo lo que no fuera una entrada (p. ej. un dict sin convertir) en lugar de puntuarlo como vacío
+        if not isinstance(entry, ExoplanetEntry):
+            raise TypeError(f"expected ExoplanetEntry, got {type(entry).__name__}")
+        # Quantity values and score were read as floats (NaN when missing)
+        # Se leyeron los valores de Quantity y la puntuación como float (NaN si faltan)
+        vals = []
+        for name in _QUANTITY_FEATURES:
+            q = getattr(entry, name, None)
+            x = getattr(q, "value", None) if q is not None else None
+            vals.append(np.nan if x is None else float(x))
+        score = getattr(entry, "score", None)
+        vals.append(np.nan if score is None else float(score))
+        return vals
+
+    def encode(self, entries: Sequence[ExoplanetEntry], out: Optional[np.ndarray] = None,
+               dataset=None):
+        """Writes the feature rows of `entries` into a float64 block; returns (block, ok_index).
+
+        `dataset` is one DatasetType for every row or a sequence with one per entry.
+        """
+        raw, ok = [], []
+        for i, e in enumerate(entries):
+            try:
+                raw.append(self._raw_values(e))
+                ok.append(i)
+            except Exception as ex:
+                print(f"[WARN] Entry {i} could not be converted: {ex}")
+        n = len(raw)
+        base = np.array(raw, dtype=np.float64).reshape(n, len(_QUANTITY_FEATURES) + 1)
+        if dataset is not None and not isinstance(dataset, DatasetType) and len(ok) != len(entries):
+            dataset = [dataset[i] for i in ok]
+        return self._encode_base(base, out, dataset), ok
+
+    def encodeColumns(self, data, out: Optional[np.ndarray] = None, dataset=None) -> np.ndarray:
+        """Same block as encode() built from the arrays of a ColumnarExoplanetData, without entries.
+
+        Without `dataset`, each row gets the one-hot of its own source catalog.
+        """
+        base = np.empty((len(data), len(_QUANTITY_FEATURES) + 1), dtype=np.float64)
+        for j, name in enumerate(_QUANTITY_FEATURES + ("score",)):
+            base[:, j] = data.column(name)
+        return self._encode_base(base, out, data.datasets if dataset is None else dataset)
+
+    def _set_datasets(self, out: np.ndarray, dataset) -> None:
+        # Known source catalog replaced the UNKNOWN one-hot, like in training; a per-row
+        # sequence was applied one catalog at a time
+        # El catálogo de origen conocido reemplazó el one-hot UNKNOWN, como en el entrenamiento;
+        # una secuencia por fila se aplicó un catálogo a la vez
+        if isinstance(dataset, DatasetType):
+            codes, rows = [dataset.value], [slice(None)]
+        else:
+            values = np.asarray([d.value if isinstance(d, DatasetType) else d for d in dataset], dtype=np.int8)
+            codes = np.unique(values).tolist()
+            rows = [values == c for c in codes]
+        for code, sel in zip(codes, rows):
+            name = DatasetType(code).name
+            if name not in self.dataset_dst:
+                continue
+            if "UNKNOWN" in self.dataset_dst:
+                out[sel, self.dataset_dst["UNKNOWN"]] = 0.0
+            out[sel, self.dataset_dst[name]] = 1.0
+
+    def _encode_base(self, base: np.ndarray, out: Optional[np.ndarray], dataset) -> np.ndarray:
+        n = base.shape[0]
+        if out is None:
+            out = np.empty((n, self.width), dtype=np.float64)
+        else:
+            out = out[:n]
+        if n == 0:
+            return out
+
+        feats = np.empty((n, len(_ROW_FEATURES)), dtype=np.float64)
+        feats[:, :len(_QUANTITY_FEATURES)] = base[:, :len(_QUANTITY_FEATURES)]
+
+        # Derived features were computed as whole-column operations (order of _DERIVED_FEATURES)
+        # Se calcularon las características derivadas como operaciones de columna (orden de _DERIVED_FEATURES)
+        period, td, dep, prad = base[:, 0], base[:, 2], base[:, 3], base[:, 4]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            feats[:, 10] = np.where(td > 0, dep / np.where(td > 0, td, 1.0), np.nan)
+            for j, src in ((11, dep), (12, td), (13, period), (14, prad)):
+                feats[:, j] = np.where(src > 0, np.log10(np.where(src > 0, src, 1.0)), np.nan)
+
+        missing = np.isnan(feats)
+        out[:] = self.defaults
+        out[:, self.value_dst] = np.where(missing[:, self.value_src], -999.0, feats[:, self.value_src])
+        out[:, self.flag_dst] = missing[:, self.flag_src]
+        if dataset is not None:
+            self._set_datasets(out, dataset)
+        if self.score_dst >= 0:
+            score = base[:, -1]
+            out[:, self.score_dst] = np.where(np.isnan(score), -999.0, score)
+        return out
+
+
+_BUFFERS = threading.local()
+
+
+_BUFFER_ROWS = 256
+
+
+def _buffer(n: int, width: int) -> np.ndarray:
+    # Per-thread input block was reused between calls; large batches got their own
+    # Se reutilizó el bloque de entrada por hilo entre llamadas; los lotes grandes tuvieron el suyo
+    if n > _BUFFER_ROWS:
+        return np.empty((n, width), dtype=np.float64)
+    buf = getattr(_BUFFERS, "block", None)
+    if buf is None or buf.shape[1] != width:
+        buf = np.empty((_BUFFER_ROWS, width), dtype=np.float64)
+        _BUFFERS.block = buf
+    return buf
+
+
+def _predict_positive(model, x: np.ndarray) -> np.ndarray:
+    """Returns the positive-class probability for each row of `x`."""
+    if isinstance(model, TreeEnsemble):
+        return model.predict(x)
+    # Booster was called directly to skip the sklearn wrapper checks; one OpenMP
+    # thread keeps it safe to use after gunicorn forks the preloaded app
+    # Se llamó al booster directamente para omitir las validaciones del envoltorio sklearn;
+    # un hilo OpenMP lo mantiene seguro tras el fork de gunicorn con la app precargada
+    booster = getattr(model, "booster_", model)
+    return booster.predict(x, num_threads=1)
+
+
+@dataclass
+class Prediction:
+    # Result of scoring one entry was defined
+    # Se definió el resultado de puntuar una entrada
+    disposition: Disposition
+    probability: Optional[float] = None
+    model_version: Optional[str] = None
+
+
+def _decide(prob: float, thr: dict) -> Disposition:
+    """Maps a probability to a disposition using the saved thresholds."""
     # Invalid probabilities were checked
     # Se verificaron probabilidades no válidas
     if np.isnan(prob):
@@ -148,6 +436,382 @@ def calculateDisposition(entry: ExoplanetEntry) -> Disposition:
     return Disposition.AMBIGUOUS_CANDIDATE
 
 
+def _rows_to_frame(rows: Sequence[dict], columns_used: list[str]):
+    """Builds the model input matrix with pandas (reference path for the NumPy encoder)."""
+    import pandas as pd
+
+    # DataFrame was created with required columns
+    # Se creó el DataFrame con las columnas requeridas
+    x_dict = {}
+    for col in columns_used:
+        # Default value was set for missing columns
+        # Se asignó valor por defecto a columnas faltantes
+        default = 0 if col.startswith('isnan_') or col.startswith('dataset_') else -999
+        x_dict[col] = [row.get(col, default) for row in rows]
+
+    x = pd.DataFrame(x_dict, columns=columns_used).astype("float64")
+
+    # Missing values were replaced
+    # Se reemplazaron los valores faltantes
+    return x.fillna(-999)
+
+
+_CACHE = cacheFromEnv()
+
+
+def getCacheStats() -> dict:
+    """Returns hit/miss/eviction counters of the prediction cache."""
+    return _CACHE.stats()
+
+
+def _to_prediction(bundle: _ModelBundle, prob: Optional[float]) -> Prediction:
+    # Probability was turned into a disposition with the bundle thresholds
+    # Se convirtió la probabilidad en disposición con los umbrales del conjunto
+    if prob is None or np.isnan(prob):
+        return Prediction(Disposition.AMBIGUOUS_CANDIDATE, None, bundle.version)
+    return Prediction(_decide(prob, bundle.thr), float(prob), bundle.version)
+
+
+def _score_rows(bundle: _ModelBundle, x: np.ndarray, use_cache: bool = True) -> np.ndarray:
+    """Scores encoded rows, answering repeated feature vectors from the cache unless `use_cache` is False."""
+    probs = np.empty(x.shape[0], dtype=np.float64)
+    if not (use_cache and _CACHE.enabled):
+        with metrics.stage("predict"):
+            probs[:] = _predict_positive(bundle.model, x)
+        return probs
+
+    # Only rows missing from the cache reached the model
+    # Solo las filas ausentes de la caché llegaron al modelo
+    with metrics.stage("cache_lookup"):
+        keys = rowKeys(x)
+        miss = []
+        for i, v in enumerate(_CACHE.get_many(bundle.version, keys)):
+            if v is MISSING:
+                miss.append(i)
+            else:
+                probs[i] = np.nan if v is None else v
+    if miss:
+        with metrics.stage("predict"):
+            fresh = _predict_positive(bundle.model, x[miss])
+        probs[miss] = fresh
+        _CACHE.put_many(bundle.version, {
+            keys[i]: (None if np.isnan(p) else float(p)) for i, p in zip(miss, fresh)
+        })
+    return probs
+
+
+def calculateDispositions(entries: Sequence[ExoplanetEntry], dataset=None, use_cache: bool = True) -> List[Prediction]:
+    """Calculates the dispositions of several entries with a single model call.
+
+    `dataset` is one DatasetType for all entries or a sequence with one per entry.
+    Bulk callers pass `use_cache=False` so one-off catalog rows do not evict interactive entries.
+    """
+    # Active model was taken once so the whole batch uses the same version
+    # Se tomó el modelo activo una vez para que todo el lote use la misma versión
+    if not entries:
+        return []
+    try:
+        bundle = _current_bundle()
+    except Exception as e:
+        print(f"[WARN] Model not available: {e}")
+        return [Prediction(Disposition.AMBIGUOUS_CANDIDATE) for _ in entries]
+
+    # Entries were encoded straight into a float64 block and scored together
+    # Se codificaron las entradas directamente en un bloque float64 y se puntuaron juntas
+    out = [Prediction(Disposition.AMBIGUOUS_CANDIDATE, model_version=bundle.version) for _ in entries]
+    try:
+        with metrics.stage("feature_build"):
+            x, idx = bundle.plan.encode(entries, _buffer(len(entries), bundle.plan.width), dataset)
+        if not idx:
+            return out
+        probs = _score_rows(bundle, x, use_cache)
+    except Exception as e:
+        print(f"[WARN] Prediction failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return out
+
+    for i, p in zip(idx, probs):
+        out[i] = _to_prediction(bundle, float(p))
+    return out
+
+
+def iterFeatureBlocks(path: str, chunk_rows: Optional[int] = None, columns_used: Optional[Sequence[str]] = None):
+    """Streams a catalog as (feature block, ColumnarExoplanetData chunk) pairs of bounded size."""
+    from API.data import iterCatalogChunks, getDataType
+
+    if columns_used is None:
+        columns_used = _current_bundle().plan.columns
+    plan = _FeaturePlan(columns_used)
+    ds = getDataType(path)
+    for chunk in iterCatalogChunks(path, chunk_rows, kind="columnar"):
+        yield plan.encodeColumns(chunk, dataset=ds), chunk
+
+
+def scoreCatalogChunks(path: str, chunk_rows: Optional[int] = None):
+    """Streams a catalog through the active model as (chunk, predictions) pairs, bypassing the prediction cache."""
+    from API.data import iterCatalogChunks, getDataType
+
+    bundle = _current_bundle()
+    ds = getDataType(path)
+    for chunk in iterCatalogChunks(path, chunk_rows, kind="columnar"):
+        # Each chunk was encoded from its columns and scored with one model call
+        # Cada bloque se codificó desde sus columnas y se puntuó con una llamada al modelo
+        with metrics.stage("feature_build"):
+            x = bundle.plan.encodeColumns(chunk, dataset=ds)
+        # Catalog rows were scored once, so they skipped the interactive cache
+        # Las filas del catálogo se puntuaron una vez, así que omitieron la caché interactiva
+        probs = _score_rows(bundle, x, use_cache=False)
+        yield chunk, [_to_prediction(bundle, float(p)) for p in probs]
+
+
+@dataclass
+class _Pending:
+    # Queued single prediction was defined (already encoded, cache already missed)
+    # Se definió una predicción individual en cola (ya codificada, sin acierto en caché)
+    bundle: _ModelBundle
+    row: np.ndarray
+    key: Optional[bytes]
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[float] = None
+
+
+class _MicroBatcher:
+    """Coalesces concurrent single predictions into one model call.
+
+    The window only opens under contention: a caller with no other prediction in flight (see inflight)
+    is scored at once, so a lone request never waits for it.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window_ms = float(window_ms)
+        self.max_batch = int(max_batch)
+        self._cond = threading.Condition()
+        self._queue: List[_Pending] = []
+        self._has_leader = False
+        self._inflight = 0
+        self._immediate = 0
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+        self._sizes: dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0 and self.max_batch > 1
+
+    def submit(self, item: _Pending) -> Optional[float]:
+        """Queues one encoded row and blocks until its batch was scored."""
+        with self._cond:
+            self._queue.append(item)
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+            lead = not self._has_leader
+            if lead:
+                self._has_leader = True
+
+        # The first caller of a window became the leader and scored the queue
+        # La primera llamada de la ventana se volvió líder y puntuó la cola
+        if lead:
+            self._lead()
+        item.done.wait()
+        return item.result
+
+    @contextlib.contextmanager
+    def inflight(self) -> Iterator[None]:
+        """Marks one prediction in progress (feature building to result) so leaders can tell contention."""
+        with self._cond:
+            self._inflight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight -= 1
+
+    def _lead(self) -> None:
+        held = True
+        try:
+            self._drain()
+            held = False
+        finally:
+            # A failing leader released leadership and woke the queued callers instead of stranding them
+            # Un líder con error liberó el liderazgo y despertó a las llamadas en cola en lugar de dejarlas esperando
+            if held:
+                with self._cond:
+                    self._has_leader = False
+                    orphans = self._queue[:]
+                    del self._queue[:]
+                for p in orphans:
+                    p.done.set()
+
+    def _drain(self) -> None:
+        while True:
+            with self._cond:
+                # An uncontended caller skipped the window; it only opened with other predictions in flight
+                # Una llamada sin competencia omitió la ventana; solo se abrió con otras predicciones en curso
+                contended = self._inflight > 1
+                if not contended:
+                    self._immediate += 1
+                deadline = time.perf_counter() + (self.window_ms / 1000.0 if contended else 0.0)
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                # Leadership was kept only while items were left over
+                # Se mantuvo el liderazgo solo mientras quedaron items
+                more = bool(self._queue)
+                if not more:
+                    self._has_leader = False
+
+            self._score(batch)
+            if not more:
+                return
+
+    def _score(self, batch: List[_Pending]) -> None:
+        try:
+            # Rows were grouped by model version in case a reload happened mid-window
+            # Se agruparon las filas por versión del modelo por si hubo una recarga en la ventana
+            groups: dict[int, List[_Pending]] = {}
+            for p in batch:
+                groups.setdefault(id(p.bundle), []).append(p)
+            for items in groups.values():
+                bundle = items[0].bundle
+                try:
+                    with metrics.stage("predict"):
+                        probs = _predict_positive(bundle.model, np.vstack([p.row for p in items]))
+                    results = [None if np.isnan(v) else float(v) for v in probs]
+                    if _CACHE.enabled:
+                        _CACHE.put_many(bundle.version, {
+                            p.key: r for p, r in zip(items, results) if p.key is not None
+                        })
+                except Exception as e:
+                    print(f"[WARN] Batched prediction failed: {e}")
+                    results = [None] * len(items)
+                for p, r in zip(items, results):
+                    p.result = r
+
+            with self._cond:
+                n = len(batch)
+                self._batches += 1
+                self._items += n
+                self._max_seen = max(self._max_seen, n)
+                self._sizes[n] = self._sizes.get(n, 0) + 1
+        finally:
+            # Results were fanned out to the waiting threads, even when scoring failed
+            # Se repartieron los resultados a los hilos en espera, incluso si la puntuación falló
+            for p in batch:
+                p.done.set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "window_ms": self.window_ms,
+                "max_batch": self.max_batch,
+                "batches": self._batches,
+                "immediate": self._immediate,
+                "items": self._items,
+                "mean_batch_size": (self._items / self._batches) if self._batches else 0.0,
+                "max_batch_size": self._max_seen,
+                "batch_sizes": {str(k): v for k, v in sorted(self._sizes.items())},
+            }
+
+
+_BATCHER = _MicroBatcher(
+    window_ms=float(os.getenv("SIDEREUS_BATCH_WINDOW_MS", "2")),
+    max_batch=int(os.getenv("SIDEREUS_BATCH_MAX", "64")),
+)
+
+
+def configureBatching(window_ms: Optional[float] = None, max_batch: Optional[int] = None) -> None:
+    """Changes the micro-batching window and maximum batch size (0 disables it)."""
+    # Batching settings were updated
+    # Se actualizaron los ajustes de agrupación
+    with _BATCHER._cond:
+        if window_ms is not None:
+            _BATCHER.window_ms = float(window_ms)
+        if max_batch is not None:
+            _BATCHER.max_batch = int(max_batch)
+
+
+def getBatchingStats() -> dict:
+    """Returns counters describing the achieved micro-batch sizes."""
+    return _BATCHER.stats()
+
+
+def predictDisposition(entry: ExoplanetEntry) -> Prediction:
+    """Scores one entry: cache first, then coalesced with concurrent calls when batching is enabled."""
+    with _BATCHER.inflight():
+        return _predict_disposition(entry)
+
+
+def _predict_disposition(entry: ExoplanetEntry) -> Prediction:
+    try:
+        bundle = _current_bundle()
+    except Exception as e:
+        print(f"[WARN] Model not available: {e}")
+        return Prediction(Disposition.AMBIGUOUS_CANDIDATE)
+
+    with metrics.stage("feature_build"):
+        x, idx = bundle.plan.encode([entry], _buffer(1, bundle.plan.width))
+    if not idx:
+        return Prediction(Disposition.AMBIGUOUS_CANDIDATE, model_version=bundle.version)
+    row = x[0].copy()
+
+    # Repeated feature vectors were answered without touching the model
+    # Los vectores de características repetidos se respondieron sin tocar el modelo
+    key = None
+    if _CACHE.enabled:
+        with metrics.stage("cache_lookup"):
+            key = rowKeys(row[None, :])[0]
+            cached = _CACHE.get_many(bundle.version, [key])[0]
+        if cached is not MISSING:
+            return _to_prediction(bundle, cached)
+
+    # Concurrent calls were grouped by the dispatcher
+    # Se agruparon las llamadas concurrentes con el despachador
+    if _BATCHER.enabled:
+        with metrics.stage("batch_wait"):
+            prob = _BATCHER.submit(_Pending(bundle, row, key))
+        return _to_prediction(bundle, prob)
+    try:
+        with metrics.stage("predict"):
+            prob = float(_predict_positive(bundle.model, row[None, :])[0])
+    except Exception as e:
+        print(f"[WARN] Prediction failed: {e}")
+        return Prediction(Disposition.AMBIGUOUS_CANDIDATE, model_version=bundle.version)
+    prob_or_none = None if np.isnan(prob) else prob
+    if key is not None:
+        _CACHE.put_many(bundle.version, {key: prob_or_none})
+    return _to_prediction(bundle, prob_or_none)
+
+
+_WARMUP_ENTRY = ExoplanetEntry(
+    orbital_period=Quantity(10.0, "days"),
+    transit_duration=Quantity(2.5, "hours"),
+    transit_depth=Quantity(500.0, "ppm"),
+)
+
+
+def warmUp() -> Optional[Prediction]:
+    """Loads the model and runs one prediction so the first request does not pay for it."""
+    # Model was loaded and exercised once at boot
+    # Se cargó el modelo y se ejecutó una vez al arrancar
+    try:
+        _current_bundle()
+    except Exception as e:
+        print(f"[WARN] Model not available: {e}")
+        return None
+    return calculateDispositions([_WARMUP_ENTRY])[0]
+
+
+def calculateDisposition(entry: ExoplanetEntry) -> Disposition:
+    """Calculates the exoplanet disposition using the model."""
+    return predictDisposition(entry).disposition
+
 
 if __name__ == "__main__":
     from entry import Quantity
@@ -0,0 +1,216 @@
+# Usage: python -m API.artifacts [model_dir]
+# Writes and loads the model artifact set: native LightGBM text, NumPy tree export and manifest.
+# Escribe y carga el conjunto de artefactos del modelo: texto nativo LightGBM, exportación NumPy y manifiesto.
+
+from __future__ import annotations
+import os
+import sys
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from API.trees import TreeEnsemble, exportBooster, fileSha256
+
+MANIFEST_FILE = "manifest.json"
+NATIVE_FILE = "model_lgb.txt"
+TREES_FILE = "model_trees.npz"
+PICKLE_FILE = "model_lgb.pkl"
+COLUMNS_FILE = "columns_used.json"
+THRESHOLDS_FILE = "thresholds.json"
+METRICS_FILE = "metrics.json"
+TUNING_FILE = "tuning.json"
+ROWS_FILE = "training_rows.npz"
+OOF_FILE = "oof_predictions.npz"
+MANIFEST_FORMAT = 1
+
+
+def _write_json(path: str, data: Any) -> None:
+    # File was written next to its target and renamed so readers never see half of it
+    # Se escribió el archivo junto a su destino y se renombró para que nunca se lea a medias
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def readManifest(model_dir: str = "./model") -> Optional[Dict[str, Any]]:
+    """Returns the artifact manifest of `model_dir`, or None when there is none."""
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"Unsupported manifest format in {path}")
+    return manifest
+
+
+def writeManifest(model_dir: str = "./model", extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Hashes the artifacts present in `model_dir` and writes manifest.json."""
+    # Artifact hashes were collected; the version is derived from all of them
+    # Se recogieron los hashes de los artefactos; la versión se deriva de todos ellos
+    files = {}
+    for name in (NATIVE_FILE, TREES_FILE, COLUMNS_FILE, THRESHOLDS_FILE, METRICS_FILE, TUNING_FILE, ROWS_FILE, OOF_FILE):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            files[name] = {"sha256": fileSha256(path), "bytes": os.path.getsize(path)}
+    digest = hashlib.sha256(
+        "".join(f"{k}:{v['sha256']}" for k, v in sorted(files.items())
+                if k not in (METRICS_FILE, TUNING_FILE, ROWS_FILE, OOF_FILE)).encode()
+    ).hexdigest()
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": digest[:12],
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": files,
+    }
+    manifest.update(extra or {})
+    _write_json(os.path.join(model_dir, MANIFEST_FILE), manifest)
+    return manifest
+
+
+def verifyManifest(model_dir: str, manifest: Dict[str, Any]) -> None:
+    """Raises ValueError when a file listed in the manifest is missing or differs."""
+    for name, info in manifest.get("files", {}).items():
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            raise ValueError(f"{name} listed in the manifest is missing")
+        if os.path.getsize(path) != info["bytes"] or fileSha256(path) != info["sha256"]:
+            raise ValueError(f"{name} does not match the manifest")
+
+
+def artifactSignature(model_dir: str = "./model") -> Optional[str]:
+    """Cheap identifier of the artifact set: manifest version, or file stats without a manifest."""
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        st = os.stat(path)
+        return f"manifest:{st.st_mtime_ns}:{st.st_size}"
+    parts = []
+    for name in (PICKLE_FILE, COLUMNS_FILE, THRESHOLDS_FILE):
+        p = os.path.join(model_dir, name)
+        if not os.path.exists(p):
+            return None
+        st = os.stat(p)
+        parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+    return "legacy:" + ";".join(parts)
+
+
+def writeArtifacts(model: Any, columns: list, thresholds: dict, model_dir: str = "./model",
+                   metrics: Optional[dict] = None, tuning: Optional[dict] = None,
+                   rows: Optional[Any] = None, parent: Optional[str] = None, oof: Optional[Any] = None) -> Dict[str, Any]:
+    """Saves the booster in native format, its NumPy export, the JSON files and the manifest.
+
+    `tuning` (CV or search report: params, per-fold metrics, timings) goes to tuning.json next to metrics.json;
+    `rows` ({"trained", "held_out"} hashes of the labeled rows) goes to training_rows.npz for incremental runs,
+    `parent` is the version an incremental model was grown from and `oof` (an API.thresholds.ThresholdCurve of
+    out-of-fold or held-out probabilities) goes to oof_predictions.npz for the threshold sweep.
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    booster = getattr(model, "booster_", model)
+
+    # Native LightGBM text format was written instead of relying on pickle
+    # Se escribió el formato de texto nativo de LightGBM en lugar de depender de pickle
+    native_path = os.path.join(model_dir, NATIVE_FILE)
+    booster.save_model(native_path)
+    exportBooster(booster, source_sha256=fileSha256(native_path)).save(os.path.join(model_dir, TREES_FILE))
+
+    _write_json(os.path.join(model_dir, COLUMNS_FILE), list(columns))
+    _write_json(os.path.join(model_dir, THRESHOLDS_FILE), thresholds)
+    if metrics:
+        _write_json(os.path.join(model_dir, METRICS_FILE), metrics)
+    # A report from an earlier run was removed so tuning.json always describes this model
+    # Se eliminó el informe de una ejecución anterior para que tuning.json siempre describa este modelo
+    if tuning:
+        _write_json(os.path.join(model_dir, TUNING_FILE), tuning)
+    elif os.path.exists(os.path.join(model_dir, TUNING_FILE)):
+        os.remove(os.path.join(model_dir, TUNING_FILE))
+
+    if oof is not None:
+        oof.save(os.path.join(model_dir, OOF_FILE))
+    elif os.path.exists(os.path.join(model_dir, OOF_FILE)):
+        os.remove(os.path.join(model_dir, OOF_FILE))
+    if rows is not None:
+        tmp = os.path.join(model_dir, f"{ROWS_FILE}.tmp.npz")
+        np.savez(tmp, **{k: np.unique(np.asarray(v, dtype=np.uint64)) for k, v in rows.items()})
+        os.replace(tmp, os.path.join(model_dir, ROWS_FILE))
+
+    import lightgbm as lgb
+    extra = {
+        "num_trees": int(booster.num_trees()),
+        "num_features": int(booster.num_feature()),
+        "lightgbm_version": lgb.__version__,
+    }
+    if parent:
+        extra["parent_version"] = parent
+    return writeManifest(model_dir, extra)
+
+
+def writeOofStore(oof: Any, model_dir: str = "./model", thresholds: Optional[dict] = None) -> Dict[str, Any]:
+    """Adds oof_predictions.npz to the deployed set, keeping its model, and re-signs the manifest.
+
+    thresholds.json (which changes served dispositions) is only replaced when `thresholds` is given.
+    """
+    previous = readManifest(model_dir) or {}
+    if thresholds is not None:
+        _write_json(os.path.join(model_dir, THRESHOLDS_FILE), thresholds)
+    oof.save(os.path.join(model_dir, OOF_FILE))
+    extra = {k: v for k, v in previous.items() if k not in ("format", "version", "created", "files")}
+    return writeManifest(model_dir, extra)
+
+
+def loadModel(model_dir: str = "./model", backend: Optional[str] = None):
+    """Loads the serving model: NumPy export first, then native LightGBM, then the legacy pickle."""
+    backend = (backend or os.getenv("SIDEREUS_MODEL_BACKEND", "auto")).lower()
+    manifest = readManifest(model_dir)
+    trees_path = os.path.join(model_dir, TREES_FILE)
+    native_path = os.path.join(model_dir, NATIVE_FILE)
+    pickle_path = os.path.join(model_dir, PICKLE_FILE)
+
+    # The NumPy export was used when it matches its source model
+    # Se usó la exportación NumPy cuando coincide con su modelo de origen
+    if backend != "lightgbm" and os.path.exists(trees_path):
+        try:
+            ensemble = TreeEnsemble.load(trees_path)
+            if manifest is not None:
+                expected = manifest["files"].get(NATIVE_FILE, {}).get("sha256")
+            else:
+                expected = fileSha256(pickle_path) if os.path.exists(pickle_path) else None
+            if expected is not None and ensemble.source_sha256 == expected:
+                return ensemble
+            print(f"[WARN] {TREES_FILE} does not match its source model, run python -m API.artifacts")
+        except Exception as e:
+            print(f"[WARN] Could not load {trees_path}: {e}")
+    if backend == "numpy":
+        raise FileNotFoundError(f"Usable tree export {trees_path} not found. Run python -m API.artifacts.")
+
+    import lightgbm as lgb
+    if os.path.exists(native_path):
+        return lgb.Booster(model_file=native_path)
+
+    import joblib
+    return joblib.load(pickle_path)
+
+
+def convertPickle(model_dir: str = "./model") -> Dict[str, Any]:
+    """Writes the native format, NumPy export and manifest for an existing model_lgb.pkl."""
+    import joblib
+
+    model = joblib.load(os.path.join(model_dir, PICKLE_FILE))
+    with open(os.path.join(model_dir, COLUMNS_FILE)) as f:
+        columns = json.load(f)
+    with open(os.path.join(model_dir, THRESHOLDS_FILE)) as f:
+        thresholds = json.load(f)
+    metrics = None
+    if os.path.exists(os.path.join(model_dir, METRICS_FILE)):
+        with open(os.path.join(model_dir, METRICS_FILE)) as f:
+            metrics = json.load(f)
+    return writeArtifacts(model, columns, thresholds, model_dir, metrics)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "./model"
+    m = convertPickle(target)
+    print(f"[OK] Artifact set {m['version']} written to {target}")
@@ -0,0 +1,664 @@
+# Usage: python -m API.benchmark [names] [--save baseline.json] [--compare baseline.json] [--threshold 0.2]
+# Measures ingestion, training and serving against the bundled catalogs.
+# Mide la ingesta, el entrenamiento y el servicio con los catálogos incluidos.
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+import warnings
+warnings.filterwarnings("ignore")
+
+import numpy as np
+
+DATA_DIR = "./static/data"
+CATALOGS = ("KOI", "TOI", "K2")
+
+
+def _timeit(fn, repeat: int = 5) -> float:
+    # Best wall time of several runs was kept
+    # Se conservó el mejor tiempo de varias ejecuciones
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _latency_us(fn, n: int = 500) -> dict:
+    # Per-call latencies were collected in microseconds
+    # Se recogieron las latencias por llamada en microsegundos
+    samples = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples[i] = (time.perf_counter() - t0) * 1e6
+    return {
+        "p50_us": float(np.percentile(samples, 50)),
+        "p99_us": float(np.percentile(samples, 99)),
+    }
+
+
+def _peak_mb(fn) -> tuple:
+    # Peak Python allocation during the call was traced
+    # Se trazó la asignación máxima de Python durante la llamada
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / (1024 * 1024)
+
+
+def _retained_mb(fn) -> tuple:
+    # Memory still held by the result after the call (and the peak during it) was traced
+    # Se trazó la memoria que el resultado conservó tras la llamada (y el máximo durante ella)
+    tracemalloc.start()
+    try:
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current / (1024 * 1024), peak / (1024 * 1024)
+
+
+def _percentiles_ms(samples) -> dict:
+    samples = np.asarray(samples) * 1e3
+    return {
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p90_ms": float(np.percentile(samples, 90)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
+
+
+def _run_isolated(code: str) -> dict:
+    # Snippet was run in a fresh interpreter to measure import and load cost
+    # Se ejecutó el fragmento en un intérprete nuevo para medir el costo de importación y carga
+    prelude = (
+        "import json, resource, time, warnings\n"
+        "warnings.filterwarnings('ignore')\n"
+        "t0 = time.perf_counter()\n"
+    )
+    epilogue = (
+        "\nprint(json.dumps({'load_s': time.perf_counter() - t0,"
+        " 'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", prelude + code + epilogue],
+        capture_output=True, text=True, check=True, cwd=os.getcwd(),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _catalog_matrices() -> dict:
+    from API.data import readAndCreateData
+    from API.analyse import _FeaturePlan, _load_model_and_thresholds
+
+    _, _, columns_used = _load_model_and_thresholds()
+    plan = _FeaturePlan(columns_used)
+    out = {}
+    for name in CATALOGS:
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        if os.path.exists(path):
+            out[name], _ = plan.encode(readAndCreateData(path).entries)
+    return out
+
+
+def bench_tree_evaluator() -> dict:
+    """NumPy tree evaluator vs LightGBM: process load cost, batch time and single-row latency."""
+    import joblib
+    from API.trees import exportBooster
+
+    result = {
+        "load": {
+            "lightgbm": _run_isolated(
+                "import joblib, lightgbm\n"
+                "m = joblib.load('./model/model_lgb.pkl')\n"
+            ),
+            "numpy": _run_isolated(
+                "from API.trees import TreeEnsemble\n"
+                "m = TreeEnsemble.load('./model/model_trees.npz')\n"
+            ),
+        },
+        "batch_s": {},
+    }
+    model = joblib.load("./model/model_lgb.pkl")
+    booster = getattr(model, "booster_", model)
+    ensemble = exportBooster(model)
+    matrices = _catalog_matrices()
+    for name, x in matrices.items():
+        result["batch_s"][name] = {
+            "rows": int(x.shape[0]),
+            "lightgbm": _timeit(lambda: booster.predict(x)),
+            "numpy": _timeit(lambda: ensemble.predict(x)),
+        }
+    row = next(iter(matrices.values()))[:1]
+    result["single_row"] = {
+        "lightgbm": _latency_us(lambda: booster.predict(row)),
+        "numpy": _latency_us(lambda: ensemble.predict(row)),
+    }
+    return result
+
+
+_LOADERS = {
+    "pickle": "import joblib\nm = joblib.load('./model/model_lgb.pkl')\nmodel = getattr(m, 'booster_', m)\n",
+    "native": "import lightgbm\nmodel = lightgbm.Booster(model_file='./model/model_lgb.txt')\n",
+    "numpy": "from API.trees import TreeEnsemble\nmodel = TreeEnsemble.load('./model/model_trees.npz')\n",
+}
+
+_FORK_WORKERS = """
+import os, json, time, warnings
+warnings.filterwarnings('ignore')
+import numpy as np
+
+def memory():
+    # Resident, proportional and private memory were read from smaps_rollup
+    # Se leyó la memoria residente, proporcional y privada de smaps_rollup
+    out = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                out[key] = int(rest.split()[0]) / 1024
+    return {'rss_mb': out['Rss'], 'pss_mb': out['Pss'],
+            'private_mb': out['Private_Clean'] + out['Private_Dirty']}
+
+def load():
+    t0 = time.perf_counter()
+%(loader)s
+    x = np.full((1, %(width)d), -999.0)
+    model.predict(x)
+    return model, time.perf_counter() - t0
+
+preload = %(preload)s
+if preload:
+    model, load_s = load()
+workers = []
+for _ in range(2):
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        if not preload:
+            model, load_s = load()
+        model.predict(np.full((64, %(width)d), -999.0))
+        os.write(w, json.dumps(dict(memory(), load_s=load_s)).encode())
+        os._exit(0)
+    os.close(w)
+    workers.append((pid, r))
+results = []
+for pid, r in workers:
+    with os.fdopen(r) as f:
+        results.append(json.loads(f.read()))
+    os.waitpid(pid, 0)
+print(json.dumps(results))
+"""
+
+
+def bench_model_load() -> dict:
+    """Load time and per-worker memory of the pickle, native and NumPy formats, with and without preload."""
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        return {"skipped": "needs /proc/self/smaps_rollup (Linux)"}
+    with open("./model/columns_used.json") as f:
+        width = len(json.load(f))
+    result = {}
+    for name, loader in _LOADERS.items():
+        indented = "".join(f"    {line}\n" for line in loader.strip().splitlines())
+        for preload in (False, True):
+            code = _FORK_WORKERS % {"loader": indented, "preload": preload, "width": width}
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                 check=True, cwd=os.getcwd())
+            workers = json.loads(out.stdout.strip().splitlines()[-1])
+            result[f"{name}{'_preload' if preload else ''}"] = {
+                "load_s": workers[0]["load_s"],
+                "worker_rss_mb": float(np.mean([w["rss_mb"] for w in workers])),
+                "worker_pss_mb": float(np.mean([w["pss_mb"] for w in workers])),
+                "worker_private_mb": float(np.mean([w["private_mb"] for w in workers])),
+            }
+    return result
+
+
+def bench_ingestion() -> dict:
+    """loadDataCSV and readAndCreateData wall time and peak traced memory per catalog."""
+    from API.data import loadDataCSV, readAndCreateData, readColumnarData, iterCatalogChunks
+
+    def stream(path):
+        return sum(len(c) for c in iterCatalogChunks(path))
+
+    result = {}
+    for name in CATALOGS:
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        if not os.path.exists(path):
+            continue
+        rows, load_mb = _peak_mb(lambda: loadDataCSV(path))
+        data, read_mb = _peak_mb(lambda: readAndCreateData(path))
+        result[name] = {
+            "rows": len(rows),
+            "entries": len(data.entries),
+            "load_csv_s": _timeit(lambda: loadDataCSV(path), repeat=3),
+            "load_csv_peak_mb": load_mb,
+            "read_and_create_s": _timeit(lambda: readAndCreateData(path), repeat=3),
+            "read_and_create_peak_mb": read_mb,
+            # Columnar parse of the CSV vs a load from the binary cache
+            # Procesado columnar del CSV frente a una carga desde la caché binaria
+            "parse_columnar_s": _timeit(lambda: readColumnarData(path, use_cache=False), repeat=3),
+            "cached_columnar_s": _timeit(lambda: readColumnarData(path), repeat=3),
+            "stream_s": _timeit(lambda: stream(path), repeat=3),
+            "stream_peak_mb": _peak_mb(lambda: stream(path))[1],
+        }
+
+    # Whole directory without the binary cache: one process vs one per file
+    # Directorio completo sin la caché binaria: un proceso frente a uno por archivo
+    from API.data import readColumnarDirectory
+    files = [n for n in os.listdir(DATA_DIR) if n.lower().endswith(".csv")]
+    previous = os.environ.get("SIDEREUS_DATA_CACHE")
+    os.environ["SIDEREUS_DATA_CACHE"] = "0"
+    try:
+        result["directory"] = {
+            "files": len(files),
+            "cpus": os.cpu_count(),
+            "serial_s": _timeit(lambda: readColumnarDirectory(DATA_DIR, workers=1), repeat=3),
+            "parallel_s": _timeit(lambda: readColumnarDirectory(DATA_DIR, workers=len(files)), repeat=3),
+        }
+    finally:
+        if previous is None:
+            os.environ.pop("SIDEREUS_DATA_CACHE")
+        else:
+            os.environ["SIDEREUS_DATA_CACHE"] = previous
+    return result
+
+
+def bench_columnar() -> dict:
+    """List of ExoplanetEntry vs ColumnarExoplanetData: build time, retained and peak memory."""
+    from API.data import readAndCreateData
+
+    result = {}
+    for name in CATALOGS:
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        if not os.path.exists(path):
+            continue
+        out = {}
+        for label, columnar in (("entries", False), ("columnar", True)):
+            _, retained, peak = _retained_mb(lambda: readAndCreateData(path, columnar=columnar))
+            out[label] = {
+                "build_s": _timeit(lambda: readAndCreateData(path, columnar=columnar), repeat=3),
+                "retained_mb": retained,
+                "peak_mb": peak,
+            }
+        result[name] = out
+    return result
+
+
+def bench_training() -> dict:
+    """Stage times of API.trainExoplanetModel.main; artifacts go to a temporary directory."""
+    from API import trainExoplanetModel as T
+    from API.artifacts import writeArtifacts
+    from API.thresholds import ThresholdCurve
+
+    stages = {}
+
+    def timed(stage, fn):
+        t0 = time.perf_counter()
+        out = fn()
+        stages[f"{stage}_s"] = time.perf_counter() - t0
+        return out
+
+    # Training logs were silenced; the deployed model/ directory was never touched
+    # Se silenciaron los registros del entrenamiento; nunca se tocó el directorio model/ desplegado
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        paths = {name: os.path.join(DATA_DIR, f"{name}.csv") for name in CATALOGS}
+        paths = {name: path for name, path in paths.items() if os.path.exists(path)}
+        plan = T.training_plan(T.getDataType(path) for path in paths.values())
+        blocks, labels = [], []
+        for name, path in paths.items():
+            X_part, y_part, _, _ = timed(f"load_{name}", lambda: T.load_csv_features(path, plan))
+            blocks.append(X_part)
+            labels.append(y_part)
+        X, y = timed("prepare", lambda: T.prepare_columnar_training(blocks, labels, plan))
+        model, metrics = timed("train", lambda: T.train_model(X, y, validate=True))
+        thresholds = timed("thresholds", lambda: ThresholdCurve(model.predict(X), y).thresholds())
+        with tempfile.TemporaryDirectory() as tmp:
+            timed("write_artifacts", lambda: writeArtifacts(model, list(X.columns), thresholds, tmp, metrics))
+        stages["total_s"] = time.perf_counter() - t0
+    stages["rows"] = int(X.shape[0])
+    stages["trees"] = int(getattr(model, "booster_", model).num_trees())
+    return stages
+
+
+def bench_training_features() -> dict:
+    """Per-entry dict features (entry_to_features + DataFrame) vs the columnar float32 builder, per catalog."""
+    from API import trainExoplanetModel as T
+
+    result = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in CATALOGS:
+            path = os.path.join(DATA_DIR, f"{name}.csv")
+            if not os.path.exists(path):
+                continue
+            plan = T.training_plan([T.getDataType(path)])
+
+            def dicts():
+                features, labels, _ = T.load_and_process_csv(path)
+                return T.prepare_data_for_training(features, labels)
+
+            def columnar():
+                X, y, _, _ = T.load_csv_features(path, plan)
+                return T.prepare_columnar_training([X], [y], plan)
+
+            X, _ = columnar()
+            result[name] = {
+                "rows": int(X.shape[0]),
+                "dicts_s": _timeit(dicts, repeat=3),
+                "columnar_s": _timeit(columnar, repeat=3),
+                "dicts_peak_mb": _peak_mb(dicts)[1],
+                "columnar_peak_mb": _peak_mb(columnar)[1],
+            }
+    return result
+
+
+def bench_tuning(folds: int = 5, rounds: int = 200) -> dict:
+    """K-fold CV wall time in-process vs the process pool sharing the memory-mapped matrix."""
+    from API import trainExoplanetModel as T
+    from API.tuning import crossValidate
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        paths = [p for p in (os.path.join(DATA_DIR, f"{n}.csv") for n in CATALOGS) if os.path.exists(p)]
+        plan = T.training_plan(T.getDataType(p) for p in paths)
+        parts = [T.load_csv_features(p, plan) for p in paths]
+        X, y = T.prepare_columnar_training([x for x, *_ in parts], [y for _, y, *_ in parts], plan)
+    params = dict(T.BASE_PARAMS, n_estimators=rounds)
+    result = {"rows": int(len(y)), "cpus": os.cpu_count() or 1}
+    for label, workers in (("serial", 1), ("pool", 0)):
+        report = crossValidate(X, y, params, folds=folds, workers=workers)
+        result[label] = {"wall_s": report["timings"]["total_s"], "fit_s": report["timings"]["fit_s"],
+                         "auc_mean": report["cv"]["auc_mean"]}
+    return result
+
+
+def bench_dataset_cache(folds: int = 5) -> dict:
+    """Training-run startup cold (CSV parse, features, binning) vs warm (cached matrix and binary Datasets)."""
+    from API import trainExoplanetModel as T
+    from API.binning import DatasetCache, loadSplit
+    from API.tuning import foldAssignment
+
+    paths = {n: p for n, p in ((n, os.path.join(DATA_DIR, f"{n}.csv")) for n in CATALOGS) if os.path.exists(p)}
+    result = {"folds": folds}
+    with tempfile.TemporaryDirectory() as root:
+        timings = {}
+        for label in ("cold", "warm"):
+            cache = DatasetCache("bench", root)
+            t0 = time.perf_counter()
+            cached = cache.loadMatrix()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if cached is None:
+                    X, y, groups = T.build_training_matrix(paths)
+                    cache.saveMatrix(X.to_numpy(), y, groups, list(X.columns))
+                    X, columns = X.to_numpy(), list(X.columns)
+                else:
+                    X, y, groups, columns = cached
+            t1 = time.perf_counter()
+            assignment = cache.array("cv.folds", lambda: foldAssignment(y, groups, folds))
+            split = [cache.splitPaths(f"cv-f{k}", X, y, np.flatnonzero(assignment != k),
+                                      np.flatnonzero(assignment == k), columns) for k in range(folds)]
+            t2 = time.perf_counter()
+            # A trial's startup was reading its fold's binary Datasets back
+            # El arranque de un ensayo fue volver a leer los Dataset binarios de su pliegue
+            trial = _timeit(lambda: [d.construct() for d in loadSplit(*split[0])], repeat=3)
+            timings[label] = {"matrix_s": t1 - t0, "datasets_s": t2 - t1, "trial_startup_s": trial}
+        result.update(timings)
+        result["rows"] = int(len(y))
+    return result
+
+
+def bench_incremental(new_rows: int = 400, rounds: int = 100) -> dict:
+    """Incremental retrain for the last `new_rows` TOI rows vs a full retrain, scored on the same hold-out."""
+    from API import trainExoplanetModel as T
+    from API.binning import rowHashes, trainParams
+
+    paths = {n: p for n, p in ((n, os.path.join(DATA_DIR, f"{n}.csv")) for n in CATALOGS) if os.path.exists(p)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, groups = T.build_training_matrix(paths)
+    matrix, columns = X.to_numpy(), list(X.columns)
+    # The deployed model was simulated by training without the last TOI rows
+    # Se simuló el modelo desplegado entrenando sin las últimas filas de TOI
+    toi = np.flatnonzero(X["dataset_TOI"].to_numpy() == 1) if "dataset_TOI" in X else np.arange(len(y))
+    old = np.setdiff1d(np.arange(len(y)), toi[-new_rows:])
+    held = old[T.holdout_rows(y[old], groups[old])]
+    trained = np.setdiff1d(old, held)
+    args, full_rounds = trainParams(dict(T.BASE_PARAMS))
+    with contextlib.redirect_stdout(io.StringIO()):
+        base, _ = T._fit_rows(args, full_rounds, matrix, y, trained, held, columns)
+        hashes = rowHashes(matrix, y)
+        _, metrics, report, _ = T.train_incremental(X, y, base, {"trained": hashes[trained], "held_out": hashes[held]},
+                                                    groups, rounds=rounds, compare=True)
+    return {
+        "rows": int(len(y)),
+        "new_rows": report["new_rows"],
+        "incremental_s": report["train_s"],
+        "full_retrain_s": report["full_retrain"]["train_s"],
+        "trees": report["rounds_added"],
+        "auc": metrics["auc"],
+        "delta_auc": report["delta_vs_full"]["auc"],
+    }
+
+
+def bench_serving(n: int = 500, batch_items: int = 1000) -> dict:
+    """Single-request latency percentiles and batch throughput through the Flask test client."""
+    from app import app
+    from API.analyse import configureBatching, getBatchingStats
+
+    with open("./API/examples/completeRequest.json", encoding="utf-8") as f:
+        base = json.load(f)
+    client = app.test_client()
+    client.post("/api/calculateDisposition", json=base)
+
+    def single(payloads):
+        samples = []
+        for p in payloads:
+            t0 = time.perf_counter()
+            r = client.post("/api/calculateDisposition", json=p)
+            samples.append(time.perf_counter() - t0)
+            assert r.status_code == 200, r.get_data(as_text=True)
+        return _percentiles_ms(samples)
+
+    # Distinct payloads missed the prediction cache; a repeated one hit it
+    # Los payloads distintos fallaron en la caché; uno repetido acertó
+    distinct = [dict(base, transit_depth=100.0 + i * 0.37) for i in range(n)]
+    stats = getBatchingStats()
+    result = {"single_cached": single([base] * n)}
+    configureBatching(window_ms=0)
+    try:
+        result["single_uncached"] = single(distinct)
+    finally:
+        configureBatching(window_ms=stats["window_ms"], max_batch=stats["max_batch"])
+    result["single_uncached_batching"] = single([dict(p, transit_depth=p["transit_depth"] + 0.1) for p in distinct])
+
+    # Every repeat sent new items so the cache did not answer them
+    # Cada repetición envió items nuevos para que la caché no los respondiera
+    batches = iter([[dict(base, transit_depth=5000.0 + r * 7.3 + i * 0.11) for i in range(batch_items)]
+                    for r in range(3)])
+    best = _timeit(lambda: client.post("/api/calculateDispositions", json=next(batches)), repeat=3)
+    result["batch"] = {"items": batch_items, "request_s": best, "items_per_s": batch_items / best}
+
+    # Cone searches of 0.5 degrees at random sky positions, with fresh dispositions
+    # Búsquedas por cono de 0.5 grados en posiciones aleatorias, con disposiciones nuevas
+    rng = np.random.default_rng(0)
+    client.get("/api/cone?ra=0&dec=0&radius=0.5")
+    samples = []
+    for ra, dec in zip(rng.uniform(0, 360, n), np.degrees(np.arcsin(rng.uniform(-1, 1, n)))):
+        t0 = time.perf_counter()
+        r = client.get(f"/api/cone?ra={ra}&dec={dec}&radius=0.5")
+        samples.append(time.perf_counter() - t0)
+        assert r.status_code == 200, r.get_data(as_text=True)
+    result["cone"] = _percentiles_ms(samples)
+    positions = [{"ra": float(ra), "dec": float(dec)} for ra, dec in zip(rng.uniform(0, 360, batch_items),
+                                                                       rng.uniform(-90, 90, batch_items))]
+    best = _timeit(lambda: client.post("/api/cone", json={"positions": positions, "radius": 0.5}), repeat=3)
+    result["cone_bulk"] = {"items": batch_items, "request_s": best, "items_per_s": batch_items / best}
+
+    # Catalog explorer pages: random period range and temperature floor, sorted by depth
+    # Páginas del explorador: rango de período y temperatura mínima al azar, ordenadas por profundidad
+    client.get("/api/catalog?limit=1")
+    samples = []
+    for lo, teff in zip(rng.uniform(0.5, 50, n), rng.uniform(3000, 7000, n)):
+        t0 = time.perf_counter()
+        r = client.get(f"/api/catalog?min_period={lo}&max_period={lo * 3}&min_teff={teff}&sort=-depth&limit=50")
+        samples.append(time.perf_counter() - t0)
+        assert r.status_code == 200, r.get_data(as_text=True)
+    result["catalog_query"] = _percentiles_ms(samples)
+    return result
+
+
+def bench_crossmatch() -> dict:
+    """Crossmatch of every catalog row: KD-tree pair search and component labelling (scipy vs NumPy)."""
+    from API import crossmatch
+    from API.sky import SkyIndex
+    from API.data import readAndCreateData
+
+    index = SkyIndex(readAndCreateData(DATA_DIR, columnar=True))
+    match = crossmatch.Crossmatch(index)
+    period = index.data.column("orbital_period")
+    result = {
+        "rows": int(index.data.n),
+        "pairs": int(len(match.pairs)),
+        "pairs_s": _timeit(lambda: crossmatch.matchPairs(index), repeat=3),
+        "groups_s": _timeit(lambda: crossmatch.matchGroups(index.data.n, match.pairs, period, match.period_tol, match.sep), repeat=3),
+        "crossmatch_s": _timeit(lambda: crossmatch.Crossmatch(index), repeat=3),
+    }
+    has_scipy = crossmatch._HAS_SCIPY
+    crossmatch._HAS_SCIPY = False
+    try:
+        result["groups_numpy_s"] = _timeit(lambda: crossmatch.matchGroups(index.data.n, match.pairs, period, match.period_tol, match.sep), repeat=3)
+    finally:
+        crossmatch._HAS_SCIPY = has_scipy
+    return result
+
+
+def bench_threshold_sweep(rows: int = 20000) -> dict:
+    """Threshold queries on the stored curve (binary search) vs precision_recall_curve over the same probabilities."""
+    from sklearn.metrics import precision_recall_curve
+    from API.thresholds import ThresholdCurve
+
+    rng = np.random.default_rng(0)
+    y = (rng.random(rows) < 0.68).astype(np.int8)
+    scores = np.clip(rng.normal(0.35 + 0.3 * y, 0.2), 0, 1)
+    curve = ThresholdCurve(scores, y)
+
+    def recompute():
+        precisions, _, cuts = precision_recall_curve(y, scores)
+        return cuts[np.flatnonzero(precisions >= 0.95)[0]]
+
+    return {
+        "rows": rows,
+        "load_s": _timeit(lambda: ThresholdCurve(scores, y), repeat=3),
+        "threshold": _latency_us(lambda: curve.point(0.5)),
+        "target_precision": _latency_us(lambda: curve.point(curve.forPrecision(0.95))),
+        "curve_201": _latency_us(lambda: curve.sweep({"points": "201"}), n=50),
+        "precision_recall_curve": _latency_us(recompute, n=20),
+    }
+
+
+BENCHMARKS = {
+    "ingestion": bench_ingestion,
+    "columnar": bench_columnar,
+    "training": bench_training,
+    "training_features": bench_training_features,
+    "tuning": bench_tuning,
+    "dataset_cache": bench_dataset_cache,
+    "incremental": bench_incremental,
+    "serving": bench_serving,
+    "crossmatch": bench_crossmatch,
+    "threshold_sweep": bench_threshold_sweep,
+    "tree_evaluator": bench_tree_evaluator,
+    "model_load": bench_model_load,
+}
+
+# Values under these keys were not timings and were not compared
+# Los valores con estas claves no fueron tiempos y no se compararon
+_NOT_COMPARED = ("rows", "entries", "items", "trees", "window_ms", "max_batch", "files", "cpus", "pairs", "auc_mean",
+                 "auc", "folds", "new_rows", "delta_auc")
+
+
+def _flatten(tree, prefix: str = "") -> dict:
+    out = {}
+    for k, v in tree.items():
+        path = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            out.update(_flatten(v, path))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[path] = float(v)
+    return out
+
+
+def compareResults(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """Lists metrics that got worse than `baseline` by more than `threshold` (relative)."""
+    old, new = _flatten(baseline.get("results", baseline)), _flatten(current.get("results", current))
+    regressions = []
+    for path, before in sorted(old.items()):
+        if path not in new or path.rsplit(".", 1)[-1] in _NOT_COMPARED or before <= 0:
+            continue
+        after = new[path]
+        # Throughputs got worse going down, every other measure going up
+        # Los rendimientos empeoraron al bajar, las demás medidas al subir
+        change = (before - after) / before if path.endswith("_per_s") else (after - before) / before
+        if change > threshold:
+            regressions.append({"metric": path, "baseline": before, "current": after, "change": change})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sidereus benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline and flag regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    names = args.names or (list(baseline["results"]) if args.compare else list(BENCHMARKS))
+    results = {}
+    for name in names:
+        print(f"[INFO] Running {name}...")
+        results[name] = BENCHMARKS[name]()
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Baseline saved to {args.save}")
+    if args.compare:
+        regressions = compareResults(baseline, report, args.threshold)
+        for r in regressions:
+            print(f"[WARN] {r['metric']}: {r['baseline']:.6g} -> {r['current']:.6g} ({r['change']:+.0%})")
+        if regressions:
+            print(f"[FAIL] {len(regressions)} regressions beyond {args.threshold:.0%}")
+            return 1
+        print(f"[OK] No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# Cache of the training matrix and of LightGBM's binned Datasets (binary format) between training runs.
+# Caché de la matriz de entrenamiento y de los Dataset agrupados de LightGBM (formato binario) entre entrenamientos.
+#
+# Entries are keyed on the catalog fingerprints, the feature-spec version and the Dataset
+# parameters; a hit skips CSV parsing, feature building and LightGBM's binning.
+# Las entradas se identifican por las huellas de los catálogos, la versión de las características y
+# los parámetros del Dataset; un acierto evita leer los CSV, construir características y agrupar en bins.
+
+from __future__ import annotations
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bumped whenever TRAIN_FEATURES or their encoding change
+# Se incrementa cuando cambian TRAIN_FEATURES o su codificación
+FEATURE_SPEC_VERSION = 1
+
+# Binning parameters; pre-filtering stays off so trials may change min_child_samples freely
+# Parámetros de agrupación; el prefiltrado queda desactivado para que los ensayos cambien min_child_samples
+DATASET_PARAMS = {"max_bin": 255, "min_data_in_bin": 3, "feature_pre_filter": False, "verbose": -1}
+
+CACHE_DIR = os.getenv("SIDEREUS_TRAIN_CACHE_DIR", "./model/.train_cache")
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("SIDEREUS_TRAIN_CACHE", "1").lower() not in ("0", "false", "off", "no")
+
+
+def trainingKey(csv_paths: Sequence[str], **options: Any) -> str:
+    """Hex key of the catalogs' content, the feature spec, the Dataset parameters and `options`."""
+    import lightgbm as lgb
+    from API.data import _cache_state, MAPPER_VERSION
+
+    parts = {
+        "catalogs": [[os.path.basename(p), _cache_state(p)[2]["sha256"]] for p in csv_paths],
+        "features": FEATURE_SPEC_VERSION,
+        "mapper": MAPPER_VERSION,
+        "dataset": DATASET_PARAMS,
+        "lightgbm": lgb.__version__,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def balancedWeights(y: np.ndarray) -> np.ndarray:
+    """Per-row weights of class_weight='balanced' (n / (classes * count of the row's class))."""
+    classes, inverse, counts = np.unique(y, return_inverse=True, return_counts=True)
+    return (len(y) / (len(classes) * counts))[inverse]
+
+
+def rowHashes(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """64-bit FNV-1a hash of every row's float32 features, label and copy number (identifies rows across runs)."""
+    words = np.ascontiguousarray(X, dtype=np.float32).view(np.uint32)
+    prime = np.uint64(0x100000001B3)
+    h = np.full(len(words), 0xCBF29CE484222325, dtype=np.uint64)
+    for column in words.T:
+        h = (h ^ column.astype(np.uint64)) * prime
+    h = (h ^ np.asarray(y).astype(np.uint64)) * prime
+    # Identical rows (e.g. K2 entries with no measured quantities) were numbered so each copy stays distinct
+    # Se numeraron las filas idénticas (p. ej. entradas K2 sin magnitudes medidas) para que cada copia sea distinta
+    order = np.argsort(h, kind="stable")
+    ordered = h[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    copy = np.arange(len(h)) - np.repeat(starts, np.diff(np.r_[starts, len(h)]))
+    h[order] = (ordered ^ copy.astype(np.uint64)) * prime
+    return h
+
+
+class DatasetCache:
+    """Folder of one training key: X/y/groups as .npy plus binned train/valid Datasets per split."""
+
+    def __init__(self, key: Optional[str] = None, root: Optional[str] = None):
+        self.key = key
+        self.enabled = key is not None and _cache_enabled()
+        if self.enabled:
+            self.root = root or CACHE_DIR
+            self.folder = os.path.join(self.root, key[:16])
+            self._tmp = None
+        else:
+            # Without a key the Datasets still lived on disk for the run, so workers could share them
+            # Sin clave los Dataset igualmente vivieron en disco durante la ejecución para compartirlos
+            self._tmp = tempfile.TemporaryDirectory(prefix="sidereus-train-")
+            self.root = self.folder = self._tmp.name
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+    def loadMatrix(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]]:
+        """(X, y, groups, columns) memory-mapped from the cache, or None when absent."""
+        if not self.enabled:
+            return None
+        try:
+            with open(os.path.join(self.folder, "columns.json")) as f:
+                columns = json.load(f)
+            arrays = [np.load(os.path.join(self.folder, f"{n}.npy"), mmap_mode="r") for n in ("X", "y", "groups")]
+        except (OSError, ValueError):
+            return None
+        return arrays[0], np.asarray(arrays[1]), np.asarray(arrays[2]), columns
+
+    def saveMatrix(self, X: np.ndarray, y: np.ndarray, groups: np.ndarray, columns: List[str]) -> None:
+        """Stores the training matrix; folders of other keys are removed."""
+        if not self.enabled:
+            return
+        # Written to a sibling folder and renamed, so an interrupted run leaves no half entry
+        # Se escribió en una carpeta hermana y se renombró, para que una ejecución interrumpida no deje entradas a medias
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(self.root):
+            if name != os.path.basename(self.folder):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        np.save(os.path.join(tmp, "X.npy"), np.ascontiguousarray(X, dtype=np.float32))
+        np.save(os.path.join(tmp, "y.npy"), np.asarray(y))
+        np.save(os.path.join(tmp, "groups.npy"), np.asarray(groups))
+        with open(os.path.join(tmp, "columns.json"), "w") as f:
+            json.dump(list(columns), f)
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.replace(tmp, self.folder)
+
+    def array(self, name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+        """Array `name` read from the entry, or built by `build()` and stored (fold assignments, hold-out rows)."""
+        path = os.path.join(self.folder, f"{name}.npy")
+        if os.path.exists(path):
+            return np.load(path)
+        value = np.asarray(build())
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp, value)
+        os.replace(tmp, path)
+        return value
+
+    def splitPaths(self, name: str, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray, val_idx: np.ndarray,
+                   columns: List[str]) -> Tuple[str, str]:
+        """Binary train/valid Dataset files of split `name`, binned once and reused afterwards."""
+        train_path = os.path.join(self.folder, f"{name}.train.bin")
+        valid_path = os.path.join(self.folder, f"{name}.valid.bin")
+        if os.path.exists(train_path) and os.path.exists(valid_path):
+            self.hits += 1
+            return train_path, valid_path
+        self.misses += 1
+        import lightgbm as lgb
+
+        os.makedirs(self.folder, exist_ok=True)
+        y_train = np.asarray(y)[train_idx]
+        train = lgb.Dataset(np.asarray(X[train_idx], dtype=np.float32), y_train, weight=balancedWeights(y_train),
+                            feature_name=list(columns), params=DATASET_PARAMS, free_raw_data=True)
+        valid = lgb.Dataset(np.asarray(X[val_idx], dtype=np.float32), np.asarray(y)[val_idx], reference=train,
+                            feature_name=list(columns), params=DATASET_PARAMS, free_raw_data=True)
+        for ds, path in ((train, train_path), (valid, valid_path)):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            ds.construct().save_binary(tmp)
+            os.replace(tmp, path)
+        return train_path, valid_path
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "folder": self.folder, "hits": self.hits, "misses": self.misses}
+
+
+def loadSplit(train_path: str, valid_path: str):
+    """(train, valid) lgb.Dataset objects read back from their binary files."""
+    import lightgbm as lgb
+
+    train = lgb.Dataset(train_path, params=DATASET_PARAMS)
+    valid = lgb.Dataset(valid_path, reference=train, params=DATASET_PARAMS)
+    return train, valid
+
+
+def trainParams(params: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """lgb.train parameters and round count for a sklearn-style parameter dict."""
+    out = {k: v for k, v in params.items() if k not in ("n_estimators", "class_weight", "n_jobs")}
+    if "n_jobs" in params:
+        out["num_threads"] = params["n_jobs"]
+    out.update({k: v for k, v in DATASET_PARAMS.items() if k != "verbose"})
+    return out, int(params.get("n_estimators", 100))
@@ -0,0 +1,213 @@
+# Prediction cache keyed on the encoded feature vector and the model version.
+# Caché de predicciones indexada por el vector de características codificado y la versión del modelo.
+
+from __future__ import annotations
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# redis was checked as optional (shared backend between gunicorn workers)
+# Se comprobó redis como opcional (backend compartido entre workers de gunicorn)
+try:
+    import redis  # type: ignore
+    _HAS_REDIS = True
+except Exception:
+    _HAS_REDIS = False
+
+MISSING = object()
+
+
+def rowKeys(x: np.ndarray) -> List[bytes]:
+    """Hashes each float64 feature row; equal feature vectors give equal keys."""
+    # -0.0 was folded into 0.0 so both spellings share an entry
+    # Se unificó -0.0 con 0.0 para que ambas formas compartan entrada
+    x = np.ascontiguousarray(x, dtype=np.float64) + 0.0
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in x]
+
+
+class _RedisBackend:
+    """Shared second level stored in Redis, namespaced by model version."""
+
+    def __init__(self, url: str, ttl_s: float):
+        self._client = redis.Redis.from_url(url)
+        self._ttl = max(1, int(ttl_s))
+
+    @staticmethod
+    def _key(version: str, key: bytes) -> str:
+        return f"sidereus:pred:{version}:{key.hex()}"
+
+    def get_many(self, version: str, keys: Sequence[bytes]) -> list:
+        values = self._client.mget([self._key(version, k) for k in keys])
+        out = []
+        for v in values:
+            if v is None:
+                out.append(MISSING)
+            else:
+                s = v.decode()
+                out.append(None if s == "nan" else float(s))
+        return out
+
+    def put_many(self, version: str, items: Dict[bytes, Optional[float]]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for k, prob in items.items():
+            pipe.setex(self._key(version, k), self._ttl, "nan" if prob is None else repr(prob))
+        pipe.execute()
+
+
+class PredictionCache:
+    """Thread-safe LRU + TTL cache of probabilities bounded by an approximate memory budget.
+
+    Entries are keyed by (model version, feature key), so a hot swap never clears the cache under in-flight requests.
+    """
+
+    # Approximate cost of one entry: 16-byte key object, (prob, expiry) tuple and dict slot
+    # Costo aproximado de una entrada: clave de 16 bytes, tupla (prob, expiración) y ranura del dict
+    ENTRY_BYTES = 256
+
+    def __init__(self, max_bytes: int, ttl_s: float, shared_url: Optional[str] = None):
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._retired: set = set()
+        self._shared = None
+        if shared_url:
+            if _HAS_REDIS:
+                try:
+                    self._shared = _RedisBackend(shared_url, ttl_s)
+                except Exception as e:
+                    print(f"[WARN] Shared cache disabled: {e}")
+            else:
+                print("[WARN] SIDEREUS_CACHE_REDIS_URL is set but redis is not installed")
+        self._hits = self._misses = self._evictions = self._expirations = 0
+        self._invalidations = self._shared_hits = self._shared_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes >= self.ENTRY_BYTES
+
+    @property
+    def max_entries(self) -> int:
+        return self.max_bytes // self.ENTRY_BYTES
+
+    def retire(self, active_version: str) -> int:
+        """Drops the entries of every version but `active_version`; call it once that version serves traffic."""
+        # Entries were keyed per version, so older ones were only dropped after the swap
+        # Las entradas se indexaron por versión, así que las anteriores solo se descartaron tras el cambio
+        with self._lock:
+            old = [k for k in self._data if k[0] != active_version]
+            for k in old:
+                del self._data[k]
+            self._retired.update(k[0] for k in old)
+            self._retired.discard(active_version)
+            if old:
+                self._invalidations += 1
+            return len(old)
+
+    def get_many(self, version: str, keys: Sequence[bytes]) -> list:
+        """Returns the cached probability for each key, or the MISSING sentinel."""
+        out = []
+        now = time.monotonic()
+        remote = []
+        with self._lock:
+            for i, k in enumerate(keys):
+                item = self._data.get((version, k))
+                if item is not None and item[1] < now:
+                    del self._data[(version, k)]
+                    self._expirations += 1
+                    item = None
+                if item is None:
+                    out.append(MISSING)
+                    remote.append(i)
+                else:
+                    self._data.move_to_end((version, k))
+                    out.append(item[0])
+                    self._hits += 1
+
+        if remote and self._shared is not None:
+            try:
+                found = self._shared.get_many(version, [keys[i] for i in remote])
+            except Exception:
+                found = [MISSING] * len(remote)
+                with self._lock:
+                    self._shared_errors += 1
+            fill = {}
+            for i, v in zip(remote, found):
+                if v is not MISSING:
+                    out[i] = v
+                    fill[keys[i]] = v
+            if fill:
+                self._put_local(version, fill)
+                with self._lock:
+                    self._shared_hits += len(fill)
+                    self._hits += len(fill)
+                remote = [i for i in remote if out[i] is MISSING]
+
+        with self._lock:
+            self._misses += len(remote)
+        return out
+
+    def _put_local(self, version: str, items: Dict[bytes, Optional[float]]) -> None:
+        expiry = time.monotonic() + self.ttl_s
+        with self._lock:
+            # Late results of a retired version were not stored
+            # No se guardaron los resultados tardíos de una versión retirada
+            if version in self._retired:
+                return
+            for k, prob in items.items():
+                self._data[(version, k)] = (prob, expiry)
+                self._data.move_to_end((version, k))
+            # Least recently used entries were evicted to stay within the budget
+            # Se expulsaron las entradas menos usadas para respetar el presupuesto
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def put_many(self, version: str, items: Dict[bytes, Optional[float]]) -> None:
+        if not items:
+            return
+        self._put_local(version, items)
+        if self._shared is not None:
+            try:
+                self._shared.put_many(version, items)
+            except Exception:
+                with self._lock:
+                    self._shared_errors += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "shared": self._shared is not None,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "approx_bytes": len(self._data) * self.ENTRY_BYTES,
+                "ttl_s": self.ttl_s,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+                "shared_hits": self._shared_hits,
+                "shared_errors": self._shared_errors,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
+
+
+def cacheFromEnv() -> PredictionCache:
+    """Builds the cache from SIDEREUS_CACHE_MB, SIDEREUS_CACHE_TTL_S and SIDEREUS_CACHE_REDIS_URL."""
+    return PredictionCache(
+        max_bytes=int(float(os.getenv("SIDEREUS_CACHE_MB", "32")) * 1024 * 1024),
+        ttl_s=float(os.getenv("SIDEREUS_CACHE_TTL_S", "3600")),
+        shared_url=os.getenv("SIDEREUS_CACHE_REDIS_URL") or None,
+    )
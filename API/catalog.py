@@ -0,0 +1,568 @@
+# Usage: python -m API.catalog [data_dir]
+# Scores the bundled catalogs offline and keeps the results in an indexed SQLite store.
+# Puntúa los catálogos incluidos sin conexión y guarda los resultados en un almacén SQLite indexado.
+
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from API.data import getDataType
+from API.entry import DatasetType, Disposition
+
+# fcntl was checked as optional (one builder across gunicorn workers)
+# Se comprobó fcntl como opcional (un solo constructor entre workers de gunicorn)
+try:
+    import fcntl  # type: ignore
+    _HAS_FCNTL = True
+except Exception:
+    _HAS_FCNTL = False
+
+DATA_DIR = "./static/data"
+STORE_PATH = os.getenv("SIDEREUS_CATALOG_STORE", "./model/catalog_scores.sqlite")
+STORE_FORMAT = 2
+POLL_S = float(os.getenv("SIDEREUS_CATALOG_POLL_S", "10"))
+
+_FEATURES = (
+    "orbital_period", "transit_epoch", "transit_duration", "transit_depth",
+    "planet_radius", "equilibrium_temp", "insolation",
+    "stellar_temp", "stellar_logg", "stellar_radius",
+)
+_PREFIX = re.compile(r"^(KOI|TOI|K2|KIC|TIC|EPIC|KEPLER)[\s_-]*", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE entries (
+    dataset TEXT NOT NULL,
+    source TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    updated TEXT,
+    row_hash TEXT NOT NULL,
+    id TEXT,
+    name TEXT,
+    id_key TEXT,
+    name_key TEXT,
+    probability REAL,
+    disposition TEXT NOT NULL,
+    catalog_disposition TEXT,
+    ra REAL,
+    dec REAL,
+    features TEXT NOT NULL
+);
+CREATE INDEX entries_name ON entries (dataset, name_key);
+CREATE INDEX entries_id ON entries (dataset, id_key);
+CREATE INDEX entries_row ON entries (source, row_key);
+CREATE TABLE tombstones (
+    dataset TEXT NOT NULL,
+    source TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    id TEXT,
+    name TEXT,
+    disposition TEXT,
+    probability REAL,
+    removed_at TEXT NOT NULL
+);
+CREATE INDEX tombstones_row ON tombstones (source, row_key);
+CREATE TABLE refreshes (at TEXT NOT NULL, report TEXT NOT NULL);
+"""
+_COLUMNS = (
+    "dataset", "source", "row_key", "updated", "row_hash", "id", "name", "id_key", "name_key",
+    "probability", "disposition", "catalog_disposition", "ra", "dec", "features",
+)
+_INSERT = f"INSERT INTO entries ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+
+def lookupKey(value: Any) -> Optional[str]:
+    """Normalizes an identifier so "TOI-1000.01", "1000.01" and 1000.01 give the same key."""
+    # Mission prefix was dropped and numbers were written in one canonical form
+    # Se quitó el prefijo de misión y los números se escribieron en una forma canónica
+    if value is None:
+        return None
+    text = _PREFIX.sub("", str(value).strip()).upper()
+    try:
+        num = float(text)
+        text = str(int(num)) if num.is_integer() else repr(num)
+    except ValueError:
+        pass
+    return text or None
+
+
+def catalogSignature(data_dir: str = DATA_DIR) -> str:
+    """Size and mtime of every CSV in `data_dir`; changes when a catalog is replaced."""
+    parts = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.lower().endswith(".csv"):
+            st = os.stat(os.path.join(data_dir, name))
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+    return ";".join(parts)
+
+
+def _file_signatures(signature: str) -> Dict[str, str]:
+    # catalogSignature() split back into {file name: "size:mtime"}
+    # catalogSignature() separada de nuevo en {nombre de archivo: "tamaño:fecha"}
+    out = {}
+    for part in filter(None, (signature or "").split(";")):
+        name, _, stamp = part.partition(":")
+        out[name] = stamp
+    return out
+
+
+def _quantity_values(entry) -> Dict[str, Optional[float]]:
+    out = {}
+    for name in _FEATURES:
+        q = getattr(entry, name, None)
+        out[name] = getattr(q, "value", None) if q is not None else None
+    return out
+
+
+_REPEAT = re.compile(r"#\d+$")
+
+
+class _RowKeys:
+    """Per-file row keys: the name (else "id:" + id), with "#n" added to repeats.
+
+    Only unique names are stable; "#n" follows row order, so refreshStore rebuilds when a repeated name changes.
+    """
+
+    def __init__(self):
+        self._seen: Dict[str, int] = {}
+
+    def __call__(self, entry) -> str:
+        base = lookupKey(entry.name) or f"id:{lookupKey(entry.id)}"
+        n = self._seen.get(base, 0) + 1
+        self._seen[base] = n
+        return base if n == 1 else f"{base}#{n}"
+
+    @staticmethod
+    def base(key: str) -> str:
+        return _REPEAT.sub("", key)
+
+    def repeated(self) -> set:
+        """Keys given to more than one row so far."""
+        return {k for k, n in self._seen.items() if n > 1}
+
+
+def _row_fields(entry) -> tuple:
+    # Catalog-side fields of a row and the hash that detects changes without a rowupdate column
+    # Campos del catálogo de una fila y el hash que detecta cambios sin columna rowupdate
+    features = json.dumps(_quantity_values(entry))
+    catalog_disposition = entry.disposition.value if isinstance(entry.disposition, Disposition) else entry.disposition
+    updated = None if entry.updated is None else str(entry.updated)
+    content = json.dumps([features, getattr(entry, "score", None), catalog_disposition,
+                          entry.ra, entry.dec, updated, str(entry.id), str(entry.name)])
+    return features, catalog_disposition, updated, hashlib.blake2b(content.encode(), digest_size=12).hexdigest()
+
+
+def _row_values(ds: DatasetType, source: str, row_key: str, entry, prediction) -> tuple:
+    features, catalog_disposition, updated, row_hash = _row_fields(entry)
+    return (
+        ds.name, source, row_key, updated, row_hash,
+        None if entry.id is None else str(entry.id),
+        None if entry.name is None else str(entry.name),
+        lookupKey(entry.id), lookupKey(entry.name),
+        prediction.probability, prediction.disposition.value, catalog_disposition,
+        entry.ra, entry.dec, features,
+    )
+
+
+def _counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    return dict(conn.execute("SELECT dataset, COUNT(*) FROM entries GROUP BY dataset ORDER BY dataset").fetchall())
+
+
+def buildStore(data_dir: str = DATA_DIR, path: str = STORE_PATH) -> Dict[str, Any]:
+    """Scores every bundled catalog in bulk and atomically replaces the store at `path`."""
+    from API.analyse import scoreCatalogChunks
+
+    t0 = time.perf_counter()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript(_SCHEMA)
+
+    counts: Dict[str, int] = {}
+    skipped = 0
+    version = None
+    for name in sorted(os.listdir(data_dir)):
+        if not name.lower().endswith(".csv"):
+            continue
+        ds = getDataType(os.path.join(data_dir, name))
+        if ds == DatasetType.UNKNOWN:
+            continue
+        # Each catalog was streamed in bounded chunks, scored with one model call per chunk
+        # and its own dataset one-hot
+        # Cada catálogo se leyó en bloques acotados, puntuados con una llamada al modelo por
+        # bloque y su propio one-hot de dataset
+        counts.setdefault(ds.name, 0)
+        row_key = _RowKeys()
+        for chunk, predictions in scoreCatalogChunks(os.path.join(data_dir, name)):
+            rows = []
+            for e, p in zip(chunk.entries, predictions):
+                version = version or p.model_version
+                if e.id is None and e.name is None:
+                    skipped += 1
+                    continue
+                rows.append(_row_values(ds, name, row_key(e), e, p))
+            conn.executemany(_INSERT, rows)
+            counts[ds.name] += len(rows)
+
+    meta = {
+        "format": str(STORE_FORMAT),
+        "model_version": version or "",
+        "catalogs": catalogSignature(data_dir),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "counts": json.dumps(counts),
+    }
+    conn.executemany("INSERT INTO meta VALUES (?,?)", meta.items())
+    conn.commit()
+    conn.close()
+    # Store file was swapped in whole so readers never see a partial build
+    # Se reemplazó el archivo completo para que los lectores nunca vean una construcción parcial
+    os.replace(tmp, path)
+    return {
+        "model_version": version, "counts": counts, "skipped_without_id": skipped,
+        "build_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+def _apply_changes(conn: sqlite3.Connection, data_dir: str, meta: Dict[str, str], t0: float):
+    # Changed CSVs were applied to `conn`; returned (info, None), or (None, reason) when a full rebuild is needed
+    # Se aplicaron los CSV cambiados a `conn`; devolvió (info, None), o (None, motivo) si hace falta reconstruir todo
+    from API.analyse import calculateDispositions
+    from API.data import iterCatalogChunks
+
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    old_files = _file_signatures(meta.get("catalogs", ""))
+    new_files = _file_signatures(catalogSignature(data_dir))
+    report: Dict[str, Any] = {}
+
+    def tombstone(rows) -> None:
+        conn.executemany(
+            "INSERT INTO tombstones VALUES (?,?,?,?,?,?,?,?)",
+            [(r[1], r[2], r[3], r[4], r[5], r[6], r[7], now) for r in rows],
+        )
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", [(r[0],) for r in rows])
+
+    select = ("SELECT rowid, dataset, source, row_key, id, name, disposition, probability, updated, row_hash, "
+              "catalog_disposition FROM entries WHERE source = ?")
+    for source in sorted(set(old_files) | set(new_files)):
+        if old_files.get(source) == new_files.get(source):
+            continue
+        stored = {r[3]: r for r in conn.execute(select, (source,)).fetchall()}
+        if source not in new_files:
+            # Catalog file was deleted: every one of its rows became a tombstone
+            # Se borró el archivo del catálogo: todas sus filas pasaron a ser lápidas
+            tombstone(list(stored.values()))
+            report[source] = {"added": 0, "changed": 0, "unchanged": 0, "removed": len(stored),
+                              "flipped": [], "catalog_flipped": []}
+            continue
+
+        file_path = os.path.join(data_dir, source)
+        ds = getDataType(file_path)
+        if ds == DatasetType.UNKNOWN:
+            continue
+        row_key = _RowKeys()
+        seen = set()
+        touched_keys: List[str] = []
+        added = changed = unchanged = 0
+        flipped, catalog_flipped = [], []
+        for chunk in iterCatalogChunks(file_path, kind="entries"):
+            pending = []
+            for e in chunk:
+                if e.id is None and e.name is None:
+                    continue
+                key = row_key(e)
+                seen.add(key)
+                old = stored.get(key)
+                if old is not None:
+                    # Equal update timestamps meant unchanged; rows without one were compared by content
+                    # Fechas de actualización iguales indicaron sin cambios; sin fecha se comparó el contenido
+                    _, _, updated, row_hash = _row_fields(e)
+                    if (updated is not None and updated == old[8]) or row_hash == old[9]:
+                        unchanged += 1
+                        continue
+                pending.append((key, e, old))
+            if not pending:
+                continue
+            predictions = calculateDispositions([e for _, e, _ in pending], ds, use_cache=False)
+            for (key, e, old), p in zip(pending, predictions):
+                touched_keys.append(key)
+                values = _row_values(ds, source, key, e, p)
+                if old is None:
+                    conn.execute(_INSERT, values)
+                    conn.execute("DELETE FROM tombstones WHERE source = ? AND row_key = ?", (source, key))
+                    added += 1
+                    continue
+                conn.execute(
+                    f"UPDATE entries SET {', '.join(f'{c} = ?' for c in _COLUMNS)} WHERE rowid = ?",
+                    values + (old[0],),
+                )
+                changed += 1
+                # Model dispositions and catalog (NASA) dispositions that changed were reported apart
+                # Se informaron por separado los cambios de disposición del modelo y del catálogo (NASA)
+                if p.disposition.value != old[6]:
+                    flipped.append({
+                        "row_key": key, "id": values[5], "name": values[6],
+                        "from": old[6], "to": p.disposition.value,
+                        "probability_before": old[7], "probability_after": p.probability,
+                    })
+                if values[11] != old[10]:
+                    catalog_flipped.append({
+                        "row_key": key, "id": values[5], "name": values[6], "from": old[10], "to": values[11],
+                    })
+        removed = [r for k, r in stored.items() if k not in seen]
+        # Repeated names were keyed by row order, so any change among them (an edit, an insertion or a
+        # reorder) could attach scores or tombstones to the wrong row: the store was rebuilt instead
+        # Los nombres repetidos se identificaron por el orden de filas, así que cualquier cambio entre ellos
+        # (edición, inserción o reordenamiento) podía asignar puntajes o lápidas a otra fila: se reconstruyó
+        repeated = row_key.repeated() | {_RowKeys.base(k) for k in stored if _RowKeys.base(k) != k}
+        touched = touched_keys + [r[3] for r in removed]
+        if any(_RowKeys.base(k) in repeated for k in touched):
+            return None, f"repeated names changed in {source}"
+        tombstone(removed)
+        report[source] = {
+            "dataset": ds.name, "added": added, "changed": changed, "unchanged": unchanged,
+            "removed": len(removed), "flipped": flipped, "catalog_flipped": catalog_flipped,
+        }
+
+    counts = _counts(conn)
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?,?)", {
+        "catalogs": catalogSignature(data_dir),
+        "counts": json.dumps(counts),
+        "refreshed_at": now,
+    }.items())
+    info = {
+        "model_version": meta["model_version"], "counts": counts, "full_rebuild": False, "datasets": report,
+        "build_s": round(time.perf_counter() - t0, 3),
+    }
+    conn.execute("INSERT INTO refreshes VALUES (?,?)", (now, json.dumps(info)))
+    return info, None
+
+
+def refreshStore(data_dir: str = DATA_DIR, path: str = STORE_PATH) -> Dict[str, Any]:
+    """Applies changed CSVs to an existing store: only new or updated rows are re-scored and
+    removed rows leave tombstones. Returns the change report (also kept in the refreshes table)."""
+    from API.analyse import activeModelInfo
+
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        meta = {}
+    version = activeModelInfo()["model_version"]
+    # Stored probabilities of another model or store format cannot be kept, so everything was rebuilt
+    # No se pueden conservar probabilidades de otro modelo o formato, así que se reconstruyó todo
+    if meta.get("format") != str(STORE_FORMAT) or meta.get("model_version") != version:
+        conn.close()
+        info = buildStore(data_dir, path)
+        return dict(info, full_rebuild=True, datasets={})
+
+    # Changes were applied to a copy that replaced the store whole, as in buildStore, so readers
+    # never saw a half-applied refresh
+    # Los cambios se aplicaron a una copia que reemplazó el almacén completo, como en buildStore,
+    # así que los lectores nunca vieron una actualización a medias
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    copy = sqlite3.connect(tmp)
+    try:
+        conn.backup(copy)
+        conn.close()
+        info, reason = _apply_changes(copy, data_dir, meta, t0)
+        copy.commit()
+    except BaseException:
+        conn.close()
+        copy.close()
+        os.remove(tmp)
+        raise
+    copy.close()
+    if info is None:
+        os.remove(tmp)
+        info = buildStore(data_dir, path)
+        return dict(info, full_rebuild=True, datasets={}, reason=reason)
+    os.replace(tmp, path)
+    return info
+
+
+class CatalogStore:
+    """Read side of the store: per-thread read-only connections reopened when the file is replaced."""
+
+    def __init__(self, path: str = STORE_PATH, data_dir: str = DATA_DIR):
+        self.path = path
+        self.data_dir = data_dir
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._building = False
+        self._last_error: Optional[str] = None
+        self._signature: Optional[str] = None
+        self._checked = 0.0
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        # Connection was reopened when the store file changed on disk
+        # Se reabrió la conexión cuando el archivo del almacén cambió en disco
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns)
+        if getattr(self._local, "stamp", None) != stamp:
+            old = getattr(self._local, "conn", None)
+            if old is not None:
+                old.close()
+            self._local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn.row_factory = sqlite3.Row
+            self._local.meta = dict(self._local.conn.execute("SELECT key, value FROM meta").fetchall())
+            self._local.stamp = stamp
+        return self._local.conn
+
+    def meta(self) -> Dict[str, str]:
+        return dict(getattr(self._local, "meta", {})) if self._conn() is not None else {}
+
+    def _catalogs(self, fresh: bool = False) -> str:
+        # CSV folder was listed and stat'ed at most once per SIDEREUS_CATALOG_POLL_S, like the model watcher
+        # La carpeta de CSV se listó y revisó como máximo una vez cada SIDEREUS_CATALOG_POLL_S, como el vigilante del modelo
+        now = time.monotonic()
+        if fresh or self._signature is None or now - self._checked >= POLL_S:
+            self._signature = catalogSignature(self.data_dir)
+            self._checked = now
+        return self._signature
+
+    def isStale(self, model_version: Optional[str], fresh: bool = False) -> bool:
+        meta = self.meta()
+        if not meta or meta.get("format") != str(STORE_FORMAT):
+            return True
+        if model_version is not None and meta.get("model_version") != model_version:
+            return True
+        return meta.get("catalogs") != self._catalogs(fresh)
+
+    def rebuild(self) -> None:
+        """Rebuilds the store; across processes only one builder runs at a time."""
+        lock_file = None
+        try:
+            if _HAS_FCNTL:
+                lock_file = open(f"{self.path}.lock", "w")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            from API.analyse import activeModelInfo
+            # Another worker may have finished the same build while we waited
+            # Otro worker pudo terminar la misma construcción mientras se esperaba
+            version = activeModelInfo()["model_version"]
+            if self.isStale(version, fresh=True):
+                # Only changed catalogs were applied when the store already matched this model
+                # Solo se aplicaron los catálogos cambiados cuando el almacén ya correspondía a este modelo
+                meta = self.meta()
+                if meta.get("format") == str(STORE_FORMAT) and meta.get("model_version") == version:
+                    info = refreshStore(self.data_dir, self.path)
+                    print(f"[INFO] Catalog store refreshed in {info['build_s']}s: {_summary(info)}")
+                else:
+                    info = buildStore(self.data_dir, self.path)
+                    print(f"[INFO] Catalog store rebuilt for model {info['model_version']} in {info['build_s']}s")
+            self._last_error = None
+        except Exception as e:
+            self._last_error = str(e)
+            print(f"[WARN] Catalog store rebuild failed: {e}")
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+            with self._lock:
+                self._building = False
+
+    def ensureFresh(self, model_version: Optional[str]) -> bool:
+        """Starts a background rebuild when the store is missing or stale; True while one runs."""
+        if not self.isStale(model_version):
+            return False
+        with self._lock:
+            if not self._building:
+                self._building = True
+                threading.Thread(target=self.rebuild, name="catalog-builder", daemon=True).start()
+        return True
+
+    def lookup(self, dataset: DatasetType, ident: Any) -> List[Dict[str, Any]]:
+        """Rows of `dataset` whose name matches `ident`, else whose id matches it."""
+        conn = self._conn()
+        if conn is None:
+            return []
+        key = lookupKey(ident)
+        rows = conn.execute(
+            "SELECT * FROM entries WHERE dataset = ? AND name_key = ?", (dataset.name, key)
+        ).fetchall()
+        if not rows:
+            rows = conn.execute(
+                "SELECT * FROM entries WHERE dataset = ? AND id_key = ?", (dataset.name, key)
+            ).fetchall()
+        out = []
+        for r in rows:
+            item = {k: r[k] for k in r.keys() if k not in ("id_key", "name_key", "row_key", "row_hash", "features")}
+            item["features"] = json.loads(r["features"])
+            out.append(item)
+        return out
+
+    def removed(self, dataset: DatasetType, ident: Any) -> List[Dict[str, Any]]:
+        """Tombstones of `dataset` rows matching `ident` that a refresh removed."""
+        conn = self._conn()
+        if conn is None:
+            return []
+        key = lookupKey(ident)
+        try:
+            rows = conn.execute(
+                "SELECT * FROM tombstones WHERE dataset = ? AND (row_key = ? OR row_key = ?) ORDER BY removed_at DESC",
+                (dataset.name, key, f"id:{key}"),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Store written by an older format (no tombstones yet)
+            # Almacén escrito con un formato anterior (aún sin lápidas)
+            return []
+        return [dict(r) for r in rows]
+
+    def changes(self, limit: int = 1) -> List[Dict[str, Any]]:
+        """Most recent refresh reports, newest first."""
+        conn = self._conn()
+        if conn is None:
+            return []
+        try:
+            rows = conn.execute("SELECT report FROM refreshes ORDER BY rowid DESC LIMIT ?", (int(limit),)).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        return [json.loads(r[0]) for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        meta = self.meta()
+        return {
+            "path": self.path,
+            "built": bool(meta),
+            "model_version": meta.get("model_version"),
+            "built_at": meta.get("built_at"),
+            "refreshed_at": meta.get("refreshed_at"),
+            "counts": json.loads(meta["counts"]) if "counts" in meta else {},
+            "building": self._building,
+            "last_error": self._last_error,
+        }
+
+
+def _summary(info: Dict[str, Any]) -> str:
+    parts = []
+    for source, r in info.get("datasets", {}).items():
+        parts.append(f"{source} +{r['added']} ~{r['changed']} -{r['removed']} "
+                     f"({len(r['flipped'])} flipped, {len(r['catalog_flipped'])} catalog flips)")
+    return "; ".join(parts) or "no catalog changes"
+
+
+if __name__ == "__main__":
+    # --refresh applies only the changed catalogs and prints the change report
+    # --refresh aplica solo los catálogos cambiados e imprime el informe de cambios
+    args = [a for a in sys.argv[1:] if a != "--refresh"]
+    target = args[0] if args else DATA_DIR
+    if "--refresh" in sys.argv[1:] and os.path.exists(STORE_PATH):
+        info = refreshStore(target)
+        print(f"[OK] Catalog store refreshed: {_summary(info)}")
+        print(json.dumps(info, indent=2))
+    else:
+        info = buildStore(target)
+        print(f"[OK] Catalog store written to {STORE_PATH}: {json.dumps(info)}")
@@ -0,0 +1,267 @@
+# Usage: python -m API.crossmatch [data_dir]
+# Groups catalog rows that describe the same object: close on the sky and with agreeing orbital periods.
+# Agrupa las filas de catálogo que describen el mismo objeto: cercanas en el cielo y con períodos orbitales concordantes.
+
+from __future__ import annotations
+import os
+import sys
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from API.entry import DatasetType
+from API.sky import SkyIndex, getSkyIndex, angularSeparation, _chord
+
+# scipy was checked as optional (connected components; without it labels are propagated with NumPy)
+# Se comprobó scipy como opcional (componentes conexas; sin él las etiquetas se propagan con NumPy)
+try:
+    from scipy.sparse import coo_matrix  # type: ignore
+    from scipy.sparse.csgraph import connected_components  # type: ignore
+    _HAS_SCIPY = True
+except Exception:
+    _HAS_SCIPY = False
+
+MATCH_RADIUS_ARCSEC = float(os.getenv("SIDEREUS_MATCH_RADIUS_ARCSEC", "3"))
+PERIOD_TOLERANCE = float(os.getenv("SIDEREUS_MATCH_PERIOD_TOL", "0.01"))
+
+_QUANTITIES = (
+    "orbital_period", "transit_epoch", "transit_duration", "transit_depth",
+    "planet_radius", "equilibrium_temp", "insolation",
+    "stellar_temp", "stellar_logg", "stellar_radius",
+)
+
+
+def matchPairs(index: SkyIndex, radius_arcsec: float = MATCH_RADIUS_ARCSEC,
+               period_tol: float = PERIOD_TOLERANCE) -> np.ndarray:
+    """(m, 2) catalog rows closer than `radius_arcsec` whose periods agree within `period_tol`.
+
+    Rows of the same star (siblings in a multi-planet system) are told apart by period; when
+    either period is unknown the pair is a candidate by position alone, and matchGroups keeps
+    such links from chaining siblings together.
+    """
+    return _match_pairs(index, radius_arcsec, period_tol)[0]
+
+
+def _match_pairs(index: SkyIndex, radius_arcsec: float, period_tol: float):
+    # Pairs came with their separations so period conflicts could be resolved nearest first
+    # Los pares salieron con sus separaciones para resolver conflictos de período por cercanía
+    if index.tree is not None:
+        pts = index.tree.query_pairs(_chord(radius_arcsec / 3600.0), output_type="ndarray")
+    else:
+        # Without scipy the candidate pairs came from a sort on declination plus a window scan
+        # Sin scipy los pares candidatos salieron de un orden por declinación y una ventana
+        order = np.argsort(index.dec, kind="stable")
+        window = radius_arcsec / 3600.0
+        hi = np.searchsorted(index.dec[order], index.dec[order] + window, side="right")
+        pts = [(order[i], order[j]) for i in range(len(order)) for j in range(i + 1, hi[i])]
+        pts = np.array(pts, dtype=np.intp).reshape(-1, 2)
+    a, b = index.rows[pts[:, 0]], index.rows[pts[:, 1]]
+    sep = angularSeparation(index.ra[pts[:, 0]], index.dec[pts[:, 0]], index.ra[pts[:, 1]], index.dec[pts[:, 1]])
+    period = index.data.column("orbital_period")
+    pa, pb = period[a], period[b]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        agree = np.abs(pa - pb) <= period_tol * np.maximum(pa, pb)
+    keep = (sep * 3600.0 <= radius_arcsec) & (agree | np.isnan(pa) | np.isnan(pb))
+    return np.column_stack((a[keep], b[keep])), sep[keep]
+
+
+def _components(n: int, pairs: np.ndarray) -> np.ndarray:
+    if len(pairs) == 0:
+        return np.arange(n, dtype=np.int64)
+    if _HAS_SCIPY:
+        graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels.astype(np.int64)
+    # Smallest row index was propagated along the pairs until nothing changed
+    # Se propagó el índice de fila menor por los pares hasta que nada cambió
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        low = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+        before = labels.copy()
+        np.minimum.at(labels, pairs[:, 0], low)
+        np.minimum.at(labels, pairs[:, 1], low)
+        labels = labels[labels]
+        if np.array_equal(before, labels):
+            return labels
+
+
+def _period_span(period: np.ndarray, labels: np.ndarray, size: int):
+    low = np.full(size, np.inf)
+    high = np.full(size, -np.inf)
+    known = ~np.isnan(period)
+    np.fmin.at(low, labels[known], period[known])
+    np.fmax.at(high, labels[known], period[known])
+    return low, high
+
+
+def matchGroups(n: int, pairs: np.ndarray, period: Optional[np.ndarray] = None,
+                period_tol: float = PERIOD_TOLERANCE, sep: Optional[np.ndarray] = None) -> np.ndarray:
+    """Connected-component label of each of `n` rows; unmatched rows get their own label.
+
+    With `period`, no group keeps known periods more than `period_tol` apart: components that would
+    (siblings chained through rows of unknown period) are rebuilt pair by pair, nearest pair first,
+    and a link that would widen the group's period range beyond the tolerance is dropped.
+    """
+    labels = _components(n, pairs)
+    if period is None or len(pairs) == 0:
+        return labels
+    size = int(labels.max()) + 1
+    low, high = _period_span(period, labels, size)
+    bad = high - low > period_tol * high
+    if not bad.any():
+        return labels
+
+    # Union-find over the pairs of the conflicting components, with each root's known period range
+    # Unión-búsqueda sobre los pares de las componentes en conflicto, con el rango de períodos de cada raíz
+    inside = bad[labels[pairs[:, 0]]]
+    order = np.flatnonzero(inside)
+    if sep is not None:
+        order = order[np.argsort(sep[order], kind="stable")]
+    parent = {}
+    span = {}
+
+    def root(i: int) -> int:
+        while parent.get(i, i) != i:
+            parent[i] = parent.get(parent[i], parent[i])
+            i = parent[i]
+        return i
+
+    for a, b in pairs[order].tolist():
+        ra, rb = root(a), root(b)
+        if ra == rb:
+            continue
+        la, ha = span.get(ra, (period[a], period[a]) if period[a] == period[a] else (np.inf, -np.inf))
+        lb, hb = span.get(rb, (period[b], period[b]) if period[b] == period[b] else (np.inf, -np.inf))
+        lo, hi = min(la, lb), max(ha, hb)
+        if hi - lo > period_tol * hi:
+            continue
+        parent[rb] = ra
+        span[ra] = (lo, hi)
+
+    # Rows of rebuilt components were relabelled by their new root, then all labels compacted
+    # Las filas de componentes reconstruidas se reetiquetaron por su nueva raíz y se compactaron
+    rows = np.flatnonzero(bad[labels])
+    labels = labels.copy()
+    labels[rows] = size + np.array([root(i) for i in rows.tolist()], dtype=np.int64)
+    return np.unique(labels, return_inverse=True)[1].astype(np.int64)
+
+
+class Crossmatch:
+    """Match groups over the rows of a ColumnarExoplanetData (row order of the sky index data)."""
+
+    def __init__(self, index: SkyIndex, radius_arcsec: float = MATCH_RADIUS_ARCSEC,
+                 period_tol: float = PERIOD_TOLERANCE):
+        self.index = index
+        self.data = index.data
+        self.signature = index.signature
+        self.radius_arcsec = radius_arcsec
+        self.period_tol = period_tol
+        self.pairs, self.sep = _match_pairs(index, radius_arcsec, period_tol)
+        self.groups = matchGroups(self.data.n, self.pairs, self.data.column("orbital_period"), period_tol, self.sep)
+        self.sizes = np.bincount(self.groups, minlength=self.data.n) if self.data.n else np.zeros(0, np.int64)
+        # Rows were sorted by group once so the members of any group are one slice
+        # Se ordenaron las filas por grupo una vez para que los miembros de un grupo sean un tramo
+        self._order = np.argsort(self.groups, kind="stable")
+        self._starts = np.searchsorted(self.groups[self._order], np.arange(len(self.sizes)))
+        self._keys: Optional[Dict[tuple, List[int]]] = None
+
+    def members(self, row: int) -> np.ndarray:
+        """Rows in the same group as `row` (itself included)."""
+        g = self.groups[row]
+        start = self._starts[g]
+        return self._order[start:start + self.sizes[g]]
+
+    def linked(self, row: int) -> List[Dict[str, Any]]:
+        """Identifiers of the other rows matched to `row`."""
+        out = []
+        for i in self.members(row).tolist():
+            if i == row:
+                continue
+            e = self.data.entry(i)
+            out.append({
+                "dataset": DatasetType(int(self.data.datasets[i])).name,
+                "id": None if e.id is None else str(e.id),
+                "name": None if e.name is None else str(e.name),
+            })
+        return out
+
+    def find(self, dataset: DatasetType, ident: Any) -> List[int]:
+        """Rows of `dataset` whose name (else id) matches `ident`, as catalog lookups do."""
+        from API.catalog import lookupKey
+
+        if self._keys is None:
+            keys: Dict[tuple, List[int]] = {}
+            names, ids = self.data.textValues("name"), self.data.textValues("id")
+            for i, (ds, name, ident_) in enumerate(zip(self.data.datasets.tolist(), names, ids)):
+                keys.setdefault((ds, "name", lookupKey(name)), []).append(i)
+                keys.setdefault((ds, "id", lookupKey(ident_)), []).append(i)
+            self._keys = keys
+        key = lookupKey(ident)
+        return self._keys.get((dataset.value, "name", key)) or self._keys.get((dataset.value, "id", key)) or []
+
+    def representatives(self, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+        """One row per group among `rows`: the one with most known quantities, then the first."""
+        rows = np.arange(self.data.n) if rows is None else np.asarray(rows, dtype=np.intp)
+        known = sum((~np.isnan(self.data.column(q)[rows])).astype(np.int64) for q in _QUANTITIES)
+        order = np.lexsort((rows, -known, self.groups[rows]))
+        groups = self.groups[rows][order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = groups[1:] != groups[:-1]
+        return np.sort(rows[order[first]])
+
+    def stats(self) -> Dict[str, Any]:
+        multi = self.sizes > 1
+        kinds = self.data.datasets
+        a, b = (self.pairs[:, 0], self.pairs[:, 1]) if len(self.pairs) else (np.zeros(0, np.intp),) * 2
+        return {
+            "rows": int(self.data.n),
+            "pairs": int(len(self.pairs)),
+            "cross_mission_pairs": int(np.sum(kinds[a] != kinds[b])),
+            "groups_with_matches": int(np.sum(multi)),
+            "rows_in_groups": int(np.sum(self.sizes[multi])),
+            "radius_arcsec": self.radius_arcsec,
+            "period_tol": self.period_tol,
+        }
+
+
+# Fields a crossmatch reads (positions, and the quantities representatives() counts)
+# Campos que lee un cruce (posiciones y las magnitudes que cuenta representatives())
+MATCH_FIELDS = ("ra", "dec") + _QUANTITIES
+
+
+def crossmatchData(data, radius_arcsec: float = MATCH_RADIUS_ARCSEC,
+                   period_tol: float = PERIOD_TOLERANCE) -> Crossmatch:
+    """Crossmatch of any ColumnarExoplanetData (e.g. the catalogs a training run uses)."""
+    return Crossmatch(SkyIndex(data), radius_arcsec, period_tol)
+
+
+_MATCH: Optional[Crossmatch] = None
+_LOCK = threading.Lock()
+
+
+def builtCrossmatch() -> Optional[Crossmatch]:
+    """Shared crossmatch if it was already computed, without computing it (for health probes)."""
+    return _MATCH
+
+
+def getCrossmatch() -> Crossmatch:
+    """Crossmatch of the shared sky index, recomputed when the index is rebuilt."""
+    global _MATCH
+    index = getSkyIndex()
+    match = _MATCH
+    if match is not None and match.index is index:
+        return match
+    with _LOCK:
+        if _MATCH is None or _MATCH.index is not index:
+            _MATCH = Crossmatch(index)
+        return _MATCH
+
+
+if __name__ == "__main__":
+    from API.data import readAndCreateData
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "./static/data"
+    result = crossmatchData(readAndCreateData(target, columnar=True))
+    print(f"[OK] Crossmatch of {target}: {json.dumps(result.stats())}")
@@ -2,8 +2,14 @@ from __future__ import annotations
 import os
 import json
 import csv
+import shutil
+import hashlib
+import functools
+import itertools
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Sequence, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
 
 # pandas was checked as optional
 # Se comprobó pandas como opcional
@@ -39,13 +45,55 @@ def saveJsonFile(path: str, data: Union[Dict[str, Any], List[Any]]) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def _read_csv_with_pandas(path: str) -> List[Dict[str, Any]]:
-    # CSV was read using pandas
-    # Se leyó el CSV usando pandas
-    df = pd.read_csv(path, engine="python", comment="#")
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-    df = df.where(pd.notnull(df), None)
-    return df.to_dict(orient="records")
+def _column_name(c: str) -> str:
+    return c.strip().lower().replace(" ", "_")
+
+def _header(path: str) -> List[str]:
+    # Header line was found after the NASA "#" block without parsing the file
+    # Se encontró la línea de cabecera tras el bloque "#" de la NASA sin analizar el archivo
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for line in f:
+            if line.strip() and not line.lstrip().startswith("#"):
+                return next(csv.reader([line]))
+    return []
+
+def _read_frame(path: str, columns: Optional[set] = None, numeric: Optional[set] = None):
+    # CSV was read using pandas (C engine, round-trip floats: same values as the Python engine)
+    # Se leyó el CSV usando pandas (motor C, floats de ida y vuelta: mismos valores que el motor Python)
+    kwargs: Dict[str, Any] = dict(engine="c", comment="#", low_memory=False, float_precision="round_trip")
+    if columns is not None:
+        # Only the columns the mapper reads were parsed, numeric ones straight to float64
+        # Solo se analizaron las columnas que lee el mapeador, las numéricas directo a float64
+        raw = [c for c in _header(path) if _column_name(c) in columns]
+        if raw:
+            kwargs["usecols"] = raw
+            kwargs["dtype"] = {c: "float64" for c in raw if _column_name(c) in (numeric or ())}
+    try:
+        df = pd.read_csv(path, **kwargs)
+    except ValueError:
+        # A numeric column held text; its type was inferred instead
+        # Una columna numérica tenía texto; su tipo se infirió en su lugar
+        kwargs.pop("dtype", None)
+        df = pd.read_csv(path, **kwargs)
+    df.columns = [_column_name(c) for c in df.columns]
+    return df
+
+def _read_csv_with_pandas(path: str, columns: Optional[set] = None,
+                          numeric: Optional[set] = None) -> List[Dict[str, Any]]:
+    df = _read_frame(path, columns, numeric)
+    names = list(df.columns)
+
+    # Rows were assembled from whole columns, with the same None/NaN values as
+    # df.where(pd.notnull(df), None).to_dict(orient="records")
+    # Se armaron las filas desde columnas completas, con los mismos valores None/NaN que
+    # df.where(pd.notnull(df), None).to_dict(orient="records")
+    cols = []
+    for c in df.columns:
+        values = df[c].tolist()
+        if df[c].dtype == object:
+            values = [None if v is None or v != v else v for v in values]
+        cols.append(values)
+    return [dict(zip(names, r)) for r in zip(*cols)]
 
 def _read_csv_with_stdlib(path: str) -> List[Dict[str, Any]]:
     # CSV was read using stdlib
@@ -59,13 +107,14 @@ def _read_csv_with_stdlib(path: str) -> List[Dict[str, Any]]:
             rows.append({k: (v if v != "" else None) for k, v in r.items()})
     return rows
 
-def loadDataCSV(path: str) -> List[Dict[str, Any]]:
+def loadDataCSV(path: str, columns: Optional[set] = None, numeric: Optional[set] = None) -> List[Dict[str, Any]]:
+    """Reads a CSV into row dicts; `columns` limits the parsed columns, `numeric` marks float64 ones."""
     # CSV data was loaded
     # Se cargaron los datos CSV
     if not os.path.exists(path):
         return []
     try:
-        return _read_csv_with_pandas(path) if _HAS_PANDAS else _read_csv_with_stdlib(path)
+        return _read_csv_with_pandas(path, columns, numeric) if _HAS_PANDAS else _read_csv_with_stdlib(path)
     except Exception:
         # Fallback was used
         # Se usó el método alternativo
@@ -114,76 +163,126 @@ def _normalize_disposition(text: Optional[str]) -> Optional[Disposition]:
     return None
 
 
+# Candidate source columns of every entry field, per dataset (first non-empty wins)
+# Columnas de origen candidatas de cada campo de la entrada, por dataset (gana la primera no vacía)
+MAPPER_VERSION = 1
+
+_KOI_MAP = {
+    "text": {
+        "id": ["kepid", "kic", "rowid"],
+        "name": ["kepoi_name", "kepler_name"],
+        "disposition": ["koi_disposition", "koi_pdisposition", "disposition"],
+        "created": ["koi_tce_delivname", "created"],
+        "updated": ["rowupdate", "updated"],
+    },
+    "number": {
+        "score": ["koi_score"],
+        "ra": ["ra", "ra_str"],
+        "dec": ["dec", "dec_str"],
+    },
+    "quantity": {
+        "orbital_period": (["koi_period", "orbital_period"], "days"),
+        "transit_epoch": (["koi_time0bk", "transit_epoch"], "BJD"),
+        "transit_duration": (["koi_duration", "transit_duration"], "hours"),
+        "transit_depth": (["koi_depth", "transit_depth"], "ppm"),
+        "planet_radius": (["koi_prad", "planet_radius"], "R_Earth"),
+        "equilibrium_temp": (["koi_teq", "equilibrium_temp"], "K"),
+        "insolation": (["insol", "insolation"], "Earth flux"),
+        "stellar_temp": (["koi_steff", "teff", "stellar_temp"], "K"),
+        "stellar_logg": (["koi_slogg", "logg", "stellar_logg"], "cm/s^2"),
+        "stellar_radius": (["koi_srad", "radius", "stellar_radius"], "R_Sun"),
+    },
+}
+
+_TOI_MAP = {
+    "text": {
+        "id": ["tid", "ticid", "tic_id", "tic"],
+        "name": ["toi", "toi_name", "name"],
+        "disposition": ["tfopwg_disp", "tfopwg_disposition", "disposition"],
+        "created": ["toi_created", "created"],
+        "updated": ["rowupdate", "updated"],
+    },
+    "number": {
+        "ra": ["ra", "ra_deg"],
+        "dec": ["dec", "dec_deg"],
+    },
+    "quantity": {
+        "orbital_period": (["orbital_period", "period", "pl_orbper"], "days"),
+        "transit_epoch": (["transit_epoch", "epoch_bjd"], "BJD"),
+        "transit_duration": (["transit_duration", "duration_hours"], "hours"),
+        "transit_depth": (["transit_depth", "depth_ppm"], "ppm"),
+        "planet_radius": (["planet_radius", "planetradius_earth"], "R_Earth"),
+        "equilibrium_temp": (["equilibrium_temp", "teq_k"], "K"),
+        "insolation": (["insolation", "sinc_earth"], "Earth flux"),
+        "stellar_temp": (["stellar_temp", "stellarteff_k"], "K"),
+        "stellar_logg": (["stellar_logg", "stellarlogg_cgs"], "cm/s^2"),
+        "stellar_radius": (["stellar_radius", "stellarradius_rsun"], "R_Sun"),
+    },
+}
+
+_K2_MAP = {
+    "text": {
+        "id": ["epic_id", "k2id", "id"],
+        "name": ["name"],
+        "disposition": ["disposition"],
+    },
+    "number": {
+        "ra": ["ra"],
+        "dec": ["dec"],
+    },
+    "quantity": {
+        "orbital_period": (["period", "orbital_period"], "days"),
+        "transit_epoch": (["epoch_bjd", "transit_epoch"], "BJD"),
+        "transit_duration": (["duration_hours", "transit_duration"], "hours"),
+        "transit_depth": (["depth_ppm", "transit_depth"], "ppm"),
+        "planet_radius": (["prad_re", "planet_radius"], "R_Earth"),
+        "equilibrium_temp": (["teq_k", "equilibrium_temp"], "K"),
+        "insolation": (["insolation", "sinc_earth"], "Earth flux"),
+        "stellar_temp": (["teff_k", "stellar_temp"], "K"),
+        "stellar_logg": (["logg_cgs", "stellar_logg"], "cm/s^2"),
+        "stellar_radius": (["rstar_rsun", "stellar_radius"], "R_Sun"),
+    },
+}
+
+_MAPS = {DatasetType.KOI: _KOI_MAP, DatasetType.TOI: _TOI_MAP, DatasetType.K2: _K2_MAP}
+
+
+def mapperColumns(ds: DatasetType) -> tuple[set, set]:
+    """Returns (all columns, numeric columns) the mapper of `ds` can read."""
+    spec = _MAPS.get(ds, _K2_MAP)
+    numeric = {k for keys in spec["number"].values() for k in keys}
+    numeric |= {k for keys, _ in spec["quantity"].values() for k in keys}
+    text = {k for keys in spec["text"].values() for k in keys}
+    return text | numeric, numeric
+
+
+def _entry_from_map(row: Dict[str, Any], spec: dict) -> ExoplanetEntry:
+    # Entry was filled field by field from the mapper table
+    # Se llenó la entrada campo por campo desde la tabla del mapeador
+    kwargs: Dict[str, Any] = {}
+    for name, keys in spec["text"].items():
+        kwargs[name] = _first(row, keys)
+    kwargs["disposition"] = _normalize_disposition(kwargs.get("disposition"))
+    for name, keys in spec["number"].items():
+        kwargs[name] = _num(_first(row, keys))
+    for name, (keys, units) in spec["quantity"].items():
+        kwargs[name] = _Q(row, keys, units)
+    return ExoplanetEntry(**kwargs)
+
 def createEntryFromKOI(row: Dict[str, Any]) -> ExoplanetEntry:
     # KOI entry was created
     # Se creó la entrada KOI
-    dispo = _normalize_disposition(_first(row, ["koi_disposition", "koi_pdisposition", "disposition"]))
-    return ExoplanetEntry(
-        id=_first(row, ["kepid", "kic", "rowid"]),
-        name=_first(row, ["kepoi_name", "kepler_name"]),
-        disposition=dispo,
-        score=_num(_first(row, ["koi_score"])),
-        ra=_num(_first(row, ["ra", "ra_str"])),
-        dec=_num(_first(row, ["dec", "dec_str"])),
-        orbital_period=_Q(row, ["koi_period", "orbital_period"], "days"),
-        transit_epoch=_Q(row, ["koi_time0bk", "transit_epoch"], "BJD"),
-        transit_duration=_Q(row, ["koi_duration", "transit_duration"], "hours"),
-        transit_depth=_Q(row, ["koi_depth", "transit_depth"], "ppm"),
-        planet_radius=_Q(row, ["koi_prad", "planet_radius"], "R_Earth"),
-        equilibrium_temp=_Q(row, ["koi_teq", "equilibrium_temp"], "K"),
-        insolation=_Q(row, ["insol", "insolation"], "Earth flux"),
-        stellar_temp=_Q(row, ["koi_steff", "teff", "stellar_temp"], "K"),
-        stellar_logg=_Q(row, ["koi_slogg", "logg", "stellar_logg"], "cm/s^2"),
-        stellar_radius=_Q(row, ["koi_srad", "radius", "stellar_radius"], "R_Sun"),
-        created=_first(row, ["koi_tce_delivname", "created"]),
-        updated=_first(row, ["rowupdate", "updated"]),
-    )
+    return _entry_from_map(row, _KOI_MAP)
 
 def createEntryFromTOI(row: Dict[str, Any]) -> ExoplanetEntry:
     # TOI entry was created
     # Se creó la entrada TOI
-    dispo = _normalize_disposition(_first(row, ["tfopwg_disp", "tfopwg_disposition", "disposition"]))
-    return ExoplanetEntry(
-        id=_first(row, ["tid", "ticid", "tic_id", "tic"]),
-        name=_first(row, ["toi", "toi_name", "name"]),
-        disposition=dispo,
-        ra=_num(_first(row, ["ra", "ra_deg"])),
-        dec=_num(_first(row, ["dec", "dec_deg"])),
-        orbital_period=_Q(row, ["orbital_period", "period", "pl_orbper"], "days"),
-        transit_epoch=_Q(row, ["transit_epoch", "epoch_bjd"], "BJD"),
-        transit_duration=_Q(row, ["transit_duration", "duration_hours"], "hours"),
-        transit_depth=_Q(row, ["transit_depth", "depth_ppm"], "ppm"),
-        planet_radius=_Q(row, ["planet_radius", "planetradius_earth"], "R_Earth"),
-        equilibrium_temp=_Q(row, ["equilibrium_temp", "teq_k"], "K"),
-        insolation=_Q(row, ["insolation", "sinc_earth"], "Earth flux"),
-        stellar_temp=_Q(row, ["stellar_temp", "stellarteff_k"], "K"),
-        stellar_logg=_Q(row, ["stellar_logg", "stellarlogg_cgs"], "cm/s^2"),
-        stellar_radius=_Q(row, ["stellar_radius", "stellarradius_rsun"], "R_Sun"),
-        created=_first(row, ["toi_created", "created"]),
-        updated=_first(row, ["rowupdate", "updated"]),
-    )
+    return _entry_from_map(row, _TOI_MAP)
 
 def createEntryFromK2(row: Dict[str, Any]) -> ExoplanetEntry:
     # K2 entry was created
     # Se creó la entrada K2
-    dispo = _normalize_disposition(_first(row, ["disposition"]))
-    return ExoplanetEntry(
-        id=_first(row, ["epic_id", "k2id", "id"]),
-        name=_first(row, ["name"]),
-        disposition=dispo,
-        ra=_num(_first(row, ["ra"])),
-        dec=_num(_first(row, ["dec"])),
-        orbital_period=_Q(row, ["period", "orbital_period"], "days"),
-        transit_epoch=_Q(row, ["epoch_bjd", "transit_epoch"], "BJD"),
-        transit_duration=_Q(row, ["duration_hours", "transit_duration"], "hours"),
-        transit_depth=_Q(row, ["depth_ppm", "transit_depth"], "ppm"),
-        planet_radius=_Q(row, ["prad_re", "planet_radius"], "R_Earth"),
-        equilibrium_temp=_Q(row, ["teq_k", "equilibrium_temp"], "K"),
-        insolation=_Q(row, ["insolation", "sinc_earth"], "Earth flux"),
-        stellar_temp=_Q(row, ["teff_k", "stellar_temp"], "K"),
-        stellar_logg=_Q(row, ["logg_cgs", "stellar_logg"], "cm/s^2"),
-        stellar_radius=_Q(row, ["rstar_rsun", "stellar_radius"], "R_Sun"),
-    )
+    return _entry_from_map(row, _K2_MAP)
 
 @dataclass
 class ExoplanetData:
@@ -191,6 +290,9 @@ class ExoplanetData:
     # Se definió el contenedor de datos de exoplanetas
     entries: List[ExoplanetEntry] = field(default_factory=list)
     dataset_type: DatasetType = DatasetType.UNKNOWN
+    # Per-entry dataset type, filled when a directory mixes catalogs
+    # Tipo de dataset por entrada, completado cuando un directorio mezcla catálogos
+    datasets: Optional[List[DatasetType]] = None
 
     def __iter__(self):
         # Iterable behavior was implemented
@@ -198,9 +300,664 @@ class ExoplanetData:
         return iter(self.entries)
 
 
-def getDataType(name_or_path: str) -> DatasetType:
-    # Dataset type was detected
-    # Se detectó el tipo de dataset
+_DISPOSITIONS = list(Disposition)
+
+
+class ColumnPlan:
+    """Source columns of every mapper field, resolved once from a file header."""
+
+    def __init__(self, ds: DatasetType, header: Sequence[str]):
+        spec = _MAPS.get(ds, _K2_MAP)
+        present = {_column_name(c) for c in header}
+        self.dataset_type = ds
+        # Candidate keys missing from the header were dropped once, not probed per row
+        # Se descartaron una vez las claves candidatas ausentes de la cabecera, sin sondearlas por fila
+        self.text = {f: [k for k in keys if k in present] for f, keys in spec["text"].items()}
+        self.number = {f: [k for k in keys if k in present] for f, keys in spec["number"].items()}
+        self.quantity = {f: ([k for k in keys if k in present], units) for f, (keys, units) in spec["quantity"].items()}
+        self.numeric = {k for keys in self.number.values() for k in keys}
+        self.numeric |= {k for keys, _ in self.quantity.values() for k in keys}
+        self.columns = self.numeric | {k for keys in self.text.values() for k in keys}
+
+
+@functools.lru_cache(maxsize=64)
+def compileColumnPlan(ds: DatasetType, header: tuple) -> ColumnPlan:
+    """Cached ColumnPlan for a dataset type and header."""
+    return ColumnPlan(ds, header)
+
+
+def _compact(values: list) -> tuple:
+    # Text-like column was stored as int64, float64 or fixed-width text when its values allowed it
+    # La columna de texto se guardó como int64, float64 o texto de ancho fijo cuando sus valores lo permitieron
+    missing = np.array([v is None for v in values], dtype=bool)
+    present = [v for v in values if v is not None]
+    kinds = {type(v) for v in present}
+    if kinds == {int}:
+        arr = np.array([0 if v is None else v for v in values], dtype=np.int64)
+    elif kinds == {float}:
+        arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    elif kinds <= {str}:
+        arr = np.array(["" if v is None else v for v in values], dtype=str)
+    else:
+        arr = np.array(values, dtype=object)
+    return arr, missing
+
+
+def _column_values(cols: Dict[str, Any], key: str) -> tuple:
+    # Column was returned as (python values, usable mask), where usable mirrors
+    # _first: any float/int value counts (NaN included), text must be non-empty
+    # Se devolvió la columna como (valores python, máscara usable), donde usable replica
+    # a _first: cualquier float/int cuenta (NaN incluido), el texto debe no estar vacío
+    col = cols[key]
+    if isinstance(col, np.ndarray) and col.dtype.kind in "fiu":
+        return col, np.ones(col.shape[0], dtype=bool)
+    values = list(col)
+    return values, np.array([v is not None and v == v and v != "" for v in values], dtype=bool)
+
+
+def _num_column(values: list) -> np.ndarray:
+    # Whole-column _num: cleaned text converted in one call, value by value only if that failed
+    # _num por columna completa: texto limpio convertido en una llamada, valor a valor solo si falló
+    cleaned = [str(v).strip().replace(",", "") for v in values]
+    try:
+        return np.array(cleaned, dtype=str).astype(np.float64) if cleaned else np.empty(0)
+    except ValueError:
+        return np.array([np.nan if x is None else x for x in map(_num, values)], dtype=np.float64)
+
+
+def _pick_number(cols: Dict[str, Any], keys: Sequence[str], n: int) -> Optional[np.ndarray]:
+    """Column-wise _num(_first(row, keys)) over resolved keys; None when there are none."""
+    if not keys:
+        return None
+    out = np.full(n, np.nan, dtype=np.float64)
+    filled = np.zeros(n, dtype=bool)
+    for k in keys:
+        values, usable = _column_values(cols, k)
+        take = usable & ~filled
+        if isinstance(values, np.ndarray):
+            out[take] = values[take]
+        else:
+            idx = np.flatnonzero(take)
+            out[idx] = _num_column([values[i] for i in idx])
+        filled |= take
+    return out
+
+
+def _pick_text(cols: Dict[str, Any], keys: Sequence[str], n: int) -> list:
+    """Column-wise _first(row, keys) over resolved keys, as python values (None when missing)."""
+    out: list = [None] * n
+    filled = np.zeros(n, dtype=bool)
+    for k in keys:
+        values, usable = _column_values(cols, k)
+        take = usable & ~filled
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        for i in np.flatnonzero(take):
+            out[i] = values[i]
+        filled |= take
+    return out
+
+
+class ColumnarExoplanetData:
+    """Catalog stored by column: float64 arrays per quantity, units once per column, compact text columns."""
+
+    def __init__(self, n: int, numbers: Dict[str, Optional[np.ndarray]], units: Dict[str, Optional[str]],
+                 text: Dict[str, tuple], dispositions: np.ndarray, dataset_type: DatasetType = DatasetType.UNKNOWN,
+                 absent: Optional[Dict[str, np.ndarray]] = None, datasets: Optional[np.ndarray] = None):
+        self.n = int(n)
+        self.numbers = numbers
+        # Rows whose source file had no column for a field (their value is None, not NaN)
+        # Filas cuyo archivo de origen no tenía columna para un campo (su valor es None, no NaN)
+        self.absent = absent or {}
+        self.units = units
+        self.text = text
+        self.dispositions = dispositions
+        self.dataset_type = dataset_type
+        # DatasetType value of every row, so mixed directories keep each row's mission
+        # Valor DatasetType de cada fila, para que los directorios mixtos conserven la misión de cada fila
+        self.datasets = datasets if datasets is not None else np.full(self.n, dataset_type.value, dtype=np.int8)
+
+    @classmethod
+    def fromColumns(cls, cols: Dict[str, Any], n: int, plan: ColumnPlan) -> "ColumnarExoplanetData":
+        """Applies a compiled ColumnPlan to whole columns (same values as the row mappers)."""
+        numbers: Dict[str, Optional[np.ndarray]] = {}
+        units: Dict[str, Optional[str]] = {}
+        for name, keys in plan.number.items():
+            numbers[name] = _pick_number(cols, keys, n)
+        for name, (keys, unit) in plan.quantity.items():
+            numbers[name] = _pick_number(cols, keys, n)
+            units[name] = unit
+
+        text = {}
+        codes = np.full(n, -1, dtype=np.int8)
+        for name, keys in plan.text.items():
+            values = _pick_text(cols, keys, n)
+            if name == "disposition":
+                # Dispositions were normalized once per distinct text and stored as int8 codes
+                # Las disposiciones se normalizaron una vez por texto distinto y se guardaron como códigos int8
+                lookup: Dict[Any, int] = {}
+                for i, v in enumerate(values):
+                    if v not in lookup:
+                        d = _normalize_disposition(v)
+                        lookup[v] = -1 if d is None else _DISPOSITIONS.index(d)
+                    codes[i] = lookup[v]
+            else:
+                text[name] = _compact(values)
+        return cls(n, numbers, units, text, codes, plan.dataset_type)
+
+    @classmethod
+    def concat(cls, parts: Sequence["ColumnarExoplanetData"]) -> "ColumnarExoplanetData":
+        """Joins catalogs row-wise; fields missing from a part become NaN/None."""
+        n = sum(p.n for p in parts)
+        names = sorted({k for p in parts for k in p.numbers})
+        numbers: Dict[str, Optional[np.ndarray]] = {}
+        absent: Dict[str, np.ndarray] = {}
+        # Each column was allocated once and filled slice by slice straight from the (mapped) parts
+        # Cada columna se reservó una vez y se llenó por tramos directamente desde las partes (mapeadas)
+        bounds = np.cumsum([0] + [p.n for p in parts]).tolist()
+        for k in names:
+            if all(p.numbers.get(k) is None for p in parts):
+                numbers[k] = None
+                continue
+            column = numbers[k] = np.empty(n, dtype=np.float64)
+            for p, lo, hi in zip(parts, bounds, bounds[1:]):
+                column[lo:hi] = np.nan if p.numbers.get(k) is None else p.numbers[k]
+            if any(p.numbers.get(k) is None or (k in p.absent) for p in parts):
+                mask = absent[k] = np.empty(n, dtype=bool)
+                for p, lo, hi in zip(parts, bounds, bounds[1:]):
+                    mask[lo:hi] = p.absent[k] if k in p.absent else p.numbers.get(k) is None
+        units = {}
+        for p in parts:
+            for k, u in p.units.items():
+                units.setdefault(k, u)
+        text = {}
+        for k in sorted({k for p in parts for k in p.text}):
+            values = []
+            for p in parts:
+                values.extend(p.textValues(k) if k in p.text else [None] * p.n)
+            text[k] = _compact(values)
+        kinds = {p.dataset_type for p in parts}
+        ds = next(iter(kinds)) if len(kinds) == 1 else DatasetType.UNKNOWN
+        codes = np.concatenate([p.dispositions for p in parts]) if parts else np.empty(0, dtype=np.int8)
+        datasets = np.concatenate([p.datasets for p in parts]) if parts else np.empty(0, dtype=np.int8)
+        return cls(n, numbers, units, text, codes, ds, absent, datasets)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def datasetTypes(self) -> List[DatasetType]:
+        """DatasetType of every row."""
+        kinds = list(DatasetType)
+        return [kinds[c] for c in self.datasets.tolist()]
+
+    def select(self, names: Sequence[str]) -> "ColumnarExoplanetData":
+        """Copy holding only the named number fields, dispositions and datasets (no text)."""
+        # Columns were copied so a streamed chunk's buffers could be released
+        # Se copiaron las columnas para poder liberar los búferes de un bloque leído por flujo
+        numbers = {k: None if self.numbers.get(k) is None else np.array(self.numbers[k]) for k in names if k in self.numbers}
+        return ColumnarExoplanetData(
+            self.n, numbers, {k: u for k, u in self.units.items() if k in numbers}, {},
+            np.array(self.dispositions), self.dataset_type,
+            {k: np.array(self.absent[k]) for k in numbers if k in self.absent}, np.array(self.datasets),
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """float64 values of a quantity or number field (NaN when missing)."""
+        arr = self.numbers.get(name)
+        return np.full(self.n, np.nan) if arr is None else arr
+
+    def textValues(self, name: str) -> list:
+        arr, missing = self.text[name]
+        values = arr.tolist()
+        return [None if m else v for v, m in zip(values, missing.tolist())]
+
+    def entry(self, i: int) -> ExoplanetEntry:
+        """Builds the ExoplanetEntry of row `i` on demand."""
+        kwargs: Dict[str, Any] = {}
+        for name, (arr, missing) in self.text.items():
+            kwargs[name] = None if missing[i] else arr[i].item() if isinstance(arr[i], np.generic) else arr[i]
+        code = int(self.dispositions[i])
+        kwargs["disposition"] = None if code < 0 else _DISPOSITIONS[code]
+        for name, arr in self.numbers.items():
+            value = None if arr is None or (name in self.absent and self.absent[name][i]) else float(arr[i])
+            if name in self.units:
+                kwargs[name] = Quantity(value, self.units[name])
+            else:
+                kwargs[name] = value
+        return ExoplanetEntry(**kwargs)
+
+    def toEntries(self) -> List[ExoplanetEntry]:
+        """Materializes every row as an ExoplanetEntry, converting each column once."""
+        fields: Dict[str, list] = {}
+        for name in self.text:
+            fields[name] = self.textValues(name)
+        fields["disposition"] = [None if c < 0 else _DISPOSITIONS[c] for c in self.dispositions.tolist()]
+        for name, arr in self.numbers.items():
+            values = [None] * self.n if arr is None else arr.tolist()
+            if name in self.absent:
+                values = [None if a else v for v, a in zip(values, self.absent[name].tolist())]
+            if name in self.units:
+                unit = self.units[name]
+                values = [Quantity(v, unit) for v in values]
+            fields[name] = values
+        names = list(fields)
+        return [ExoplanetEntry(**dict(zip(names, row))) for row in zip(*fields.values())]
+
+    @property
+    def entries(self) -> "_EntryViews":
+        return _EntryViews(self)
+
+    def __iter__(self) -> Iterator[ExoplanetEntry]:
+        return iter(self.entries)
+
+    def nbytes(self) -> int:
+        """Bytes held by the NumPy columns."""
+        total = self.dispositions.nbytes + self.datasets.nbytes
+        total += sum(a.nbytes for a in self.numbers.values() if a is not None)
+        total += sum(a.nbytes + m.nbytes for a, m in self.text.values())
+        total += sum(m.nbytes for m in self.absent.values())
+        return total
+
+
+class _EntryViews(Sequence):
+    # Sequence of entries created lazily from the columns
+    # Secuencia de entradas creadas de forma diferida desde las columnas
+    def __init__(self, data: ColumnarExoplanetData):
+        self._data = data
+
+    def __len__(self) -> int:
+        return self._data.n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._data.entry(j) for j in range(*i.indices(self._data.n))]
+        if i < 0:
+            i += self._data.n
+        if not 0 <= i < self._data.n:
+            raise IndexError(i)
+        return self._data.entry(i)
+
+    def __iter__(self):
+        for i in range(self._data.n):
+            yield self._data.entry(i)
+
+
+def _frame_columns(df, numeric: Optional[set] = None) -> Dict[str, Any]:
+    # Numeric columns were kept as arrays, the rest as lists with None for missing values
+    # Las columnas numéricas se dejaron como arreglos, el resto como listas con None si faltan
+    cols = {}
+    for c in df.columns:
+        if numeric is not None and c not in numeric and df[c].isna().all():
+            # A text column that is empty within one chunk was read as float NaN;
+            # it was kept as missing text like in a whole-file read
+            # Una columna de texto vacía dentro de un bloque se leyó como NaN float;
+            # se dejó como texto faltante como en una lectura del archivo completo
+            cols[c] = [None] * len(df)
+        elif df[c].dtype.kind in "fiu":
+            cols[c] = df[c].to_numpy()
+        else:
+            cols[c] = [None if v is None or v != v else v for v in df[c].tolist()]
+    return cols
+
+
+def _load_columns(path: str, plan: ColumnPlan) -> tuple:
+    # Columns were read as arrays (pandas) or lists (stdlib)
+    # Se leyeron las columnas como arreglos (pandas) o listas (biblioteca estándar)
+    if _HAS_PANDAS:
+        try:
+            df = _read_frame(path, plan.columns, plan.numeric)
+            return _frame_columns(df), len(df)
+        except Exception:
+            pass
+    rows = _read_csv_with_stdlib(path)
+    names = {k for r in rows[:1] for k in r}
+    return {k: [r.get(k) for r in rows] for k in names}, len(rows)
+
+
+def _parse_columnar(path: str) -> ColumnarExoplanetData:
+    header = tuple(_header(path))
+    plan = compileColumnPlan(getDataType(path, header), header)
+    cols, n = _load_columns(path, plan)
+    # Every resolved column was present (also when the stdlib reader was used)
+    # Todas las columnas resueltas estuvieron presentes (también con el lector estándar)
+    for keys in list(plan.text.values()) + list(plan.number.values()) + [k for k, _ in plan.quantity.values()]:
+        for k in keys:
+            cols.setdefault(k, [None] * n)
+    return ColumnarExoplanetData.fromColumns(cols, n, plan)
+
+
+# Parsed catalogs were cached as .npy columns outside the served static folder (SIDEREUS_DATA_CACHE=0 disables it)
+# Los catálogos procesados se guardaron como columnas .npy fuera de la carpeta estática servida (SIDEREUS_DATA_CACHE=0 lo desactiva)
+CACHE_FORMAT = 1
+CACHE_DIR = os.getenv("SIDEREUS_DATA_CACHE_DIR", "./model/.data_cache")
+
+
+@functools.lru_cache(maxsize=None)
+def _writable(root: str) -> bool:
+    # Read-only deploys fell back to parsing the CSVs, warned once per folder
+    # Los despliegues de solo lectura volvieron a procesar los CSV, con un solo aviso por carpeta
+    try:
+        os.makedirs(root, exist_ok=True)
+        if os.access(root, os.W_OK):
+            return True
+    except OSError:
+        pass
+    print(f"[WARN] Data cache folder {root} is not writable; catalogs are parsed without a cache")
+    return False
+
+
+def _cache_enabled() -> bool:
+    if os.getenv("SIDEREUS_DATA_CACHE", "1").lower() in ("0", "false", "off", "no"):
+        return False
+    return _writable(os.path.abspath(CACHE_DIR))
+
+
+def _cache_paths(path: str) -> tuple:
+    # (pointer file, prefix of the column directories) of a CSV; CSVs of different folders
+    # got their own subfolder so equal file names never share a cache
+    # (archivo puntero, prefijo de los directorios de columnas) de un CSV; los CSV de carpetas
+    # distintas tuvieron su propia subcarpeta para que nombres iguales nunca compartan caché
+    source = os.path.dirname(os.path.abspath(path))
+    root = os.path.join(CACHE_DIR, hashlib.sha1(source.encode("utf-8")).hexdigest()[:12])
+    base = os.path.basename(path)
+    return os.path.join(root, f"{base}.json"), os.path.join(root, base)
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fingerprint(path: str, pointer: Optional[dict]) -> dict:
+    # Content hash was only recomputed when size or mtime changed
+    # El hash del contenido solo se recalculó cuando cambiaron el tamaño o la fecha
+    st = os.stat(path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "mapper": MAPPER_VERSION, "format": CACHE_FORMAT}
+    same_stat = pointer is not None and all(pointer.get(k) == fp[k] for k in ("size", "mtime_ns"))
+    fp["sha256"] = pointer["sha256"] if same_stat else _sha256(path)
+    return fp
+
+
+def _save_columnar(data: ColumnarExoplanetData, folder: str) -> None:
+    # One .npy per column so every column can be memory-mapped on load
+    # Un .npy por columna para poder mapear cada columna en memoria al cargar
+    os.makedirs(folder)
+    meta = {
+        "n": data.n, "dataset_type": data.dataset_type.name, "units": data.units,
+        "numbers": sorted(k for k, a in data.numbers.items() if a is not None),
+        "empty": sorted(k for k, a in data.numbers.items() if a is None),
+        "absent": sorted(data.absent), "text": sorted(data.text),
+    }
+    np.save(os.path.join(folder, "dispositions.npy"), data.dispositions)
+    for k in meta["numbers"]:
+        np.save(os.path.join(folder, f"num.{k}.npy"), data.numbers[k])
+    for k in meta["absent"]:
+        np.save(os.path.join(folder, f"absent.{k}.npy"), data.absent[k])
+    for k in meta["text"]:
+        arr, missing = data.text[k]
+        np.save(os.path.join(folder, f"text.{k}.npy"), arr, allow_pickle=arr.dtype == object)
+        np.save(os.path.join(folder, f"missing.{k}.npy"), missing)
+    with open(os.path.join(folder, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _load_cached_columnar(folder: str) -> ColumnarExoplanetData:
+    def load(name: str) -> np.ndarray:
+        try:
+            return np.load(os.path.join(folder, name), mmap_mode="r")
+        except ValueError:
+            # Mixed-type text columns are pickled object arrays and cannot be mapped
+            # Las columnas de texto con tipos mezclados son arreglos de objetos y no se pueden mapear
+            return np.load(os.path.join(folder, name), allow_pickle=True)
+
+    with open(os.path.join(folder, "meta.json")) as f:
+        meta = json.load(f)
+    numbers: Dict[str, Optional[np.ndarray]] = {k: load(f"num.{k}.npy") for k in meta["numbers"]}
+    numbers.update({k: None for k in meta["empty"]})
+    return ColumnarExoplanetData(
+        meta["n"], numbers, meta["units"],
+        {k: (load(f"text.{k}.npy"), load(f"missing.{k}.npy")) for k in meta["text"]},
+        load("dispositions.npy"), DatasetType[meta["dataset_type"]],
+        {k: load(f"absent.{k}.npy") for k in meta["absent"]},
+    )
+
+
+def _write_cache(data: ColumnarExoplanetData, pointer_path: str, prefix: str, fp: dict) -> None:
+    # Columns were written to a new directory first and the pointer was swapped last,
+    # so concurrent readers see either the old cache or the complete new one
+    # Primero se escribieron las columnas en un directorio nuevo y al final se cambió el puntero,
+    # así los lectores concurrentes ven la caché anterior o la nueva completa
+    folder = f"{prefix}.{fp['sha256'][:16]}.m{MAPPER_VERSION}.f{CACHE_FORMAT}"
+    if not os.path.isdir(folder):
+        tmp = f"{folder}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        _save_columnar(data, tmp)
+        try:
+            os.rename(tmp, folder)
+        except OSError:
+            # Another process finished the same cache first
+            # Otro proceso terminó la misma caché primero
+            shutil.rmtree(tmp, ignore_errors=True)
+    tmp = f"{pointer_path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(fp, folder=os.path.basename(folder)), f)
+    os.replace(tmp, pointer_path)
+    root, base = os.path.split(prefix)
+    for name in os.listdir(root):
+        stale = os.path.join(root, name)
+        if name.startswith(f"{base}.") and os.path.isdir(stale) and stale != folder and not name.endswith(".tmp"):
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _cache_state(path: str) -> tuple:
+    # (pointer path, column prefix, current fingerprint, cache folder when it is fresh)
+    # (ruta del puntero, prefijo de columnas, huella actual, carpeta de la caché si está vigente)
+    pointer_path, prefix = _cache_paths(path)
+    try:
+        pointer = getJsonFile(pointer_path)
+    except ValueError:
+        pointer = None
+    if not isinstance(pointer, dict):
+        pointer = None
+    fp = _fingerprint(path, pointer)
+    fresh = pointer is not None and all(pointer.get(k) == v for k, v in fp.items())
+    folder = os.path.join(os.path.dirname(prefix), pointer["folder"]) if fresh else None
+    return pointer_path, prefix, fp, folder
+
+
+def readColumnarData(path: str, use_cache: Optional[bool] = None) -> ColumnarExoplanetData:
+    """Reads a KOI/TOI/K2 CSV into a ColumnarExoplanetData, through the binary cache when enabled."""
+    if not os.path.exists(path):
+        return ColumnarExoplanetData.concat([])
+    if use_cache is None:
+        use_cache = _cache_enabled()
+    if not use_cache:
+        return _parse_columnar(path)
+
+    pointer_path, prefix, fp, folder = _cache_state(path)
+    if folder is not None:
+        try:
+            return _load_cached_columnar(folder)
+        except Exception as e:
+            print(f"[WARN] Rebuilding unreadable data cache for {path}: {e}")
+
+    # Cache was missing or stale, so the CSV was parsed and the cache rebuilt
+    # La caché faltaba o estaba desactualizada, así que se procesó el CSV y se reconstruyó
+    data = _parse_columnar(path)
+    try:
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        _write_cache(data, pointer_path, prefix, fp)
+    except Exception as e:
+        print(f"[WARN] Could not write data cache for {path}: {e}")
+    return data
+
+
+# Processes used to parse the CSVs of a directory (0 = one per file up to the CPU count)
+# Procesos usados para procesar los CSV de un directorio (0 = uno por archivo hasta el número de CPU)
+INGEST_WORKERS = int(os.getenv("SIDEREUS_INGEST_WORKERS", "0"))
+
+
+def _ingest_file(path: str) -> Optional[ColumnarExoplanetData]:
+    # Pool worker: with the cache on, the parsed columns were only written to disk so the parent
+    # maps them instead of receiving a pickled copy
+    # Worker del pool: con la caché activa, las columnas solo se escribieron en disco para que el
+    # proceso padre las mapee en lugar de recibir una copia serializada
+    data = readColumnarData(path)
+    return None if _cache_enabled() else data
+
+
+def readColumnarDirectory(path: str, workers: Optional[int] = None) -> ColumnarExoplanetData:
+    """Reads every CSV of a directory, parsing stale files in parallel, into one ColumnarExoplanetData."""
+    files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(".csv")]
+    workers = INGEST_WORKERS if workers is None else workers
+    workers = min(len(files), workers if workers > 0 else (os.cpu_count() or 1))
+
+    # Only files without a fresh cache were sent to the pool
+    # Solo se enviaron al pool los archivos sin caché vigente
+    pending = files
+    if _cache_enabled():
+        pending = [f for f in files if _cache_state(f)[3] is None]
+    parsed: Dict[str, Optional[ColumnarExoplanetData]] = {}
+    if workers > 1 and len(pending) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Workers were spawned, not forked: the caller may be a threaded server holding locks
+        # Los workers se lanzaron con spawn, no fork: quien llama puede ser un servidor con hilos y locks tomados
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                parsed = dict(zip(pending, pool.map(_ingest_file, pending)))
+        except Exception as e:
+            print(f"[WARN] Parallel ingestion failed, reading files one by one: {e}")
+            parsed = {}
+    parts = [parsed.get(f) or readColumnarData(f) for f in files]
+    # A single catalog kept its mapped columns instead of being copied into a merged one
+    # Un solo catálogo conservó sus columnas mapeadas en lugar de copiarse a una combinada
+    if len(parts) == 1:
+        return parts[0]
+    return ColumnarExoplanetData.concat(parts)
+
+
+# Rows per chunk of the streaming reader
+# Filas por bloque del lector por flujo
+CHUNK_ROWS = int(os.getenv("SIDEREUS_CHUNK_ROWS", "4096"))
+
+
+def _iter_frames(path: str, plan: ColumnPlan, chunk_rows: int) -> Iterator[Any]:
+    # Same read options as _read_frame, one DataFrame of at most chunk_rows rows at a time
+    # Mismas opciones de lectura que _read_frame, un DataFrame de a lo sumo chunk_rows filas a la vez
+    kwargs: Dict[str, Any] = dict(engine="c", comment="#", low_memory=False, float_precision="round_trip",
+                                  chunksize=chunk_rows)
+    raw = [c for c in _header(path) if _column_name(c) in plan.columns]
+    if raw:
+        kwargs["usecols"] = raw
+        kwargs["dtype"] = {c: "float64" for c in raw if _column_name(c) in plan.numeric}
+    done = 0
+    while True:
+        try:
+            with pd.read_csv(path, **kwargs) as reader:
+                for i, df in enumerate(reader):
+                    if i < done:
+                        continue
+                    df.columns = [_column_name(c) for c in df.columns]
+                    yield df
+                    done += 1
+            return
+        except ValueError:
+            if "dtype" not in kwargs:
+                raise
+            # A numeric column held text: the file was reopened with inferred types and the
+            # chunks already yielded were skipped
+            # Una columna numérica tenía texto: se reabrió el archivo con tipos inferidos y se
+            # omitieron los bloques ya entregados
+            kwargs.pop("dtype")
+
+
+def _iter_stdlib_columns(path: str, chunk_rows: int) -> Iterator[tuple]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(line for line in f if not line.lstrip().startswith("#"))
+        if not reader.fieldnames:
+            return
+        reader.fieldnames = [_column_name(c) for c in reader.fieldnames]
+        while True:
+            rows = [{k: (v if v != "" else None) for k, v in r.items()}
+                    for r in itertools.islice(reader, chunk_rows)]
+            if not rows:
+                return
+            yield {k: [r.get(k) for r in rows] for k in reader.fieldnames}, len(rows)
+
+
+def _iter_columns(path: str, plan: ColumnPlan, chunk_rows: int) -> Iterator[tuple]:
+    # Chunks were produced as (columns, n) with every resolved column present
+    # Se produjeron bloques (columnas, n) con todas las columnas resueltas presentes
+    chunks = (
+        ((_frame_columns(df, plan.numeric), len(df)) for df in _iter_frames(path, plan, chunk_rows)) if _HAS_PANDAS
+        else _iter_stdlib_columns(path, chunk_rows)
+    )
+    for cols, n in chunks:
+        for k in plan.columns:
+            cols.setdefault(k, [None] * n)
+        yield cols, n
+
+
+def iterCatalogChunks(path: str, chunk_rows: Optional[int] = None, kind: str = "columnar") -> Iterator[Any]:
+    """Streams a catalog in chunks of at most `chunk_rows` rows so memory stays bounded.
+
+    kind="columnar" yields ColumnarExoplanetData, "entries" lists of ExoplanetEntry and
+    "rows" lists of row dicts restricted to the columns the mapper reads.
+    """
+    if kind not in ("columnar", "entries", "rows"):
+        raise ValueError(f"Unknown chunk kind: {kind}")
+    if not os.path.exists(path):
+        return
+    chunk_rows = max(1, int(chunk_rows or CHUNK_ROWS))
+    header = tuple(_header(path))
+    plan = compileColumnPlan(getDataType(path, header), header)
+    for cols, n in _iter_columns(path, plan, chunk_rows):
+        if kind == "rows":
+            names = sorted(cols)
+            yield [dict(zip(names, r)) for r in zip(*(list(cols[k]) for k in names))]
+            continue
+        data = ColumnarExoplanetData.fromColumns(cols, n, plan)
+        yield data if kind == "columnar" else data.toEntries()
+
+
+# Header columns that identify each NASA export (cumulative KOI, TOI, K2 planets and candidates)
+# Columnas de cabecera que identifican cada exportación de la NASA (KOI acumulado, TOI, planetas y candidatos K2)
+_SIGNATURES = {
+    DatasetType.KOI: {"kepid", "kepoi_name", "koi_disposition", "koi_pdisposition", "koi_period"},
+    DatasetType.TOI: {"toi", "tid", "tfopwg_disp", "toi_created"},
+    DatasetType.K2: {"epic_id", "k2id", "epic_hostname", "epic_candname", "k2_name"},
+}
+
+
+def detectDataType(header: Sequence[str]) -> DatasetType:
+    """Dataset type from the header columns alone; UNKNOWN when they do not identify one."""
+    names = {_column_name(c) for c in header}
+    hits = {ds: len(sig & names) for ds, sig in _SIGNATURES.items()}
+    # The archive's K2 planets-and-candidates table only has the generic planet columns
+    # La tabla de planetas y candidatos K2 del archivo solo tiene las columnas genéricas de planetas
+    if not any(hits.values()) and {"pl_name", "disposition", "disc_facility"} <= names:
+        return DatasetType.K2
+    best = max(hits, key=lambda ds: (hits[ds], len(mapperColumns(ds)[0] & names)))
+    return best if hits[best] else DatasetType.UNKNOWN
+
+
+def getDataType(name_or_path: str, header: Optional[Sequence[str]] = None) -> DatasetType:
+    # Dataset type was detected from the header columns, then from the file name
+    # Se detectó el tipo de dataset por las columnas de cabecera y luego por el nombre del archivo
+    if header is None and os.path.isfile(name_or_path):
+        try:
+            header = _header(name_or_path)
+        except Exception:
+            header = None
+    if header:
+        ds = detectDataType(header)
+        if ds != DatasetType.UNKNOWN:
+            return ds
     base = os.path.basename(name_or_path).upper()
     if "KOI" in base or "KEPLER" in base:
         return DatasetType.KOI
@@ -227,40 +984,39 @@ def _build_entries(rows: List[Dict[str, Any]], ds: DatasetType) -> List[Exoplane
 
 
 def createDataFrom(path: str) -> ExoplanetData:
-    # Data was created from file
-    # Se crearon los datos desde el archivo
-    rows = loadDataCSV(path)
-    ds = getDataType(path)
-    entries = _build_entries(rows, ds)
-    return ExoplanetData(entries, ds)
-
-def readAndCreateData(input_path: str, *, as_dict: bool = False):
-    """Reads KOI/TOI/K2 CSVs and returns ExoplanetData."""
+    # Data was created from file through the compiled column plan
+    # Se crearon los datos desde el archivo mediante el plan de columnas compilado
+    data = readColumnarData(path)
+    return ExoplanetData(data.toEntries(), data.dataset_type if os.path.exists(path) else getDataType(path))
+
+def readAndCreateData(input_path: str, *, as_dict: bool = False, columnar: bool = False,
+                      workers: Optional[int] = None):
+    """Reads KOI/TOI/K2 CSVs and returns ExoplanetData (ColumnarExoplanetData with columnar=True).
+
+    Directories are parsed with up to `workers` processes (SIDEREUS_INGEST_WORKERS by default).
+    """
     # Data was read and processed
     # Se leyeron y procesaron los datos
+    if columnar and not as_dict:
+        if os.path.isdir(input_path):
+            return readColumnarDirectory(input_path, workers)
+        return readColumnarData(input_path)
     if os.path.isdir(input_path):
-        all_entries: List[ExoplanetEntry] = []
-        ds_seen: set[DatasetType] = set()
-        for name in sorted(os.listdir(input_path)):
-            if not name.lower().endswith(".csv"):
-                continue
-            file_path = os.path.join(input_path, name)
-            ds = getDataType(file_path)
-            rows = loadDataCSV(file_path)
-            all_entries.extend(_build_entries(rows, ds))
-            ds_seen.add(ds)
-        ds_final = next(iter(ds_seen)) if len(ds_seen) == 1 else DatasetType.UNKNOWN
-        data_obj = ExoplanetData(all_entries, ds_final)
+        columns = readColumnarDirectory(input_path, workers)
+        data_obj = ExoplanetData(columns.toEntries(), columns.dataset_type, columns.datasetTypes())
     else:
         data_obj = createDataFrom(input_path)
 
     if as_dict:
         # Dictionary format was returned
         # Se devolvió en formato diccionario
-        return {
+        out = {
             "entries": [e.__dict__ for e in data_obj.entries],
             "dataset_type": data_obj.dataset_type.name,
         }
+        if data_obj.datasets is not None:
+            out["datasets"] = [d.name for d in data_obj.datasets]
+        return out
     # Data object was returned
     # Se devolvió el objeto de datos
     return data_obj
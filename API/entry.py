@@ -1,7 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 
 
 class DatasetType(Enum):
@@ -59,6 +59,46 @@ class ExoplanetEntry:
     created: Optional[str] = None
     updated: Optional[str] = None
 
+    @classmethod
+    def from_dict(cls, payload: dict[str, Any]) -> "ExoplanetEntry":
+        # Entry was built from a flat or nested dictionary, ignoring unknown keys
+        # Se construyó la entrada desde un diccionario plano o anidado, ignorando claves desconocidas
+        kwargs: dict[str, Any] = {}
+        for f in fields(cls):
+            if f.name not in payload:
+                continue
+            val = payload[f.name]
+            if f.name in _QUANTITY_FIELDS:
+                if isinstance(val, Quantity):
+                    kwargs[f.name] = val
+                elif isinstance(val, dict):
+                    kwargs[f.name] = Quantity(_float_or_none(val.get("value")), val.get("units"))
+                else:
+                    kwargs[f.name] = Quantity(_float_or_none(val), None)
+            elif f.name in ("score", "ra", "dec"):
+                kwargs[f.name] = _float_or_none(val)
+            else:
+                kwargs[f.name] = val
+        return cls(**kwargs)
+
+
+_QUANTITY_FIELDS = frozenset({
+    "orbital_period", "transit_epoch", "transit_duration", "transit_depth",
+    "planet_radius", "equilibrium_temp", "insolation",
+    "stellar_temp", "stellar_logg", "stellar_radius",
+})
+
+
+def _float_or_none(x: Any) -> Optional[float]:
+    # Value was converted to float when possible
+    # Se convirtió el valor a float cuando fue posible
+    if x is None:
+        return None
+    try:
+        return float(str(x).strip().replace(",", "."))
+    except Exception:
+        return None
+
 
 @dataclass
 class ExoplanetData:
@@ -0,0 +1,227 @@
+# Server-side catalog explorer: filters, sorting and cursor pagination over the in-memory catalogs.
+# Explorador de catálogos en el servidor: filtros, orden y paginación por cursor sobre los catálogos en memoria.
+
+from __future__ import annotations
+import os
+import json
+import base64
+import hashlib
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from API.entry import DatasetType, Disposition
+from API.sky import getSkyIndex
+
+MAX_PAGE = int(os.getenv("MAX_CATALOG_PAGE", "1000"))
+DEFAULT_PAGE = 50
+DEFAULT_COLUMNS = (
+    "dataset", "id", "name", "catalog_disposition", "ra", "dec",
+    "orbital_period", "transit_depth", "planet_radius", "stellar_temp",
+)
+
+# Short names accepted in filters, sorting and column lists
+# Nombres cortos aceptados en filtros, orden y listas de columnas
+_ALIASES = {
+    "period": "orbital_period",
+    "epoch": "transit_epoch",
+    "duration": "transit_duration",
+    "depth": "transit_depth",
+    "prad": "planet_radius",
+    "teq": "equilibrium_temp",
+    "insolation_flux": "insolation",
+    "teff": "stellar_temp",
+    "logg": "stellar_logg",
+    "srad": "stellar_radius",
+}
+
+_DISPOSITIONS = [Disposition.CONFIRMED, Disposition.CANDIDATE, Disposition.FALSE_POSITIVE,
+                 Disposition.AMBIGUOUS_CANDIDATE]
+
+
+def _field(name: str) -> str:
+    name = name.strip().lower()
+    if name.startswith("star_"):
+        name = "stellar_" + name[len("star_"):]
+    return _ALIASES.get(name, name)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+class CatalogTable:
+    """Columns of every catalog row plus a sorted index per numeric field, built once."""
+
+    def __init__(self, data, signature: Optional[str] = None):
+        self.data = data
+        self.signature = signature or ""
+        self._token = hashlib.sha1(self.signature.encode()).hexdigest()[:12]
+        self.fields = sorted(data.numbers)
+        self.columns = ("dataset", "catalog_disposition") + tuple(sorted(data.text)) + tuple(self.fields)
+        # Ascending and descending orders were precomputed per field; NaN rows always go last
+        # Se precalcularon los órdenes ascendente y descendente por campo; las filas NaN siempre van al final
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._sorted: Dict[str, np.ndarray] = {}
+        for f in self.fields:
+            values = data.column(f)
+            asc = np.argsort(values, kind="stable").astype(np.int32)
+            self._orders[(f, False)] = asc
+            self._orders[(f, True)] = np.argsort(-values, kind="stable").astype(np.int32)
+            self._sorted[f] = values[asc]
+        self._orders[("row", False)] = np.arange(data.n, dtype=np.int32)
+        self._orders[("row", True)] = np.arange(data.n - 1, -1, -1, dtype=np.int32)
+        self._text = {name: data.textValues(name) for name in data.text}
+
+    def _range(self, field: str, lo: float, hi: float) -> np.ndarray:
+        # Rows inside [lo, hi] were one slice of the sorted index, found by binary search
+        # Las filas dentro de [lo, hi] fueron un tramo del índice ordenado, hallado por búsqueda binaria
+        values = self._sorted[field]
+        start = np.searchsorted(values, lo, side="left")
+        stop = np.searchsorted(values, hi, side="right")
+        mask = np.zeros(self.data.n, dtype=bool)
+        mask[self._orders[(field, False)][start:stop]] = True
+        return mask
+
+    def _mask(self, args: Mapping[str, str]) -> np.ndarray:
+        mask = np.ones(self.data.n, dtype=bool)
+        bounds: Dict[str, list] = {}
+        for key, value in args.items():
+            for prefix, side in (("min_", 0), ("max_", 1)):
+                if key.startswith(prefix):
+                    field = _field(key[len(prefix):])
+                    if field not in self._sorted:
+                        raise ValueError(f"Unknown filter field: {key[len(prefix):]}")
+                    try:
+                        bound = float(value)
+                    except ValueError:
+                        raise ValueError(f"{key} must be a number") from None
+                    bounds.setdefault(field, [-np.inf, np.inf])[side] = bound
+        for field, (lo, hi) in bounds.items():
+            mask &= self._range(field, lo, hi)
+
+        datasets = _split(args.get("dataset"))
+        if datasets:
+            codes = []
+            for name in datasets:
+                ds = DatasetType.__members__.get(name.upper())
+                if ds is None or ds == DatasetType.UNKNOWN:
+                    raise ValueError(f"Unknown dataset: {name}")
+                codes.append(ds.value)
+            mask &= np.isin(self.data.datasets, codes)
+
+        dispositions = _split(args.get("disposition"))
+        if dispositions:
+            codes = []
+            for name in dispositions:
+                if name.upper() == "NONE":
+                    codes.append(-1)
+                    continue
+                try:
+                    codes.append(_DISPOSITIONS.index(Disposition(name.upper())))
+                except ValueError:
+                    raise ValueError(f"Unknown disposition: {name}") from None
+            mask &= np.isin(self.data.dispositions, codes)
+        return mask
+
+    def _cursor(self, sort: str, position: int) -> str:
+        raw = json.dumps({"s": self._token, "o": sort, "p": position}).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _position(self, cursor: str, sort: str) -> int:
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            position, signature, order = int(state["p"]), state["s"], state["o"]
+        except Exception:
+            raise ValueError("Invalid cursor") from None
+        if signature != self._token:
+            raise ValueError("Cursor expired: the catalogs changed, restart from the first page")
+        if order != sort:
+            raise ValueError("Cursor was issued for a different sort")
+        return position
+
+    def query(self, args: Mapping[str, str]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """(row indices, JSON page) of the rows matching `args`.
+
+        Accepts min_<field>/max_<field>, dataset, disposition, sort (leading "-" for descending),
+        columns, limit and cursor.
+        """
+        sort = (args.get("sort") or "row").strip()
+        descending = sort.startswith("-")
+        field = _field(sort.lstrip("-+"))
+        if (field, descending) not in self._orders:
+            raise ValueError(f"Unknown sort field: {sort.lstrip('-+')}")
+        sort = ("-" if descending else "") + field
+
+        columns = [_field(c) for c in _split(args.get("columns"))] or list(DEFAULT_COLUMNS)
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        try:
+            limit = int(args.get("limit", DEFAULT_PAGE))
+        except ValueError:
+            raise ValueError("limit must be an integer") from None
+        limit = min(max(limit, 1), MAX_PAGE)
+        start = self._position(args["cursor"], sort) if args.get("cursor") else 0
+
+        mask = self._mask(args)
+        # Matching rows were walked in the precomputed order from the cursor position
+        # Se recorrieron las filas coincidentes en el orden precalculado desde la posición del cursor
+        order = self._orders[(field, descending)]
+        hits = np.flatnonzero(mask[order[start:]])[:limit + 1] + start
+        more = len(hits) > limit
+        hits = hits[:limit]
+        rows = order[hits]
+        return rows, {
+            "total": int(mask.sum()),
+            "count": len(rows),
+            "sort": sort,
+            "columns": columns,
+            "rows": self.describe(rows, columns),
+            "next_cursor": self._cursor(sort, int(hits[-1]) + 1) if more else None,
+        }
+
+    def describe(self, rows: np.ndarray, columns: List[str]) -> List[Dict[str, Any]]:
+        """JSON-ready values of `columns` for `rows` (None for missing values)."""
+        kinds = list(DatasetType)
+        out: List[Dict[str, Any]] = [{} for _ in range(len(rows))]
+        idx = rows.tolist()
+        for c in columns:
+            if c == "dataset":
+                values = [kinds[k].name for k in self.data.datasets[rows].tolist()]
+            elif c == "catalog_disposition":
+                values = [None if k < 0 else _DISPOSITIONS[k].value for k in self.data.dispositions[rows].tolist()]
+            elif c in self._text:
+                text = self._text[c]
+                values = [None if text[i] is None else str(text[i]) for i in idx]
+            else:
+                values = [None if v != v else v for v in self.data.column(c)[rows].tolist()]
+            for item, v in zip(out, values):
+                item[c] = v
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": int(self.data.n), "fields": len(self.fields), "sorted_indexes": len(self._orders)}
+
+
+_TABLE: Optional[CatalogTable] = None
+_LOCK = threading.Lock()
+
+
+def builtCatalogTable() -> Optional[CatalogTable]:
+    """Shared explorer table if it was already built, without building it (for health probes)."""
+    return _TABLE
+
+
+def getCatalogTable() -> CatalogTable:
+    """Explorer table over the shared sky index data, rebuilt when the index is."""
+    global _TABLE
+    index = getSkyIndex()
+    table = _TABLE
+    if table is not None and table.data is index.data:
+        return table
+    with _LOCK:
+        if _TABLE is None or _TABLE.data is not index.data:
+            _TABLE = CatalogTable(index.data, index.signature)
+        return _TABLE
@@ -0,0 +1,317 @@
+# Low-overhead counters, gauges and latency histograms rendered in Prometheus text format.
+# Contadores, medidores e histogramas de latencia de bajo costo en formato de texto Prometheus.
+#
+# Each process keeps its own registry and periodically writes a snapshot to a shared
+# directory; /metrics merges the snapshots so totals cover every gunicorn worker.
+# Cada proceso mantiene su registro y escribe periódicamente una instantánea en un directorio
+# compartido; /metrics combina las instantáneas para que los totales cubran todos los workers.
+
+from __future__ import annotations
+import os
+import json
+import time
+import uuid
+import bisect
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# Latency buckets in seconds, from 50 us to 5 s
+# Intervalos de latencia en segundos, de 50 us a 5 s
+BUCKETS = (5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Snapshots were scoped to the serving master (gunicorn sets it with setScope), or to this process when run alone
+# Las instantáneas se limitaron al maestro que atiende (gunicorn lo fija con setScope), o a este proceso si corre solo
+_DIR_PREFIX = "sidereus-metrics-"
+_SCOPE = int(os.getenv("SIDEREUS_METRICS_SCOPE") or os.getpid())
+METRICS_DIR = os.getenv("SIDEREUS_METRICS_DIR") or os.path.join(tempfile.gettempdir(), f"{_DIR_PREFIX}{_SCOPE}")
+FLUSH_INTERVAL_S = float(os.getenv("SIDEREUS_METRICS_FLUSH_S", "2"))
+# Process instance id, renewed after fork, so a reused PID never overwrites an earlier snapshot
+# Identificador de la instancia del proceso, renovado tras el fork, para que un PID reutilizado no pise una instantánea anterior
+_INSTANCE = uuid.uuid4().hex[:12]
+
+_HELP = {
+    "sidereus_requests_total": ("counter", "HTTP requests by endpoint and status code."),
+    "sidereus_errors_total": ("counter", "Failed requests by endpoint and error type."),
+    "sidereus_predictions_total": ("counter", "Served predictions by endpoint and disposition."),
+    "sidereus_stage_seconds": ("histogram", "Latency of each serving stage."),
+    "sidereus_request_seconds": ("histogram", "End-to-end request latency by endpoint."),
+    "sidereus_model_loads_total": ("counter", "Model artifact sets loaded."),
+    "sidereus_model_load_seconds": ("gauge", "Time taken by the last model load in this process."),
+    "sidereus_cache_hits_total": ("counter", "Prediction cache hits."),
+    "sidereus_cache_misses_total": ("counter", "Prediction cache misses."),
+    "sidereus_cache_evictions_total": ("counter", "Prediction cache LRU evictions."),
+    "sidereus_cache_entries": ("gauge", "Entries currently held by the prediction cache."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], list] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+_collectors: List[Callable[[], None]] = []
+_flusher_pid = None
+
+
+def setScope(master_pid: int) -> None:
+    """Scopes the snapshots of this process and its future children to `master_pid` (gunicorn on_starting)."""
+    global _SCOPE, METRICS_DIR
+    _SCOPE = int(master_pid)
+    # Workers imported after the fork (without --preload) read it from the environment
+    # Los workers que importan tras el fork (sin --preload) lo leyeron del entorno
+    os.environ["SIDEREUS_METRICS_SCOPE"] = str(_SCOPE)
+    if not os.getenv("SIDEREUS_METRICS_DIR"):
+        METRICS_DIR = os.path.join(tempfile.gettempdir(), f"{_DIR_PREFIX}{_SCOPE}")
+
+
+def _labels(kw: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in kw.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    """Adds `value` to a counter."""
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def setCounter(name: str, value: float, **labels) -> None:
+    """Sets a counter that is tracked elsewhere (e.g. the prediction cache)."""
+    with _lock:
+        _counters[(name, _labels(labels))] = float(value)
+
+
+def setGauge(name: str, value: float, **labels) -> None:
+    """Sets a per-process gauge."""
+    with _lock:
+        _gauges[(name, _labels(labels))] = float(value)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Records one sample in a latency histogram."""
+    key = (name, _labels(labels))
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        h[0][i] += 1
+        h[1] += seconds
+        h[2] += 1
+
+
+class stage:
+    """Context manager timing one serving stage into sidereus_stage_seconds."""
+
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe("sidereus_stage_seconds", time.perf_counter() - self.t0, stage=self.name)
+        return False
+
+
+def addCollector(fn: Callable[[], None]) -> None:
+    """Registers a callback run before each snapshot to copy external stats in."""
+    _collectors.append(fn)
+
+
+def _snapshot() -> dict:
+    for fn in _collectors:
+        try:
+            fn()
+        except Exception as e:
+            print(f"[WARN] Metrics collector failed: {e}")
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "instance": _INSTANCE,
+            "scope": _SCOPE,
+            "counters": [[n, list(l), v] for (n, l), v in _counters.items()],
+            "histograms": [[n, list(l), h[0][:], h[1], h[2]] for (n, l), h in _histograms.items()],
+            "gauges": [[n, list(l), v] for (n, l), v in _gauges.items()],
+        }
+
+
+def pruneSnapshots() -> int:
+    """Deletes snapshots (and default per-scope directories) of masters that no longer run."""
+    removed = 0
+    # Directories of earlier runs were left by every restart; only the default location was scanned
+    # Cada reinicio dejaba directorios de ejecuciones anteriores; solo se revisó la ubicación por defecto
+    root = tempfile.gettempdir()
+    for name in os.listdir(root) if not os.getenv("SIDEREUS_METRICS_DIR") else []:
+        if name.startswith(_DIR_PREFIX) and name[len(_DIR_PREFIX):].isdigit():
+            scope = int(name[len(_DIR_PREFIX):])
+            if scope != _SCOPE and not _alive(scope):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+                removed += 1
+    # A shared SIDEREUS_METRICS_DIR kept snapshots of other masters; the finished ones were dropped
+    # Un SIDEREUS_METRICS_DIR compartido guardaba instantáneas de otros maestros; se quitaron las terminadas
+    for name in os.listdir(METRICS_DIR) if os.path.isdir(METRICS_DIR) else []:
+        path = os.path.join(METRICS_DIR, name)
+        try:
+            with open(path) as f:
+                scope = json.load(f).get("scope")
+        except Exception:
+            continue
+        if scope != _SCOPE and (scope is None or not _alive(scope)):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def clearSnapshots() -> None:
+    """Removes METRICS_DIR (gunicorn master start and exit, see gunicorn.conf.py) and stale scope directories."""
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    pruneSnapshots()
+
+
+def flush() -> None:
+    """Writes this process snapshot to METRICS_DIR."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}-{_INSTANCE}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL_S)
+        try:
+            flush()
+        except Exception as e:
+            print(f"[WARN] Metrics flush failed: {e}")
+
+
+def maybeFlush() -> None:
+    """Starts this process' background flusher on first use; cheap afterwards."""
+    # Idle workers kept publishing so their last requests were not lost
+    # Los workers inactivos siguieron publicando para no perder sus últimas peticiones
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    # Snapshots left by finished runs were pruned once per process
+    # Se eliminaron una vez por proceso las instantáneas de ejecuciones terminadas
+    try:
+        pruneSnapshots()
+    except Exception as e:
+        print(f"[WARN] Metrics snapshot pruning failed: {e}")
+    threading.Thread(target=_flush_loop, name="metrics-flusher", daemon=True).start()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except Exception:
+        return True
+
+
+def _merged() -> tuple:
+    # Counters and histograms were summed over all snapshots (dead workers included,
+    # so totals never go backwards); gauges were kept per live process
+    # Se sumaron contadores e histogramas de todas las instantáneas (incluidos workers
+    # terminados, para que los totales nunca retrocedan); los medidores se dejaron por proceso vivo
+    counters: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], list] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    latest: Dict[int, float] = {}
+    for name in sorted(os.listdir(METRICS_DIR)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(METRICS_DIR, name)
+        try:
+            with open(path) as f:
+                snap = json.load(f)
+            mtime = os.path.getmtime(path)
+        except Exception:
+            continue
+        # Snapshots of another master (an earlier run sharing the directory) were not counted
+        # No se contaron las instantáneas de otro maestro (una ejecución anterior en el mismo directorio)
+        if snap.get("scope") != _SCOPE:
+            continue
+        for n, l, v in snap["counters"]:
+            key = (n, tuple(tuple(p) for p in l))
+            counters[key] = counters.get(key, 0.0) + v
+        for n, l, buckets, total, count in snap["histograms"]:
+            key = (n, tuple(tuple(p) for p in l))
+            h = histograms.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            h[0] = [a + b for a, b in zip(h[0], buckets)]
+            h[1] += total
+            h[2] += count
+        # Gauges of a reused PID came from its newest snapshot only
+        # Los medidores de un PID reutilizado salieron solo de su instantánea más reciente
+        if _alive(snap["pid"]) and mtime >= latest.get(snap["pid"], 0.0):
+            latest[snap["pid"]] = mtime
+            for n, l, v in snap["gauges"]:
+                gauges[(n, tuple(tuple(p) for p in l) + (("pid", str(snap["pid"])),))] = v
+    return counters, histograms, gauges
+
+
+def _fmt_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render() -> str:
+    """Prometheus text exposition of the metrics of every process."""
+    flush()
+    counters, histograms, gauges = _merged()
+    by_name: Dict[str, list] = {}
+    for (n, l), v in counters.items():
+        by_name.setdefault(n, []).append(f"{n}{_fmt_labels(l)} {v:g}")
+    for (n, l), v in gauges.items():
+        by_name.setdefault(n, []).append(f"{n}{_fmt_labels(l)} {v:g}")
+    for (n, l), (buckets, total, count) in histograms.items():
+        lines = by_name.setdefault(n, [])
+        cumulative = 0
+        for bound, c in zip(BUCKETS + (float("inf"),), buckets):
+            cumulative += c
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            bucket_labels = _fmt_labels(l, f'le="{le}"')
+            lines.append(f"{n}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{n}_sum{_fmt_labels(l)} {total:.9g}")
+        lines.append(f"{n}_count{_fmt_labels(l)} {count}")
+
+    out = []
+    for n in sorted(by_name):
+        kind, text = _HELP.get(n, ("untyped", n))
+        out.append(f"# HELP {n} {text}")
+        out.append(f"# TYPE {n} {kind}")
+        out.extend(by_name[n])
+    return "\n".join(out) + "\n"
+
+
+def _reset_after_fork() -> None:
+    # Counters copied from the parent were cleared so they are not counted twice
+    # Se limpiaron los contadores copiados del padre para no contarlos dos veces
+    global _lock, _INSTANCE
+    _lock = threading.Lock()
+    _INSTANCE = uuid.uuid4().hex[:12]
+    _counters.clear()
+    _histograms.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
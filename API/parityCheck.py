@@ -0,0 +1,552 @@
+# Usage: python -m API.parityCheck
+# Compares the fast code paths against the reference implementations they replace.
+# Compara las rutas rápidas contra las implementaciones de referencia que reemplazan.
+
+import os
+import sys
+import json
+import math
+import warnings
+warnings.filterwarnings("ignore")
+
+import numpy as np
+
+from API.data import readAndCreateData
+from API.entry import ExoplanetEntry, Quantity, DatasetType, Disposition
+
+DATA_DIR = "./static/data"
+CATALOGS = ("KOI", "TOI", "K2")
+
+
+def _catalog_entries() -> dict:
+    # Bundled catalogs were loaded once for every check
+    # Se cargaron los catálogos incluidos una vez para todas las comprobaciones
+    out = {}
+    for name in CATALOGS:
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        if os.path.exists(path):
+            out[name] = readAndCreateData(path).entries
+    return out
+
+
+def _edge_entries() -> list:
+    # Hand-written entries covering zeros, negatives, NaN and missing quantities
+    # Entradas escritas a mano con ceros, negativos, NaN y cantidades faltantes
+    examples = []
+    for name in ("simpleRequest.json", "completeRequest.json"):
+        path = os.path.join("./API/examples", name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            examples.append(ExoplanetEntry.from_dict(payload))
+    examples += [
+        ExoplanetEntry(),
+        ExoplanetEntry(transit_duration=Quantity(0.0), transit_depth=Quantity(-5.0)),
+        ExoplanetEntry(transit_duration=Quantity(float("nan")), transit_depth=Quantity(10.0), score=0.5),
+        ExoplanetEntry(orbital_period=Quantity(1e-300), planet_radius=Quantity(0.0), transit_depth=Quantity(None)),
+    ]
+    return examples
+
+
+def _same_value(a, b) -> bool:
+    # NaN was treated as equal to NaN; types had to match too
+    # Se consideró NaN igual a NaN; los tipos también debían coincidir
+    if isinstance(a, Quantity) or isinstance(b, Quantity):
+        return type(a) is type(b) and a.units == b.units and _same_value(a.value, b.value)
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a):
+        return math.isnan(b)
+    return type(a) is type(b) and a == b
+
+
+def _first_difference(expected: list, got: list):
+    if len(expected) != len(got):
+        return f"{len(expected)} vs {len(got)} entries"
+    for i, (a, b) in enumerate(zip(expected, got)):
+        for k, v in a.__dict__.items():
+            if not _same_value(v, b.__dict__.get(k)):
+                return f"row {i} {k}: expected {v!r}, got {b.__dict__.get(k)!r}"
+    return None
+
+
+def check_ingestion(catalogs: dict) -> bool:
+    """Compiled column plan vs the per-row mappers over every parsed column."""
+    from API.data import loadDataCSV, getDataType, _build_entries
+
+    ok = True
+    for name, entries in catalogs.items():
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        diff = _first_difference(_build_entries(loadDataCSV(path), getDataType(path)), entries)
+        print(f"[{'OK' if diff is None else 'FAIL'}] ingestion {name}: {len(entries)} entries")
+        if diff is not None:
+            print(f"    {diff}")
+        ok &= diff is None
+    return ok
+
+
+def check_columnar(catalogs: dict) -> bool:
+    """Entry views of ColumnarExoplanetData vs the row-built entries."""
+    ok = True
+    for name, entries in list(catalogs.items()) + [("directory", None)]:
+        path = DATA_DIR if entries is None else os.path.join(DATA_DIR, f"{name}.csv")
+        if entries is None:
+            entries = readAndCreateData(path).entries
+        diff = _first_difference(entries, list(readAndCreateData(path, columnar=True).entries))
+        print(f"[{'OK' if diff is None else 'FAIL'}] columnar {name}: {len(entries)} entries")
+        if diff is not None:
+            print(f"    {diff}")
+        ok &= diff is None
+    return ok
+
+
+def check_data_cache(catalogs: dict) -> bool:
+    """Memory-mapped binary cache vs parsing the CSV again."""
+    import shutil
+    import tempfile
+    from API import data
+    from API.data import readColumnarData
+
+    ok = True
+    previous = data.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        data.CACHE_DIR = os.path.join(tmp, ".cache")
+        for name in catalogs:
+            # A copy was used so the check builds its own cache and then reads it back
+            # Se usó una copia para que la comprobación construya su propia caché y luego la lea
+            path = shutil.copy(os.path.join(DATA_DIR, f"{name}.csv"), tmp)
+            parsed = readColumnarData(path, use_cache=False).toEntries()
+            readColumnarData(path)
+            cached = readColumnarData(path)
+            diff = _first_difference(parsed, cached.toEntries())
+            mapped = isinstance(cached.dispositions, np.memmap)
+            print(f"[{'OK' if diff is None and mapped else 'FAIL'}] data cache {name}: {cached.n} rows, mapped={mapped}")
+            if diff is not None:
+                print(f"    {diff}")
+            ok &= diff is None and mapped
+        data.CACHE_DIR = previous
+    return ok
+
+
+def check_streaming(catalogs: dict) -> bool:
+    """Chunked reader and column encoder vs the whole-file read and the entry encoder."""
+    from API.data import iterCatalogChunks, getDataType
+    from API.analyse import _FeaturePlan, _load_model_and_thresholds
+
+    _, _, columns_used = _load_model_and_thresholds()
+    plan = _FeaturePlan(columns_used)
+    ok = True
+    for name, entries in catalogs.items():
+        path = os.path.join(DATA_DIR, f"{name}.csv")
+        # Small odd chunks were used so chunk boundaries land everywhere
+        # Se usaron bloques pequeños e impares para que los límites caigan en todas partes
+        chunks = list(iterCatalogChunks(path, chunk_rows=997))
+        diff = _first_difference(entries, [e for c in chunks for e in c.toEntries()])
+        ds = getDataType(path)
+        expected, _ = plan.encode(entries, dataset=ds)
+        got = np.vstack([plan.encodeColumns(c, dataset=ds) for c in chunks])
+        same = diff is None and np.array_equal(expected, got)
+        print(f"[{'OK' if same else 'FAIL'}] streaming {name}: {len(chunks)} chunks")
+        if diff is not None:
+            print(f"    {diff}")
+        ok &= same
+    return ok
+
+
+def check_directory(catalogs: dict) -> bool:
+    """Parallel directory ingestion vs reading each catalog alone, per-row dataset one-hots included."""
+    from API.data import readColumnarDirectory, getDataType
+    from API.analyse import _FeaturePlan, _load_model_and_thresholds
+
+    _, _, columns_used = _load_model_and_thresholds()
+    plan = _FeaturePlan(columns_used)
+    names = sorted(n for n in os.listdir(DATA_DIR) if n.lower().endswith(".csv"))
+    expected, blocks, kinds = [], [], []
+    for name in names:
+        path = os.path.join(DATA_DIR, name)
+        entries = readAndCreateData(path).entries
+        expected += entries
+        blocks.append(plan.encode(entries, dataset=getDataType(path))[0])
+        kinds += [getDataType(path)] * len(entries)
+
+    # Cache was switched off so the pool workers really parse and send the columns
+    # Se desactivó la caché para que los workers del pool procesen y envíen las columnas
+    previous = os.environ.get("SIDEREUS_DATA_CACHE")
+    os.environ["SIDEREUS_DATA_CACHE"] = "0"
+    try:
+        data = readColumnarDirectory(DATA_DIR, workers=len(names))
+    finally:
+        if previous is None:
+            os.environ.pop("SIDEREUS_DATA_CACHE")
+        else:
+            os.environ["SIDEREUS_DATA_CACHE"] = previous
+    diff = _first_difference(expected, data.toEntries())
+    same = diff is None and data.datasetTypes() == kinds and np.array_equal(np.vstack(blocks), plan.encodeColumns(data))
+    print(f"[{'OK' if same else 'FAIL'}] directory: {data.n} rows from {len(names)} files")
+    if diff is not None:
+        print(f"    {diff}")
+    return same
+
+
+def check_sky_index(catalogs: dict) -> bool:
+    """KD-tree cone searches vs a full scan of every catalog row."""
+    from API.sky import SkyIndex, angularSeparation
+
+    data = readAndCreateData(DATA_DIR, columnar=True)
+    index = SkyIndex(data)
+    ra_all, dec_all = data.column("ra"), data.column("dec")
+    rng = np.random.default_rng(7)
+    # Random cones plus cones centred on catalog rows, near the poles and across RA = 0
+    # Conos aleatorios y conos centrados en filas del catálogo, cerca de los polos y cruzando RA = 0
+    picks = rng.choice(len(index), 50)
+    ra = np.concatenate([rng.uniform(0, 360, 100), index.ra[picks], [0.01, 359.99, 123.0, 250.0]])
+    dec = np.concatenate([np.degrees(np.arcsin(rng.uniform(-1, 1, 100))), index.dec[picks], [10.0, 10.0, 89.9, -89.9]])
+    radius = np.concatenate([rng.uniform(0.01, 3.0, 150), [1.0, 1.0, 2.0, 2.0]])
+    found = index.cones(ra, dec, radius)
+    bad = 0
+    for a, d, r, (rows, _) in zip(ra, dec, radius, found):
+        with np.errstate(invalid="ignore"):
+            expected = set(np.flatnonzero(angularSeparation(a, d, ra_all, dec_all) <= r).tolist())
+        bad += expected != set(rows.tolist())
+    print(f"[{'OK' if bad == 0 else 'FAIL'}] sky index: {len(ra)} cones over {len(index)} positions, {bad} mismatches")
+    return bad == 0
+
+
+def check_crossmatch(catalogs: dict) -> bool:
+    """KD-tree crossmatch pairs vs brute force over the Kepler field, and group labels vs NumPy."""
+    from API import crossmatch
+    from API.sky import SkyIndex, angularSeparation
+
+    match = crossmatch.Crossmatch(SkyIndex(readAndCreateData(DATA_DIR, columnar=True)))
+    index, period = match.index, match.data.column("orbital_period")
+    # Every pair with both rows inside the window was recomputed from all-against-all separations
+    # Se recalcularon todos los pares con ambas filas en la ventana a partir de todas las separaciones
+    sel = np.flatnonzero((index.ra >= 280.0) & (index.ra <= 300.0))
+    rows = index.rows[sel]
+    expected = set()
+    for k in range(len(sel)):
+        sep = angularSeparation(index.ra[sel[k]], index.dec[sel[k]], index.ra[sel[k + 1:]], index.dec[sel[k + 1:]])
+        pa, pb = period[rows[k]], period[rows[k + 1:]]
+        with np.errstate(invalid="ignore"):
+            agree = np.abs(pa - pb) <= match.period_tol * np.maximum(pa, pb)
+        hit = (sep * 3600.0 <= match.radius_arcsec) & (agree | np.isnan(pa) | np.isnan(pb))
+        expected.update((min(a, b), max(a, b)) for a, b in zip([int(rows[k])] * int(hit.sum()), rows[k + 1:][hit].tolist()))
+    inside = set(rows.tolist())
+    got = {(min(a, b), max(a, b)) for a, b in match.pairs.tolist() if a in inside and b in inside}
+    pairs_ok = got == expected
+
+    # Group labels were the same partition with and without scipy
+    # Las etiquetas de grupo fueron la misma partición con y sin scipy
+    has_scipy = crossmatch._HAS_SCIPY
+    crossmatch._HAS_SCIPY = False
+    try:
+        fallback = crossmatch.matchGroups(match.data.n, match.pairs, period, match.period_tol, match.sep)
+    finally:
+        crossmatch._HAS_SCIPY = has_scipy
+    n_pairs = len(np.unique(np.column_stack((match.groups, fallback)), axis=0))
+    groups_ok = n_pairs == len(np.unique(match.groups)) == len(np.unique(fallback))
+
+    # No group kept known periods more than the tolerance apart (siblings chained through unknown periods)
+    # Ningún grupo mantuvo períodos conocidos a más de la tolerancia (hermanos encadenados por períodos desconocidos)
+    spread = 0
+    for labels in (match.groups, fallback):
+        known = ~np.isnan(period)
+        low = np.full(labels.max() + 1, np.inf)
+        high = np.full(labels.max() + 1, -np.inf)
+        np.minimum.at(low, labels[known], period[known])
+        np.maximum.at(high, labels[known], period[known])
+        spread += int(np.sum(high - low > match.period_tol * high))
+    ok = pairs_ok and groups_ok and spread == 0
+    print(f"[{'OK' if ok else 'FAIL'}] crossmatch: {len(expected)} brute-force pairs over {len(sel)} positions, "
+          f"{len(got ^ expected)} mismatches, groups {'equal' if groups_ok else 'differ'}, "
+          f"{spread} groups with periods > {match.period_tol:.0%} apart")
+    return ok
+
+
+def check_explorer(catalogs: dict) -> bool:
+    """Explorer pages (sorted indexes + cursors) vs masks and sorts over the raw columns."""
+    from API.explorer import CatalogTable, _DISPOSITIONS
+
+    data = readAndCreateData(DATA_DIR, columnar=True)
+    table = CatalogTable(data, "parity")
+    queries = [
+        {},
+        {"min_period": "1", "max_period": "20", "sort": "-depth"},
+        {"dataset": "KOI,TOI", "disposition": "CONFIRMED,CANDIDATE", "min_teff": "5000", "sort": "prad"},
+        {"max_prad": "2", "sort": "-orbital_period", "dataset": "TOI"},
+        {"disposition": "FALSE_POSITIVE", "min_depth": "1000", "max_depth": "1000"},
+    ]
+    bad = 0
+    for q in queries:
+        # Every page was followed through its cursor and compared with a full sort of the matching rows
+        # Se siguió cada página por su cursor y se comparó con un orden completo de las filas coincidentes
+        got, args = [], dict(q, limit="997", columns="id")
+        while True:
+            rows, page = table.query(args)
+            got.extend(rows.tolist())
+            if not page["next_cursor"]:
+                break
+            args["cursor"] = page["next_cursor"]
+        mask = np.ones(data.n, dtype=bool)
+        for key, field in (("period", "orbital_period"), ("depth", "transit_depth"),
+                           ("prad", "planet_radius"), ("teff", "stellar_temp")):
+            with np.errstate(invalid="ignore"):
+                if f"min_{key}" in q:
+                    mask &= data.column(field) >= float(q[f"min_{key}"])
+                if f"max_{key}" in q:
+                    mask &= data.column(field) <= float(q[f"max_{key}"])
+        if "dataset" in q:
+            mask &= np.isin(data.datasets, [DatasetType[d].value for d in q["dataset"].split(",")])
+        if "disposition" in q:
+            codes = [_DISPOSITIONS.index(Disposition(d)) for d in q["disposition"].split(",")]
+            mask &= np.isin(data.dispositions, codes)
+        rows = np.flatnonzero(mask)
+        sort = q.get("sort", "row")
+        if sort != "row":
+            field = {"depth": "transit_depth", "prad": "planet_radius"}.get(sort.lstrip("-"), sort.lstrip("-"))
+            values = data.column(field)[rows]
+            key = np.where(np.isnan(values), np.inf, -values if sort.startswith("-") else values)
+            rows = rows[np.lexsort((rows, np.isnan(values), key))]
+        bad += got != rows.tolist()
+    print(f"[{'OK' if bad == 0 else 'FAIL'}] explorer: {len(queries)} queries paged through cursors, {bad} mismatches")
+    return bad == 0
+
+
+def check_training_features(catalogs: dict) -> bool:
+    """Columnar float32 training matrix vs entry_to_features dicts + prepare_data_for_training."""
+    import contextlib, io
+    from API import trainExoplanetModel as T
+
+    paths = [os.path.join(DATA_DIR, f"{name}.csv") for name in ("KOI", "TOI", "K2")]
+    paths = [p for p in paths if os.path.exists(p)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        features, labels = [], []
+        for path in paths:
+            f, l, _ = T.load_and_process_csv(path)
+            features.extend(f)
+            labels.extend(l)
+        expected, y_expected = T.prepare_data_for_training(features, labels)
+        plan = T.training_plan(T.getDataType(p) for p in paths)
+        parts = [T.load_csv_features(p, plan) for p in paths]
+        got, y_got = T.prepare_columnar_training([x for x, *_ in parts], [y for _, y, *_ in parts], plan)
+    # Values were computed in float64 and rounded once, so the float32 block is the exact cast
+    # Los valores se calcularon en float64 y se redondearon una vez, así que el bloque float32 es la conversión exacta
+    ok = (list(expected.columns) == list(got.columns) and np.array_equal(y_expected, y_got)
+          and np.array_equal(expected.to_numpy(dtype=np.float64).astype(np.float32), got.to_numpy()))
+    print(f"[{'OK' if ok else 'FAIL'}] training features: {got.shape[0]} rows x {got.shape[1]} columns")
+    return ok
+
+
+def check_tuning(catalogs: dict) -> bool:
+    """Folds trained in a process pool over the shared Dataset files vs in-process; fold assignment is stratified."""
+    import contextlib, io
+    from API import trainExoplanetModel as T
+    from API.tuning import crossValidate, foldAssignment
+
+    paths = [os.path.join(DATA_DIR, f"{name}.csv") for name in ("KOI", "TOI", "K2")]
+    paths = [p for p in paths if os.path.exists(p)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = T.training_plan(T.getDataType(p) for p in paths)
+        parts = [T.load_csv_features(p, plan) for p in paths]
+        X, y = T.prepare_columnar_training([x for x, *_ in parts], [y for _, y, *_ in parts], plan)
+    rows = np.random.default_rng(3).choice(len(y), 3000, replace=False)
+    X, y = X.to_numpy()[rows], y[rows]
+    params = dict(T.BASE_PARAMS, n_estimators=40)
+    serial = crossValidate(X, y, params, folds=3, workers=1)["cv"]["folds"]
+    pooled = crossValidate(X, y, params, folds=3, workers=2)["cv"]["folds"]
+    same = [(f["auc"], f["best_iteration"]) for f in serial] == [(f["auc"], f["best_iteration"]) for f in pooled]
+    folds = foldAssignment(y, folds=5)
+    shares = [float(y[folds == k].mean()) for k in range(5)]
+    stratified = max(shares) - min(shares) < 0.01
+    ok = same and stratified
+    print(f"[{'OK' if ok else 'FAIL'}] tuning: pooled folds {'equal' if same else 'differ'}, "
+          f"positive share per fold {min(shares):.3f}-{max(shares):.3f}")
+    return ok
+
+
+def check_dataset_cache(catalogs: dict) -> bool:
+    """Training on binned Datasets reloaded from the cache vs Datasets built in memory (same predictions)."""
+    import contextlib, io
+    import tempfile
+    import lightgbm as lgb
+    from API import trainExoplanetModel as T
+    from API.binning import DatasetCache, DATASET_PARAMS, balancedWeights, loadSplit, trainParams
+
+    path = os.path.join(DATA_DIR, "KOI.csv")
+    plan = T.training_plan([T.getDataType(path)])
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _, _ = T.load_csv_features(path, plan)
+    groups = np.arange(len(y))
+    columns = list(plan.columns)
+    rng = np.random.default_rng(5)
+    val = rng.random(len(y)) < 0.2
+    train_idx, val_idx = np.flatnonzero(~val), np.flatnonzero(val)
+    args, rounds = trainParams(dict(T.BASE_PARAMS, n_estimators=60, n_jobs=1))
+
+    def fit(train, valid):
+        return lgb.train(args, train, num_boost_round=rounds, valid_sets=[valid],
+                         callbacks=[lgb.early_stopping(20, verbose=False)]).predict(X)
+
+    train = lgb.Dataset(X[train_idx], y[train_idx], weight=balancedWeights(y[train_idx]),
+                        feature_name=columns, params=DATASET_PARAMS)
+    expected = fit(train, lgb.Dataset(X[val_idx], y[val_idx], reference=train, feature_name=columns,
+                                      params=DATASET_PARAMS))
+    with tempfile.TemporaryDirectory() as root:
+        DatasetCache("parity", root).saveMatrix(X, y, groups, columns)
+        cold = DatasetCache("parity", root)
+        built = fit(*loadSplit(*cold.splitPaths("holdout", X, y, train_idx, val_idx, columns)))
+        warm = DatasetCache("parity", root)
+        matrix, y_cached, groups_cached, columns_cached = warm.loadMatrix()
+        reused = fit(*loadSplit(*warm.splitPaths("holdout", matrix, y_cached, train_idx, val_idx, columns_cached)))
+        stored = (np.array_equal(matrix, X) and np.array_equal(y_cached, y)
+                  and np.array_equal(groups_cached, groups) and columns_cached == columns)
+    ok = (stored and cold.misses == 1 and warm.hits == 1
+          and np.array_equal(expected, built) and np.array_equal(expected, reused))
+    print(f"[{'OK' if ok else 'FAIL'}] dataset cache: {len(y)} rows, matrix {'stored' if stored else 'differs'}, "
+          f"max |diff| = {float(np.max(np.abs(expected - reused))):.3e}")
+    return ok
+
+
+def check_incremental(catalogs: dict) -> bool:
+    """Incremental model keeps the base trees, trains only on unseen rows and never on held-out ones."""
+    import contextlib, io
+    import pandas as pd
+    from API import trainExoplanetModel as T
+    from API.binning import rowHashes, trainParams
+
+    path = os.path.join(DATA_DIR, "KOI.csv")
+    plan = T.training_plan([T.getDataType(path)])
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _, _ = T.load_csv_features(path, plan)
+    columns = list(plan.columns)
+    hashes = rowHashes(X, y)
+    perm = np.random.default_rng(9).permutation(len(y))
+    stable = np.array_equal(np.sort(rowHashes(X[perm], y[perm])), np.sort(hashes)) and len(np.unique(hashes)) == len(y)
+
+    # The base saw the first 90% of the rows, as if the rest came in a later delivery
+    # La base vio el primer 90% de las filas, como si el resto llegara en una entrega posterior
+    cut = int(len(y) * 0.9)
+    held = T.holdout_rows(y[:cut])
+    trained = np.setdiff1d(np.arange(cut), held)
+    args, _ = trainParams(dict(T.BASE_PARAMS, n_estimators=40, n_jobs=1))
+    base, _ = T._fit_rows(args, 40, X, y, trained, held, columns)
+    seen = {"trained": hashes[trained], "held_out": hashes[held]}
+    frame = pd.DataFrame(X, columns=columns)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model, _, report, rows = T.train_incremental(frame, y, base, seen, rounds=20)
+    kept = np.allclose(model.predict(X, num_iteration=base.num_trees(), raw_score=True), base.predict(X, raw_score=True))
+    disjoint = not len(np.intersect1d(rows["trained"], rows["held_out"]))
+    ok = (stable and kept and disjoint and report["new_rows"] == len(y) - cut
+          and np.isin(hashes[held], rows["held_out"]).all())
+    print(f"[{'OK' if ok else 'FAIL'}] incremental: {report['new_rows']} new rows, +{report['rounds_added']} trees, "
+          f"base trees {'kept' if kept else 'changed'}, hold-out {'disjoint' if disjoint else 'leaks'}")
+    return ok
+
+
+def check_threshold_sweep(catalogs: dict) -> bool:
+    """Binary-search threshold curve vs precision_recall_curve and brute-force confusion counts."""
+    from sklearn.metrics import precision_recall_curve
+    from API.thresholds import ThresholdCurve
+
+    rng = np.random.default_rng(11)
+    y = (rng.random(5000) < 0.65).astype(np.int8)
+    # Rounded scores made many ties, as early-stopped boosters produce
+    # Las puntuaciones redondeadas crearon muchos empates, como los de boosters con parada temprana
+    scores = np.round(np.clip(rng.normal(0.35 + 0.3 * y, 0.2), 0, 1), 3)
+    curve = ThresholdCurve(scores, y)
+
+    precisions, recalls, cuts = precision_recall_curve(y, scores)
+    high = np.where(precisions >= 0.95)[0]
+    low = np.where(recalls >= 0.95)[0]
+    expected = {"tau_high": float(cuts[high[0]]) if len(high) and high[0] < len(cuts) else 0.9,
+                "tau_low": float(cuts[low[-1]]) if len(low) else 0.1, "tau_balanced": 0.5}
+    same_taus = curve.thresholds() == expected
+
+    mismatches = 0
+    for t in np.r_[rng.random(200), cuts[::25], 0.0, 1.0]:
+        called = scores >= t
+        tp, fp = int(np.sum(called & (y == 1))), int(np.sum(called & (y == 0)))
+        p = curve.point(float(t))
+        mismatches += (p["tp"], p["fp"]) != (tp, fp) or not math.isclose(p["fpr"], fp / np.sum(y == 0))
+    fprs = np.array([curve.point(float(c))["fpr"] for c in cuts])
+    target = 0.1
+    mismatches += curve.forFpr(target) != float(cuts[np.flatnonzero(fprs <= target)[0]])
+    ok = same_taus and mismatches == 0
+    print(f"[{'OK' if ok else 'FAIL'}] threshold sweep: {len(cuts)} cuts, taus {'equal' if same_taus else 'differ'}, "
+          f"{mismatches} mismatches")
+    return ok
+
+
+def check_encoder(catalogs: dict) -> bool:
+    """NumPy encoder vs the _entry_to_row + DataFrame path."""
+    from API.analyse import _FeaturePlan, _entry_to_row, _rows_to_frame, _load_model_and_thresholds
+
+    _, _, columns_used = _load_model_and_thresholds()
+    plan = _FeaturePlan(columns_used)
+    ok = True
+    for name, entries in list(catalogs.items()) + [("edge", _edge_entries())]:
+        expected = _rows_to_frame([_entry_to_row(e) for e in entries], columns_used).to_numpy()
+        got, idx = plan.encode(entries)
+        same = len(idx) == len(entries) and np.array_equal(expected, got)
+        print(f"[{'OK' if same else 'FAIL'}] encoder {name}: {len(entries)} rows")
+        if not same and len(idx) == len(entries):
+            bad = np.argwhere(expected != got)
+            for r, c in bad[:5]:
+                print(f"    row {r} {columns_used[c]}: expected {expected[r, c]!r}, got {got[r, c]!r}")
+        ok &= same
+    return ok
+
+
+def check_tree_evaluator(catalogs: dict) -> bool:
+    """NumPy tree evaluator vs LightGBM predict (|diff| <= 1e-9)."""
+    import joblib
+    from API.analyse import _FeaturePlan, _load_model_and_thresholds
+    from API.trees import exportBooster
+
+    _, _, columns_used = _load_model_and_thresholds()
+    model = joblib.load("./model/model_lgb.pkl")
+    booster = getattr(model, "booster_", model)
+    ensemble = exportBooster(model)
+    plan = _FeaturePlan(columns_used)
+    ok = True
+    for name, entries in catalogs.items():
+        x, _ = plan.encode(entries)
+        # Missing values were also checked as NaN instead of the -999 sentinel
+        # También se comprobaron los faltantes como NaN en lugar del centinela -999
+        x_nan = np.where(x == -999, np.nan, x)
+        diff = max(
+            float(np.max(np.abs(booster.predict(x) - ensemble.predict(x)))),
+            float(np.max(np.abs(booster.predict(x_nan) - ensemble.predict(x_nan)))),
+        )
+        same = diff <= 1e-9
+        print(f"[{'OK' if same else 'FAIL'}] trees {name}: {len(entries)} rows, max |diff| = {diff:.3e}")
+        ok &= same
+    return ok
+
+
+CHECKS = [
+    check_ingestion,
+    check_columnar,
+    check_data_cache,
+    check_streaming,
+    check_directory,
+    check_sky_index,
+    check_crossmatch,
+    check_explorer,
+    check_encoder,
+    check_training_features,
+    check_tuning,
+    check_dataset_cache,
+    check_incremental,
+    check_threshold_sweep,
+    check_tree_evaluator,
+]
+
+
+def main() -> int:
+    catalogs = _catalog_entries()
+    results = [check(catalogs) for check in CHECKS]
+    print("\n[OK] All parity checks passed" if all(results) else "\n[FAIL] Some parity checks failed")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
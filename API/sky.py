@@ -0,0 +1,148 @@
+# Sky-position index over the bundled catalogs for cone searches.
+# Índice de posiciones en el cielo sobre los catálogos incluidos para búsquedas por cono.
+
+from __future__ import annotations
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from API.entry import DatasetType
+
+# scipy was checked as optional (KD-tree; without it the search is a NumPy scan)
+# Se comprobó scipy como opcional (árbol KD; sin él la búsqueda es un recorrido NumPy)
+try:
+    from scipy.spatial import cKDTree  # type: ignore
+    _HAS_SCIPY = True
+except Exception:
+    _HAS_SCIPY = False
+
+DATA_DIR = "./static/data"
+MAX_RADIUS_DEG = 180.0
+
+
+def unitVectors(ra_deg: np.ndarray, dec_deg: np.ndarray) -> np.ndarray:
+    """(n, 3) unit vectors of RA/Dec positions in degrees."""
+    ra = np.radians(np.asarray(ra_deg, dtype=np.float64))
+    dec = np.radians(np.asarray(dec_deg, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+
+
+def angularSeparation(ra1, dec1, ra2, dec2) -> np.ndarray:
+    """Great-circle separation in degrees (haversine form, accurate at small angles)."""
+    ra1, dec1, ra2, dec2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (ra1, dec1, ra2, dec2))
+    h = np.sin((dec2 - dec1) / 2) ** 2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0))))
+
+
+def _chord(radius_deg: float) -> float:
+    # Angular radius was turned into the straight-line distance between unit vectors
+    # Se convirtió el radio angular en la distancia en línea recta entre vectores unitarios
+    return 2.0 * np.sin(np.radians(min(radius_deg, MAX_RADIUS_DEG)) / 2.0)
+
+
+class SkyIndex:
+    """KD-tree over the unit vectors of every catalog row with a position."""
+
+    def __init__(self, data, signature: Optional[str] = None):
+        self.data = data
+        self.signature = signature
+        ra, dec = data.column("ra"), data.column("dec")
+        # Rows without a position were left out; `rows` maps tree points back to catalog rows
+        # Se dejaron fuera las filas sin posición; `rows` relaciona los puntos del árbol con las filas
+        self.rows = np.flatnonzero(~(np.isnan(ra) | np.isnan(dec)))
+        self.ra = np.asarray(ra[self.rows], dtype=np.float64)
+        self.dec = np.asarray(dec[self.rows], dtype=np.float64)
+        self.xyz = unitVectors(self.ra, self.dec)
+        self.tree = cKDTree(self.xyz) if _HAS_SCIPY and len(self.rows) else None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _neighbours(self, xyz: np.ndarray, radius_deg: float) -> np.ndarray:
+        if self.tree is not None:
+            return np.asarray(self.tree.query_ball_point(xyz, _chord(radius_deg)), dtype=np.intp)
+        return np.flatnonzero(np.linalg.norm(self.xyz - xyz, axis=1) <= _chord(radius_deg))
+
+    def cone(self, ra: float, dec: float, radius_deg: float, limit: Optional[int] = None) -> tuple:
+        """(catalog row indices, separations in degrees) inside the cone, nearest first."""
+        pts = self._neighbours(unitVectors([ra], [dec])[0], radius_deg)
+        sep = angularSeparation(ra, dec, self.ra[pts], self.dec[pts])
+        order = np.argsort(sep, kind="stable")[:limit]
+        return self.rows[pts[order]], sep[order]
+
+    def cones(self, ra: Sequence[float], dec: Sequence[float], radius_deg: Sequence[float],
+              limit: Optional[int] = None) -> List[tuple]:
+        """cone() for many positions; the KD-tree is queried once per distinct radius."""
+        ra = np.asarray(ra, dtype=np.float64)
+        dec = np.asarray(dec, dtype=np.float64)
+        radius_deg = np.broadcast_to(np.asarray(radius_deg, dtype=np.float64), ra.shape)
+        xyz = unitVectors(ra, dec)
+        out: List[Any] = [None] * len(ra)
+        for r in np.unique(radius_deg):
+            sel = np.flatnonzero(radius_deg == r)
+            if self.tree is not None:
+                found = self.tree.query_ball_point(xyz[sel], _chord(float(r)))
+            else:
+                found = [self._neighbours(xyz[i], float(r)) for i in sel]
+            for i, pts in zip(sel, found):
+                pts = np.asarray(pts, dtype=np.intp)
+                sep = angularSeparation(ra[i], dec[i], self.ra[pts], self.dec[pts])
+                order = np.argsort(sep, kind="stable")[:limit]
+                out[i] = (self.rows[pts[order]], sep[order])
+        return out
+
+    def describe(self, rows: np.ndarray, separations: np.ndarray, predictions=None,
+                 crossmatch=None) -> List[Dict[str, Any]]:
+        """JSON-ready matches: identifiers, position, separation, dispositions and linked rows."""
+        kinds = list(DatasetType)
+        out = []
+        for k, (i, sep) in enumerate(zip(rows.tolist(), separations.tolist())):
+            e = self.data.entry(i)
+            item = {
+                "dataset": kinds[int(self.data.datasets[i])].name,
+                "id": None if e.id is None else str(e.id),
+                "name": None if e.name is None else str(e.name),
+                "ra": e.ra,
+                "dec": e.dec,
+                "separation_deg": sep,
+                "catalog_disposition": e.disposition.value if e.disposition is not None else None,
+            }
+            if predictions is not None:
+                item["disposition"] = predictions[k].disposition.value
+                item["probability"] = predictions[k].probability
+            if crossmatch is not None:
+                item["linked"] = crossmatch.linked(i)
+            out.append(item)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rows": int(self.data.n), "indexed": len(self), "kdtree": self.tree is not None}
+
+
+_INDEX: Optional[SkyIndex] = None
+_LOCK = threading.Lock()
+
+
+def builtSkyIndex() -> Optional[SkyIndex]:
+    """Shared index if it was already built, without building or checking it (for health probes)."""
+    return _INDEX
+
+
+def getSkyIndex(data_dir: str = DATA_DIR) -> SkyIndex:
+    """Shared index of `data_dir`, rebuilt when a catalog CSV changes."""
+    from API.catalog import catalogSignature
+    from API.data import readAndCreateData, ColumnarExoplanetData
+
+    global _INDEX
+    signature = catalogSignature(data_dir) if os.path.isdir(data_dir) else ""
+    index = _INDEX
+    if index is not None and index.signature == signature:
+        return index
+    with _LOCK:
+        if _INDEX is None or _INDEX.signature != signature:
+            data = readAndCreateData(data_dir, columnar=True) if signature else ColumnarExoplanetData.concat([])
+            _INDEX = SkyIndex(data, signature)
+        return _INDEX
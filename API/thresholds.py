@@ -0,0 +1,187 @@
+# Usage: python -m API.thresholds [model_dir]
+# Threshold sweep over the stored out-of-fold probabilities: precision, recall and FPR at any cut, no model needed.
+# Barrido de umbrales sobre las probabilidades fuera de pliegue guardadas: precisión, recall y FPR sin usar el modelo.
+
+from __future__ import annotations
+import os
+import sys
+import json
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from API.artifacts import OOF_FILE, artifactSignature, readManifest
+
+MODEL_DIR = "./model"
+MAX_SWEEP_POINTS = int(os.getenv("MAX_SWEEP_POINTS", "1000"))
+
+# Targets of the saved thresholds: tau_high keeps this precision, tau_low this recall
+# Objetivos de los umbrales guardados: tau_high mantiene esta precisión, tau_low este recall
+TARGET_PRECISION = 0.95
+TARGET_RECALL = 0.95
+
+
+def _values(value: Optional[str], name: str) -> List[float]:
+    out = []
+    for part in (value or "").split(","):
+        if not part.strip():
+            continue
+        try:
+            v = float(part)
+        except ValueError:
+            raise ValueError(f"{name} must be a number or a comma-separated list of numbers") from None
+        if not 0.0 <= v <= 1.0:
+            raise ValueError(f"{name} must be in [0, 1]")
+        out.append(v)
+    return out
+
+
+class ThresholdCurve:
+    """Sorted probabilities with cumulative label counts; every query is one binary search."""
+
+    def __init__(self, scores: np.ndarray, labels: np.ndarray, source: str = "oof"):
+        order = np.argsort(scores, kind="stable")
+        self.scores = np.asarray(scores, dtype=np.float64)[order]
+        self.labels = np.asarray(labels, dtype=np.int8)[order]
+        self.source = source
+        n = len(self.scores)
+        # Positives at or above each position were accumulated from the top (one extra slot for "none")
+        # Se acumularon desde arriba los positivos en o sobre cada posición (un hueco extra para "ninguno")
+        self._tp = np.zeros(n + 1, dtype=np.int64)
+        self._tp[:n] = np.cumsum(self.labels[::-1])[::-1]
+        self._count = n - np.arange(n + 1)
+        self.positives = int(self._tp[0])
+        self.negatives = n - self.positives
+
+        # Distinct cuts, ascending, as precision_recall_curve lists them
+        # Cortes distintos, ascendentes, como los lista precision_recall_curve
+        starts = np.flatnonzero(np.r_[True, self.scores[1:] != self.scores[:-1]]) if n else np.zeros(0, np.intp)
+        self._cuts = self.scores[starts]
+        tp, count = self._tp[starts], self._count[starts]
+        self._precision = tp / np.maximum(count, 1)
+        self._recall = tp / max(self.positives, 1)
+        self._fpr = (count - tp) / max(self.negatives, 1)
+        # Running maximum made "lowest cut reaching a precision" a binary search
+        # El máximo acumulado convirtió "el corte más bajo que alcanza una precisión" en búsqueda binaria
+        self._best_precision = np.maximum.accumulate(self._precision) if n else self._precision
+
+    def point(self, threshold: float) -> Dict[str, Any]:
+        """Confusion counts and rates when rows with probability >= `threshold` are called positive."""
+        k = int(np.searchsorted(self.scores, threshold, side="left"))
+        tp, count = int(self._tp[k]), int(self._count[k])
+        return {
+            "threshold": float(threshold),
+            "precision": tp / count if count else 1.0,
+            "recall": tp / self.positives if self.positives else 0.0,
+            "fpr": (count - tp) / self.negatives if self.negatives else 0.0,
+            "tp": tp,
+            "fp": count - tp,
+        }
+
+    def forPrecision(self, target: float) -> Optional[float]:
+        """Lowest cut whose precision reaches `target` (None when none does)."""
+        i = int(np.searchsorted(self._best_precision, target, side="left"))
+        return float(self._cuts[i]) if i < len(self._cuts) else None
+
+    def forRecall(self, target: float) -> Optional[float]:
+        """Highest cut whose recall is still at least `target`."""
+        i = int(np.searchsorted(-self._recall, -target, side="right"))
+        return float(self._cuts[i - 1]) if i > 0 else None
+
+    def forFpr(self, limit: float) -> Optional[float]:
+        """Lowest cut whose false-positive rate is at most `limit`."""
+        i = int(np.searchsorted(-self._fpr, -limit, side="left"))
+        return float(self._cuts[i]) if i < len(self._cuts) else None
+
+    def thresholds(self, precision: float = TARGET_PRECISION, recall: float = TARGET_RECALL) -> Dict[str, float]:
+        """tau_high / tau_low / tau_balanced as saved in thresholds.json."""
+        tau_high = self.forPrecision(precision)
+        tau_low = self.forRecall(recall)
+        return {
+            "tau_high": 0.9 if tau_high is None else tau_high,
+            "tau_low": 0.1 if tau_low is None else tau_low,
+            "tau_balanced": 0.5,
+        }
+
+    def sweep(self, args: Mapping[str, str]) -> Dict[str, Any]:
+        """JSON answer for threshold, target_precision, target_recall, max_fpr (comma lists) and points."""
+        try:
+            points = int(args.get("points", 0))
+        except ValueError:
+            raise ValueError("points must be an integer") from None
+        if not 0 <= points <= MAX_SWEEP_POINTS:
+            raise ValueError(f"points must be in [0, {MAX_SWEEP_POINTS}]")
+        queries = [(name, v) for name in ("threshold", "target_precision", "target_recall", "max_fpr")
+                   for v in _values(args.get(name), name)]
+        if not queries and not points:
+            raise ValueError("Send threshold, target_precision, target_recall, max_fpr or points")
+
+        results = []
+        for name, v in queries:
+            if name == "threshold":
+                cut = v
+            else:
+                cut = {"target_precision": self.forPrecision, "target_recall": self.forRecall,
+                       "max_fpr": self.forFpr}[name](v)
+            item = {"query": name, "value": v}
+            item.update(self.point(cut) if cut is not None else {"threshold": None})
+            results.append(item)
+        out = {
+            "source": self.source,
+            "rows": int(len(self.scores)),
+            "positives": self.positives,
+            "negatives": self.negatives,
+            "results": results,
+        }
+        if points:
+            out["curve"] = [self.point(t) for t in np.linspace(0.0, 1.0, points).tolist()]
+        return out
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, scores=self.scores, labels=self.labels, source=np.array(self.source))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ThresholdCurve":
+        with np.load(path) as f:
+            return cls(f["scores"], f["labels"], str(f["source"]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"source": self.source, "rows": int(len(self.scores)), "cuts": int(len(self._cuts))}
+
+
+_CURVE: Optional[Tuple[str, ThresholdCurve, Optional[str]]] = None
+_LOCK = threading.Lock()
+
+
+def builtThresholdCurve() -> Optional[ThresholdCurve]:
+    """Loaded curve if there is one, without reading the store (for health probes)."""
+    cached = _CURVE
+    return cached[1] if cached is not None else None
+
+
+def getThresholdCurve(model_dir: str = MODEL_DIR) -> Tuple[ThresholdCurve, Optional[str]]:
+    """(curve, model version) of the active artifact set, reloaded when the artifacts change."""
+    global _CURVE
+    signature = artifactSignature(model_dir)
+    cached = _CURVE
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+    with _LOCK:
+        if _CURVE is None or _CURVE[0] != signature:
+            path = os.path.join(model_dir, OOF_FILE)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"{OOF_FILE} not found in {model_dir}; store it with "
+                                        "python -m API.trainExoplanetModel --oof")
+            version = (readManifest(model_dir) or {}).get("version")
+            _CURVE = (signature, ThresholdCurve.load(path), version)
+        return _CURVE[1], _CURVE[2]
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR
+    curve, version = getThresholdCurve(target)
+    print(f"[OK] Threshold curve of {version}: {json.dumps(curve.stats())}")
+    print(json.dumps(curve.thresholds(), indent=2))
@@ -1,33 +1,85 @@
-# Usage: python -m API.trainExoplanetModel
+# Usage: python -m API.trainExoplanetModel [--cv | --search | --incremental | --oof] [--trials 16] [--folds 5] [--workers 0]
+#                                           [--rounds 100] [--replay 0.1] [--compare] [--write-thresholds]
 
 import os
-import sys
 import json
+import time
+import argparse
 import warnings
 warnings.filterwarnings("ignore")
 
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import numpy as np
 import pandas as pd
 
-from sklearn.model_selection import train_test_split, StratifiedKFold
+from sklearn.model_selection import train_test_split, StratifiedGroupKFold
 from sklearn.metrics import (
-    precision_recall_curve, 
     average_precision_score, 
     roc_auc_score,
-    classification_report,
-    confusion_matrix
+    classification_report
 )
-from sklearn.preprocessing import LabelEncoder
 import lightgbm as lgb
 import joblib
 
 from API.data import (
-    readAndCreateData,
+    iterCatalogChunks,
+    ColumnarExoplanetData,
     getDataType,
     DatasetType
 )
-from API.entry import Disposition, ExoplanetEntry, ExoplanetData
+from API.entry import Disposition, ExoplanetEntry
+from API.artifacts import (
+    writeArtifacts,
+    writeOofStore,
+    readManifest,
+    NATIVE_FILE,
+    COLUMNS_FILE,
+    ROWS_FILE,
+    TUNING_FILE
+)
+from API.crossmatch import crossmatchData, MATCH_FIELDS
+from API.analyse import _FeaturePlan, _ROW_FEATURES
+from API.tuning import crossValidate, searchParams
+from API.thresholds import ThresholdCurve
+from API.binning import DatasetCache, trainingKey, loadSplit, trainParams, balancedWeights, rowHashes, DATASET_PARAMS
+
+# Rows matched across missions were collapsed to one before training when enabled
+# Se redujeron a una las filas emparejadas entre misiones antes de entrenar cuando se activó
+TRAIN_DEDUP = os.getenv("SIDEREUS_TRAIN_DEDUP", "off").lower() in ("1", "on", "true", "yes")
+
+# Boosting rounds added by --incremental and share of already-seen training rows replayed with the new ones
+# Rondas añadidas por --incremental y fracción de filas ya vistas que se repiten junto a las nuevas
+INCREMENTAL_ROUNDS = int(os.getenv("SIDEREUS_INCREMENTAL_ROUNDS", "100"))
+INCREMENTAL_REPLAY = float(os.getenv("SIDEREUS_INCREMENTAL_REPLAY", "0.1"))
+
+# Optimized parameters for exoplanet detection (starting point of --search)
+# Parámetros optimizados para detección de exoplanetas (punto de partida de --search)
+BASE_PARAMS = {
+    'objective': 'binary',
+    'metric': 'auc',
+    'boosting_type': 'gbdt',
+    'num_leaves': 31,
+    'learning_rate': 0.05,
+    'feature_fraction': 0.9,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'verbose': -1,
+    'min_child_samples': 20,
+    'max_depth': -1,
+    'reg_alpha': 0.1,
+    'reg_lambda': 0.1,
+    'n_estimators': 500,
+    'random_state': 42,
+    'class_weight': 'balanced'  # Important for unbalanced datasets / Importante para datasets desbalanceados
+}
+
+# Feature columns in the order entry_to_features + prepare_data_for_training produce them
+# Columnas de características en el orden que producen entry_to_features + prepare_data_for_training
+TRAIN_FEATURES = list(_ROW_FEATURES) + [f"isnan_{f}" for f in _ROW_FEATURES] + ["score"]
+
+# Training label of each disposition code + 1 (-1 skipped): CONFIRMED/CANDIDATE 1, FALSE_POSITIVE 0
+# Etiqueta de entrenamiento de cada código de disposición + 1 (-1 omitida): CONFIRMED/CANDIDATE 1, FALSE_POSITIVE 0
+_LABELS = np.array([-1, 1, 1, 0, -1], dtype=np.int8)
 
 def entry_to_features(entry: ExoplanetEntry, dataset_type: DatasetType) -> dict:
     """
@@ -103,37 +155,40 @@ def entry_to_features(entry: ExoplanetEntry, dataset_type: DatasetType) -> dict:
 # Load and process data
 # Cargar y procesar datos
 
-def load_and_process_csv(csv_path: str) -> Tuple[List[dict], List[int], DatasetType]:
+def load_and_process_csv(csv_path: str, rows: Optional[List[int]] = None) -> Tuple[List[dict], List[int], DatasetType]:
     """
     Loads a CSV and processes entries, returning features and labels.
+    When `rows` is a list, the file row index of each kept entry is appended to it.
     Carga un CSV y procesa las entradas, devolviendo características y etiquetas.
+    Si `rows` es una lista, se le añade el índice de fila de cada entrada conservada.
     """
     print(f"\n[INFO] Loading data from: {csv_path}")
     
-    # Load raw data
-    # Cargar datos crudos
-    exoplanet_data: ExoplanetData = readAndCreateData(csv_path)
-    if not exoplanet_data.entries:
+    # Dataset type was detected from the header
+    # Se detectó el tipo de dataset por la cabecera
+    dataset_type = getDataType(csv_path)
+    if not os.path.exists(csv_path):
         print(f"[ERROR] Could not load data from {csv_path}")
         return [], [], None
     
     # Print dataset type
     # Imprimir tipo de dataset
-    print(f"[INFO] Detected dataset type: {exoplanet_data.dataset_type}")
+    print(f"[INFO] Detected dataset type: {dataset_type}")
     
 
-    if exoplanet_data.dataset_type == DatasetType.UNKNOWN:
-        print(f"[ERROR] Unsupported dataset type: {exoplanet_data.dataset_type}")
+    if dataset_type == DatasetType.UNKNOWN:
+        print(f"[ERROR] Unsupported dataset type: {dataset_type}")
         return [], [], None
     
     
-    # Process entries
-    # Procesar entradas
+    # Process entries, streamed in bounded chunks so only one chunk of entries is alive at a time
+    # Procesar entradas, leídas en bloques acotados para que solo un bloque de entradas exista a la vez
     features_list = []
     labels_list = []
     skipped = 0
     
-    for i, entry in enumerate(exoplanet_data.entries):
+    entries = (e for chunk in iterCatalogChunks(csv_path, kind="entries") for e in chunk)
+    for i, entry in enumerate(entries):
         try:            
             # Check if we have a valid disposition
             # Verificar si tenemos una disposición válida
@@ -155,10 +210,12 @@ def load_and_process_csv(csv_path: str) -> Tuple[List[dict], List[int], DatasetT
             
             # Extract features
             # Extraer características
-            features = entry_to_features(entry, exoplanet_data.dataset_type)
+            features = entry_to_features(entry, dataset_type)
             
             features_list.append(features)
             labels_list.append(label)
+            if rows is not None:
+                rows.append(i)
             
         except Exception as e:
             skipped += 1
@@ -168,7 +225,74 @@ def load_and_process_csv(csv_path: str) -> Tuple[List[dict], List[int], DatasetT
     
     print(f"[INFO] Processed {len(features_list)} valid entries, {skipped} skipped")
     
-    return features_list, labels_list, exoplanet_data.dataset_type
+    if not features_list and not skipped:
+        print(f"[ERROR] Could not load data from {csv_path}")
+        return [], [], None
+    
+    return features_list, labels_list, dataset_type
+
+def training_plan(dataset_types) -> _FeaturePlan:
+    """
+    Encoder for TRAIN_FEATURES plus one dataset_<name> column per dataset type, sorted like pd.get_dummies.
+    Codificador de TRAIN_FEATURES más una columna dataset_<nombre> por tipo de dataset, ordenadas como pd.get_dummies.
+    """
+    names = sorted({d.name for d in dataset_types})
+    return _FeaturePlan(TRAIN_FEATURES + [f"dataset_{n}" for n in names])
+
+
+def load_csv_features(csv_path: str, plan: _FeaturePlan,
+                      match_parts: Optional[list] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, DatasetType]:
+    """
+    Columnar counterpart of load_and_process_csv: float32 features, labels and file rows of the labeled entries.
+    With `match_parts`, the crossmatch fields of every chunk (all rows) are appended to it from the same pass.
+    Equivalente en columnas de load_and_process_csv: características float32, etiquetas y filas de las entradas etiquetadas.
+    Con `match_parts`, se le añaden los campos del cruce de cada bloque (todas las filas) en la misma lectura.
+    """
+    print(f"\n[INFO] Loading data from: {csv_path}")
+    dataset_type = getDataType(csv_path)
+    if not os.path.exists(csv_path) or dataset_type == DatasetType.UNKNOWN:
+        print(f"[ERROR] Could not load data from {csv_path}")
+        return np.empty((0, plan.width), dtype=np.float32), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp), None
+    print(f"[INFO] Detected dataset type: {dataset_type}")
+
+    # Each chunk was encoded straight into a float32 block; logs, ratios and flags are whole-array operations
+    # Cada bloque se codificó directamente en float32; logaritmos, cocientes e indicadores son operaciones de arreglo
+    blocks, labels, rows = [], [], []
+    offset = skipped = 0
+    for chunk in iterCatalogChunks(csv_path, kind="columnar"):
+        label = _LABELS[chunk.dispositions.astype(np.intp) + 1]
+        keep = label >= 0
+        block = plan.encodeColumns(chunk, np.empty((chunk.n, plan.width), dtype=np.float32), dataset_type)
+        blocks.append(block[keep])
+        labels.append(label[keep].astype(np.int64))
+        rows.append(offset + np.flatnonzero(keep))
+        if match_parts is not None:
+            match_parts.append(chunk.select(MATCH_FIELDS))
+        skipped += int(chunk.n - keep.sum())
+        offset += chunk.n
+
+    X = np.concatenate(blocks) if blocks else np.empty((0, plan.width), dtype=np.float32)
+    y = np.concatenate(labels) if labels else np.empty(0, dtype=np.int64)
+    print(f"[INFO] Processed {len(y)} valid entries, {skipped} skipped")
+    return X, y, np.concatenate(rows) if rows else np.empty(0, dtype=np.intp), dataset_type
+
+
+def prepare_columnar_training(blocks: List[np.ndarray], labels: List[np.ndarray], plan: _FeaturePlan) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Joins the float32 blocks into the same frame prepare_data_for_training builds from dicts.
+    Une los bloques float32 en el mismo marco que prepare_data_for_training construye con diccionarios.
+    """
+    X = np.concatenate(blocks)
+    y = np.concatenate(labels)
+    # Dataset columns without rows were dropped, as pd.get_dummies never creates them
+    # Se quitaron las columnas de dataset sin filas, ya que pd.get_dummies nunca las crea
+    keep = [i for i, c in enumerate(plan.columns) if not c.startswith("dataset_") or X[:, i].any()]
+    df = pd.DataFrame(X[:, keep] if len(keep) < plan.width else X, columns=[plan.columns[i] for i in keep], copy=False)
+
+    print(f"\n[INFO] Final data shape: X={df.shape}, y={y.shape}")
+    print(f"[INFO] Class distribution: {np.bincount(y)}")
+    print(f"[INFO] Features used: {list(df.columns)}")
+    return df, y
 
 # Prepare data for the model
 # Preparar datos para el modelo
@@ -207,80 +331,84 @@ def prepare_data_for_training(all_features: List[dict], all_labels: List[int]) -
 # Model training
 # Entrenamiento del modelo
 
-def train_model(X: pd.DataFrame, y: np.ndarray, validate: bool = True) -> Tuple[lgb.LGBMClassifier, dict]:
+def holdout_rows(y: np.ndarray, groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Sorted rows of the stratified 20% validation split (group-aware when `groups` is given).
+    Filas ordenadas de la división de validación estratificada del 20% (respetando grupos si se dan).
+    """
+    if groups is None:
+        _, val_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+        return np.sort(val_idx)
+    # One fold of five kept the 20% hold-out, stratified and without splitting a group
+    # Un pliegue de cinco mantuvo el 20% de validación, estratificado y sin partir grupos
+    splitter = StratifiedGroupKFold(n_splits=5, shuffle=True, random_state=42)
+    _, val_idx = next(splitter.split(np.zeros(len(y)), y, groups))
+    return np.sort(val_idx)
+
+
+def cached_holdout(y: np.ndarray, groups: Optional[np.ndarray], cache: DatasetCache) -> Tuple[str, np.ndarray]:
+    """
+    Split name and hold-out rows, stored with the Datasets so a cached run skips recomputing them.
+    Nombre de la división y filas reservadas, guardadas con los Dataset para no recalcularlas en caché.
+    """
+    name = "holdout-g" if groups is not None else "holdout-s"
+    return name, cache.array(f"{name}.valid_rows", lambda: holdout_rows(y, groups))
+
+
+def train_model(X: pd.DataFrame, y: np.ndarray, validate: bool = True,
+                groups: Optional[np.ndarray] = None, params: Optional[dict] = None,
+                cache: Optional[DatasetCache] = None) -> Tuple[lgb.Booster, dict]:
     """
     Trains a LightGBM model with optional cross-validation.
+    With `groups`, rows of the same crossmatch group never straddle the validation split;
+    with `cache`, the binned train/validation Datasets are reused between runs.
     Entrena un modelo LightGBM con validación cruzada opcional.
+    Con `groups`, las filas de un mismo grupo de cruce nunca quedan a ambos lados de la validación;
+    con `cache`, los Dataset agrupados de entrenamiento y validación se reutilizan entre ejecuciones.
     """
     print("\n[INFO] Starting model training...")
-    
-    # Optimized parameters for exoplanet detection
-    # Parámetros optimizados para detección de exoplanetas
-    params = {
-        'objective': 'binary',
-        'metric': 'auc',
-        'boosting_type': 'gbdt',
-        'num_leaves': 31,
-        'learning_rate': 0.05,
-        'feature_fraction': 0.9,
-        'bagging_fraction': 0.8,
-        'bagging_freq': 5,
-        'verbose': -1,
-        'min_child_samples': 20,
-        'max_depth': -1,
-        'reg_alpha': 0.1,
-        'reg_lambda': 0.1,
-        'n_estimators': 500,
-        'random_state': 42,
-        'class_weight': 'balanced'  # Important for unbalanced datasets / Importante para datasets desbalanceados
-    }
+    args, rounds = trainParams(dict(BASE_PARAMS if params is None else params))
+    columns = list(X.columns)
+    matrix = X.to_numpy()
     
     if validate:
         # Split into training and validation sets
         # Dividir en conjuntos de entrenamiento y validación
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # Train the model
-        # Entrenar el modelo
-        model = lgb.LGBMClassifier(**params)
-        model.fit(
-            X_train, y_train,
-            eval_set=[(X_val, y_val)],
-            eval_metric='auc',
-            callbacks=[lgb.early_stopping(50), lgb.log_evaluation(100)]
-        )
+        own = cache is None
+        cache = DatasetCache() if own else cache
+        try:
+            name, val_idx = cached_holdout(y, groups, cache)
+            train_idx = np.setdiff1d(np.arange(len(y)), val_idx, assume_unique=True)
+            y_val = y[val_idx]
+            
+            # Train the model on the binned Datasets (class_weight='balanced' is stored as row weights)
+            # Entrenar el modelo con los Dataset agrupados (class_weight='balanced' se guarda como pesos por fila)
+            train_set, valid_set = loadSplit(*cache.splitPaths(name, matrix, y, train_idx, val_idx, columns))
+            model = lgb.train(
+                args, train_set, num_boost_round=rounds,
+                valid_sets=[valid_set],
+                callbacks=[lgb.early_stopping(50), lgb.log_evaluation(100)]
+            )
+        finally:
+            if own:
+                cache.close()
         
         # Evaluate on validation set
         # Evaluar en conjunto de validación
-        y_pred_proba = model.predict_proba(X_val)[:, 1]
-        y_pred = model.predict(X_val)
-        
-        metrics = {
-            'auc': roc_auc_score(y_val, y_pred_proba),
-            'avg_precision': average_precision_score(y_val, y_pred_proba),
-            'val_size': len(y_val)
-        }
-        
-        print(f"\n[VALIDATION RESULTS]")
-        print(f"AUC-ROC: {metrics['auc']:.4f}")
-        print(f"Average Precision: {metrics['avg_precision']:.4f}")
-        print("\nClassification Report:")
-        print(classification_report(y_val, y_pred, target_names=['False Positive', 'Real Planet']))
+        metrics = evaluate_model(model, matrix[val_idx], y_val)
         
     else:
         # Train with all data
         # Entrenar con todos los datos
-        model = lgb.LGBMClassifier(**params)
-        model.fit(X, y)
+        train_set = lgb.Dataset(matrix, y, weight=balancedWeights(y), feature_name=columns, params=DATASET_PARAMS)
+        model = lgb.train(args, train_set, num_boost_round=rounds)
         metrics = {}
     
     # Feature importance
     # Importancia de características
     feature_importance = pd.DataFrame({
-        'feature': X.columns,
-        'importance': model.feature_importances_
+        'feature': columns,
+        'importance': model.feature_importance()
     }).sort_values('importance', ascending=False)
     
     print("\n[TOP 10 MOST IMPORTANT FEATURES]")
@@ -289,52 +417,263 @@ def train_model(X: pd.DataFrame, y: np.ndarray, validate: bool = True) -> Tuple[
     return model, metrics
 
 
-# Calculate optimal thresholds
-# Calcular umbrales óptimos
-
-def calculate_optimal_thresholds(model: lgb.LGBMClassifier, X: pd.DataFrame, y: np.ndarray) -> dict:
+def evaluate_model(model: lgb.Booster, X_val: np.ndarray, y_val: np.ndarray, report: bool = True) -> dict:
     """
-    Calculates optimal thresholds for classification based on desired precision.
-    Calcula umbrales óptimos para clasificación basados en la precisión deseada.
+    Validation AUC-ROC, average precision and size, printing the classification report.
+    AUC-ROC, precisión media y tamaño de validación, imprimiendo el informe de clasificación.
     """
-    y_pred_proba = model.predict_proba(X)[:, 1]
+    y_pred_proba = model.predict(X_val)
+    y_pred = (y_pred_proba >= 0.5).astype(int)
     
-    # Calculate precision-recall curve
-    # Calcular curva precisión-recall
-    precisions, recalls, thresholds = precision_recall_curve(y, y_pred_proba)
+    metrics = {
+        'auc': roc_auc_score(y_val, y_pred_proba),
+        'avg_precision': average_precision_score(y_val, y_pred_proba),
+        'val_size': len(y_val)
+    }
     
-    # Find threshold for high precision (few false positives)
-    # Encontrar umbral para alta precisión (pocos falsos positivos)
-    target_precision_high = 0.95
-    idx_high = np.where(precisions >= target_precision_high)[0]
-    if len(idx_high) > 0:
-        tau_high = thresholds[idx_high[0]]
-    else:
-        tau_high = 0.9
-    
-    # Find threshold for high recall (few false negatives)
-    # Encontrar umbral para alto recall (pocos falsos negativos)
-    target_recall_high = 0.95
-    idx_low = np.where(recalls >= target_recall_high)[0]
-    if len(idx_low) > 0:
-        tau_low = thresholds[idx_low[-1]]
+    if report:
+        print(f"\n[VALIDATION RESULTS]")
+        print(f"AUC-ROC: {metrics['auc']:.4f}")
+        print(f"Average Precision: {metrics['avg_precision']:.4f}")
+        print("\nClassification Report:")
+        print(classification_report(y_val, y_pred, target_names=['False Positive', 'Real Planet']))
+    return metrics
+
+
+# Incremental training from the deployed model
+# Entrenamiento incremental desde el modelo desplegado
+
+def _same_columns(model_dir: str, columns: List[str]) -> bool:
+    with open(os.path.join(model_dir, COLUMNS_FILE)) as f:
+        if json.load(f) == list(columns):
+            return True
+    print("[ERROR] Feature columns changed since the deployed model; run a full training")
+    return False
+
+
+def deployed_params(model_dir: str) -> dict:
+    """
+    Parameters of the deployed model: tuning.json of a searched model, else BASE_PARAMS.
+    Parámetros del modelo desplegado: tuning.json de un modelo buscado, si no BASE_PARAMS.
+    """
+    # The parameters of a searched model were kept so added trees grow like the existing ones
+    # Se conservaron los parámetros de un modelo buscado para que los árboles añadidos crezcan como los existentes
+    tuning_path = os.path.join(model_dir, TUNING_FILE)
+    if os.path.exists(tuning_path):
+        with open(tuning_path) as f:
+            return json.load(f).get("params", BASE_PARAMS)
+    return BASE_PARAMS
+
+
+def deployed_oof(X: pd.DataFrame, y: np.ndarray, groups: Optional[np.ndarray], model_dir: str,
+                 folds: int = 5, workers: Optional[int] = None,
+                 cache: Optional[DatasetCache] = None) -> Optional[ThresholdCurve]:
+    """
+    Out-of-fold curve of the deployed model's parameters and tree count, without retraining it (None when unusable).
+    Curva fuera de pliegue con los parámetros y árboles del modelo desplegado, sin reentrenarlo (None si no sirve).
+    """
+    native = os.path.join(model_dir, NATIVE_FILE)
+    if not os.path.exists(native) or not os.path.exists(os.path.join(model_dir, COLUMNS_FILE)):
+        print(f"[ERROR] {model_dir} lacks {NATIVE_FILE} or {COLUMNS_FILE}; run a full training first")
+        return None
+    with open(os.path.join(model_dir, COLUMNS_FILE)) as f:
+        columns = json.load(f)
+    # A model trained before a catalog was added lacks that dataset's column: its rows were left out
+    # Un modelo entrenado antes de añadir un catálogo no tiene la columna de ese dataset: se omitieron sus filas
+    extra = [c for c in X.columns if c not in columns]
+    if any(c not in X.columns for c in columns) or any(not c.startswith("dataset_") for c in extra):
+        print("[ERROR] Feature columns changed since the deployed model; run a full training")
+        return None
+    if extra:
+        keep = ~X[extra].to_numpy().any(axis=1)
+        print(f"[INFO] Deployed model has no {', '.join(extra)}; using {int(keep.sum())} of {len(y)} rows")
+        X, y = X.loc[keep, columns].reset_index(drop=True), y[keep]
+        groups = groups[keep] if groups is not None else None
+        cache = None
+    # Folds grew as many trees as the deployed booster so their probabilities match its calibration
+    # Los pliegues crecieron tantos árboles como el booster desplegado para que sus probabilidades tengan su calibración
+    rounds = lgb.Booster(model_file=native).num_trees()
+    params = dict(deployed_params(model_dir), n_estimators=rounds)
+    print(f"[INFO] Out-of-fold predictions of the deployed model ({folds} folds, {rounds} rounds)...")
+    oof = crossValidate(X, y, params, groups, folds=folds, workers=workers, cache=cache, oof=True)["oof"]
+    return ThresholdCurve(oof, y, source="oof")
+
+
+def load_base_model(model_dir: str, columns: List[str]) -> Optional[Tuple[lgb.Booster, Dict[str, np.ndarray], dict]]:
+    """
+    Deployed booster, hashes of its trained and held-out rows and its parameters; None (with the reason) when unusable.
+    Booster desplegado, hashes de sus filas entrenadas y reservadas y sus parámetros; None (con el motivo) si no sirve.
+    """
+    manifest = readManifest(model_dir) or {}
+    paths = {name: os.path.join(model_dir, name) for name in (NATIVE_FILE, COLUMNS_FILE, ROWS_FILE)}
+    missing = [name for name, path in paths.items() if not os.path.exists(path)]
+    if missing:
+        print(f"[ERROR] {model_dir} lacks {', '.join(missing)}; run a full training first")
+        return None
+    if not _same_columns(model_dir, columns):
+        return None
+    params = deployed_params(model_dir)
+    with np.load(paths[ROWS_FILE]) as stored:
+        rows = {k: stored[k] for k in ("trained", "held_out")}
+    base = lgb.Booster(model_file=paths[NATIVE_FILE])
+    print(f"[OK] Base model {manifest.get('version', 'unversioned')}: {base.num_trees()} trees")
+    return base, rows, params
+
+
+def _fit_rows(args: dict, rounds: int, matrix: np.ndarray, y: np.ndarray, train_rows: np.ndarray,
+              val_rows: np.ndarray, columns: List[str], init_model: Optional[lgb.Booster] = None) -> Tuple[lgb.Booster, float]:
+    """Booster fitted on `train_rows` with early stopping on `val_rows`, and its wall time."""
+    t0 = time.perf_counter()
+    train_set = lgb.Dataset(matrix[train_rows], y[train_rows], weight=balancedWeights(y[train_rows]),
+                            feature_name=columns, params=DATASET_PARAMS)
+    valid_set = lgb.Dataset(matrix[val_rows], y[val_rows], reference=train_set, feature_name=columns,
+                            params=DATASET_PARAMS)
+    model = lgb.train(
+        args, train_set, num_boost_round=rounds, init_model=init_model,
+        valid_sets=[valid_set],
+        callbacks=[lgb.early_stopping(min(50, rounds), verbose=False)]
+    )
+    return model, time.perf_counter() - t0
+
+
+def train_incremental(X: pd.DataFrame, y: np.ndarray, base: lgb.Booster, seen: Dict[str, np.ndarray],
+                      groups: Optional[np.ndarray] = None, params: Optional[dict] = None,
+                      rounds: int = INCREMENTAL_ROUNDS, replay: float = INCREMENTAL_REPLAY,
+                      compare: bool = False, seed: int = 42):
+    """
+    Adds at most `rounds` trees to `base`, fitted on the new training rows plus a `replay` share of its trained rows.
+    Rows held out from the base stay held out and 20% of the new rows join them, so the evaluation never sees
+    training data. With `compare`, a full retrain on every non-held-out row is timed and scored on the same rows.
+    Returns (model, metrics, report, rows) or None when there is no new row.
+    Añade como máximo `rounds` árboles a `base`, ajustados con las filas nuevas más una fracción `replay` de las ya
+    entrenadas. Las filas reservadas del modelo base siguen reservadas y el 20% de las nuevas se les une, así que la
+    evaluación nunca ve datos de entrenamiento. Con `compare` se mide un reentrenamiento completo sobre las mismas filas.
+    """
+    columns = list(X.columns)
+    matrix = X.to_numpy()
+    hashes = rowHashes(matrix, y)
+    held = np.isin(hashes, seen["held_out"])
+    new = np.flatnonzero(~held & ~np.isin(hashes, seen["trained"]))
+    if not len(new):
+        return None
+    # New rows got their own stratified (group-aware) 20% hold-out
+    # Las filas nuevas recibieron su propia reserva estratificada del 20% (respetando grupos)
+    if len(new) >= 10 and np.bincount(y[new], minlength=2).min() >= 5:
+        new_val = new[holdout_rows(y[new], None if groups is None else groups[new])]
     else:
-        tau_low = 0.1
-    
-    return {
-        'tau_high': float(tau_high),
-        'tau_low': float(tau_low),
-        'tau_balanced': 0.5
+        new_val = new[:0]
+    held[new_val] = True
+    fresh = np.setdiff1d(new, new_val, assume_unique=True)
+    val_rows = np.flatnonzero(held)
+    # Trained rows were replayed so the added trees do not drift towards the new delivery alone
+    # Se repitieron filas ya entrenadas para que los árboles añadidos no se sesguen solo hacia la nueva entrega
+    old = np.flatnonzero(~held & np.isin(hashes, seen["trained"]))
+    rng = np.random.default_rng(seed)
+    replayed = rng.choice(old, size=min(len(old), int(round(replay * len(old)))), replace=False)
+    train_rows = np.sort(np.concatenate([fresh, replayed]))
+    print(f"\n[INFO] Incremental training: {len(fresh)} new rows + {len(replayed)} replayed, "
+          f"up to {rounds} rounds, {len(val_rows)} held-out rows")
+    
+    args, full_rounds = trainParams(dict(BASE_PARAMS if params is None else params))
+    base_metrics = evaluate_model(base, matrix[val_rows], y[val_rows], report=False)
+    model, train_s = _fit_rows(args, rounds, matrix, y, train_rows, val_rows, columns, init_model=base)
+    metrics = evaluate_model(model, matrix[val_rows], y[val_rows])
+    report = {
+        "base_trees": int(base.num_trees()),
+        "rounds_added": int(model.num_trees() - base.num_trees()),
+        "new_rows": int(len(new)),
+        "new_train_rows": int(len(fresh)),
+        "replayed_rows": int(len(replayed)),
+        "train_s": train_s,
+        "base": {"auc": base_metrics["auc"], "avg_precision": base_metrics["avg_precision"]},
     }
+    if compare:
+        # The full retrain was only measured; its model was discarded
+        # El reentrenamiento completo solo se midió; su modelo se descartó
+        full_model, full_s = _fit_rows(args, full_rounds, matrix, y, np.flatnonzero(~held), val_rows, columns)
+        full = evaluate_model(full_model, matrix[val_rows], y[val_rows], report=False)
+        report["full_retrain"] = {"train_s": full_s, "trees": int(full_model.num_trees()),
+                                  "auc": full["auc"], "avg_precision": full["avg_precision"]}
+        report["time_saved_s"] = full_s - train_s
+        report["delta_vs_full"] = {k: metrics[k] - full[k] for k in ("auc", "avg_precision")}
+    rows = {"trained": np.union1d(seen["trained"], hashes[fresh]), "held_out": hashes[held]}
+    return model, metrics, report, rows
+
+
+def build_training_matrix(available: dict) -> Optional[Tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+    """
+    Reads the catalogs into the float32 training frame, labels and crossmatch groups (None without data).
+    Each CSV is read once, chunk by chunk; besides the features only the crossmatch fields of every row are kept.
+    Lee los catálogos en el marco float32 de entrenamiento, etiquetas y grupos de cruce (None sin datos).
+    Cada CSV se lee una vez, por bloques; además de las características solo se guardan los campos del cruce.
+    """
+    plan = training_plan(getDataType(p) for p in available.values())
+    all_blocks = []
+    all_labels = []
+    all_rows = []
+    loaded = []
+    offset = 0
+    
+    for dataset_name, csv_path in available.items():
+        parts = []
+        X_part, y_part, rows, dataset_type = load_csv_features(csv_path, plan, match_parts=parts)
+        if len(y_part):
+            all_blocks.append(X_part)
+            all_labels.append(y_part)
+            # Rows were numbered across files in the order the crossmatch concatenates them
+            # Se numeraron las filas entre archivos en el orden en que el cruce las concatena
+            data = ColumnarExoplanetData.concat(parts)
+            all_rows.append(offset + rows)
+            loaded.append(data)
+            offset += data.n
+            print(f"[OK] {dataset_name}: {len(y_part)} samples loaded")
+    
+    if not all_blocks:
+        return None
+    
+    # Crossmatch groups of the kept rows, so the same object never lands on both sides of a split
+    # Grupos de cruce de las filas conservadas, para que un objeto nunca quede a ambos lados de la división
+    match = crossmatchData(ColumnarExoplanetData.concat(loaded))
+    all_rows = np.concatenate(all_rows)
+    print(f"[INFO] Crossmatch: {json.dumps(match.stats())}")
+    if TRAIN_DEDUP:
+        keep = np.isin(all_rows, match.representatives(all_rows))
+        print(f"[INFO] Deduplicated {int(np.sum(~keep))} matched rows")
+        all_blocks = [np.concatenate(all_blocks)[keep]]
+        all_labels = [np.concatenate(all_labels)[keep]]
+        all_rows = all_rows[keep]
+    groups = match.groups[all_rows]
+    
+    # Prepare data for training
+    # Preparar datos para entrenamiento
+    X, y = prepare_columnar_training(all_blocks, all_labels, plan)
+    return X, y, groups
+
 
 # Main training function
 # Función principal de entrenamiento
 
-def main():
+def main(argv=None):
     """
     Main function that orchestrates the entire training process.
     Función principal que orquesta todo el proceso de entrenamiento.
     """
+    parser = argparse.ArgumentParser(description="Trains the exoplanet model.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--cv", action="store_true", help="report K-fold CV metrics of the base parameters")
+    mode.add_argument("--search", action="store_true", help="successive-halving hyperparameter search")
+    mode.add_argument("--incremental", action="store_true", help="add trees to the deployed model for new rows")
+    mode.add_argument("--oof", action="store_true", help="store out-of-fold predictions of the deployed model")
+    parser.add_argument("--trials", type=int, default=16, help="parameter sets tried by --search")
+    parser.add_argument("--folds", type=int, default=5, help="folds of --cv and --search")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default SIDEREUS_TRAIN_WORKERS, 0 = CPUs)")
+    parser.add_argument("--rounds", type=int, default=INCREMENTAL_ROUNDS, help="most trees added by --incremental")
+    parser.add_argument("--replay", type=float, default=INCREMENTAL_REPLAY, help="share of seen rows replayed by --incremental")
+    parser.add_argument("--compare", action="store_true", help="also run a full retrain and report the delta")
+    parser.add_argument("--write-thresholds", action="store_true",
+                        help="with --oof, also replace thresholds.json (changes served dispositions)")
+    args = parser.parse_args(argv)
+
     print("="*60)
     print("EXOPLANET DETECTION MODEL TRAINING")
     print("="*60)
@@ -362,33 +701,107 @@ def main():
     
     # Load and process all available datasets
     # Cargar y procesar todos los datasets disponibles
-    all_features = []
-    all_labels = []
-    
-    for dataset_name, csv_path in csv_paths.items():
-        if csv_path and os.path.exists(csv_path):
-            features, labels, dataset_type = load_and_process_csv(csv_path)
-            if features:
-                all_features.extend(features)
-                all_labels.extend(labels)
-                print(f"[OK] {dataset_name}: {len(features)} samples loaded")
-    
-    if not all_features:
-        print("[ERROR] No data could be loaded from any file")
+    # Features were built from catalog columns as float32 blocks (no per-entry dicts)
+    # Las características se construyeron desde las columnas del catálogo como bloques float32 (sin diccionarios por entrada)
+    available = {k: p for k, p in csv_paths.items() if p and os.path.exists(p)}
+    # Training matrix and binned Datasets were reused when catalogs and feature spec were unchanged
+    # Se reutilizaron la matriz y los Dataset agrupados cuando no cambiaron los catálogos ni las características
+    cache = DatasetCache(trainingKey(list(available.values()), dedup=TRAIN_DEDUP))
+    cached = cache.loadMatrix()
+    if cached is not None:
+        matrix, y, groups, columns = cached
+        X = pd.DataFrame(matrix, columns=columns, copy=False)
+        print(f"[OK] Training matrix reused from {cache.folder}: X={X.shape}")
+    else:
+        built = build_training_matrix(available)
+        if built is None:
+            print("[ERROR] No data could be loaded from any file")
+            return
+        X, y, groups = built
+        cache.saveMatrix(X.to_numpy(), y, groups, list(X.columns))
+    
+    # Cross-validation or parameter search over a process pool sharing the matrix
+    # Validación cruzada o búsqueda de parámetros en un pool de procesos que comparte la matriz
+    params, tuning, oof = BASE_PARAMS, None, None
+    if args.cv or args.search:
+        if args.search:
+            tuning = searchParams(X, y, BASE_PARAMS, groups, trials=args.trials, folds=args.folds,
+                                  workers=args.workers, cache=cache)
+            params = tuning["params"]
+        else:
+            tuning = crossValidate(X, y, BASE_PARAMS, groups, folds=args.folds, workers=args.workers,
+                                   cache=cache, oof=True)
+            oof = tuning.pop("oof")
+        cv = tuning["cv"]
+        print(f"\n[{tuning['mode'].upper()} RESULTS] {args.folds} folds, {tuning['workers']} workers x {tuning['threads_per_worker']} threads")
+        print(f"AUC-ROC: {cv['auc_mean']:.4f} +/- {cv['auc_std']:.4f}")
+        print(f"Average Precision: {cv['avg_precision_mean']:.4f} +/- {cv['avg_precision_std']:.4f}")
+        print(f"Wall time: {tuning['timings']['total_s']:.1f} s")
+    
+    if args.oof:
+        # The deployed model and, unless asked, its served thresholds were kept; only the sweep store was added
+        # Se conservaron el modelo desplegado y, salvo que se pidiera, sus umbrales; solo se añadió el almacén del barrido
+        curve = deployed_oof(X, y, groups, './model', folds=args.folds, workers=args.workers, cache=cache)
+        cache.close()
+        if curve is None:
+            return
+        thresholds = curve.thresholds()
+        manifest = writeOofStore(curve, './model', thresholds if args.write_thresholds else None)
+        state = "written to thresholds.json" if args.write_thresholds else "not written, use --write-thresholds"
+        print(f"[OK] Thresholds from {len(curve.scores)} out-of-fold probabilities ({state}): {json.dumps(thresholds)}")
+        print(f"[OK] Saved at: ./model/oof_predictions.npz, model version: {manifest['version']}")
         return
-    
-    # Prepare data for training
-    # Preparar datos para entrenamiento
-    X, y = prepare_data_for_training(all_features, all_labels)
-    
-    # Train model
-    # Entrenar modelo
-    model, metrics = train_model(X, y, validate=True)
+
+    parent = None
+    if args.incremental:
+        # Rows were identified by a hash of their features and label, so new or relabeled rows stand out
+        # Se identificaron las filas por un hash de sus características y etiqueta, para distinguir las nuevas o reetiquetadas
+        loaded = load_base_model('./model', list(X.columns))
+        if loaded is None:
+            cache.close()
+            return
+        base, seen, params = loaded
+        parent = (readManifest('./model') or {}).get("version")
+        result = train_incremental(X, y, base, seen, groups, params, rounds=args.rounds,
+                                   replay=args.replay, compare=args.compare)
+        if result is None:
+            print("[INFO] No new labeled rows since the deployed model; nothing to do")
+            cache.close()
+            return
+        model, metrics, report, rows = result
+        metrics["incremental"] = report
+        # Held-out rows were never trained on by the base nor the added trees, so they fed the sweep
+        # Ninguna versión entrenó con las filas reservadas, así que alimentaron el barrido
+        held = np.isin(rowHashes(X.to_numpy(), y), rows["held_out"])
+        curve = ThresholdCurve(model.predict(X.to_numpy()[held]), y[held], source="holdout")
+        print(f"\n[INCREMENTAL] +{report['rounds_added']} trees in {report['train_s']:.1f} s, "
+              f"AUC {report['base']['auc']:.4f} -> {metrics['auc']:.4f}")
+        if args.compare:
+            print(f"[INCREMENTAL] Full retrain {report['full_retrain']['train_s']:.1f} s "
+                  f"(saved {report['time_saved_s']:.1f} s), AUC delta vs full {report['delta_vs_full']['auc']:+.4f}")
+    else:
+        # Train model
+        # Entrenar modelo
+        t0 = time.perf_counter()
+        model, metrics = train_model(X, y, validate=True, groups=groups, params=params, cache=cache)
+        metrics["train_s"] = time.perf_counter() - t0
+        hashes = rowHashes(X.to_numpy(), y)
+        _, held = cached_holdout(y, groups, cache)
+        rows = {"trained": np.delete(hashes, held), "held_out": hashes[held]}
+        # Out-of-fold probabilities of the final parameters fed thresholds and the sweep
+        # Las probabilidades fuera de pliegue de los parámetros finales alimentaron umbrales y barrido
+        if oof is None:
+            print(f"\n[INFO] Out-of-fold predictions ({args.folds} folds)...")
+            oof = crossValidate(X, y, params, groups, folds=args.folds, workers=args.workers,
+                                cache=cache, oof=True)["oof"]
+        curve = ThresholdCurve(oof, y, source="oof")
+    print(f"[INFO] Binned Dataset cache: {json.dumps(cache.stats())}")
+    cache.close()
     
     # Calculate optimal thresholds
     # Calcular umbrales óptimos
-    thresholds = calculate_optimal_thresholds(model, X, y)
-    print(f"\n[CALCULATED THRESHOLDS]")
+    thresholds = curve.thresholds()
+    print(f"\n[CALCULATED THRESHOLDS] from {len(curve.scores)} {curve.source} probabilities")
     print(f"High threshold (high precision): {thresholds['tau_high']:.4f}")
     print(f"Low threshold (high recall): {thresholds['tau_low']:.4f}")
     
@@ -401,28 +814,13 @@ def main():
     model_path = './model/model_lgb.pkl'
     joblib.dump(model, model_path)
     print(f"\n[OK] Model saved at: {model_path}")
-    
-    # Save thresholds
-    # Guardar umbrales
-    thresholds_path = './model/thresholds.json'
-    with open(thresholds_path, 'w') as f:
-        json.dump(thresholds, f, indent=2)
-    print(f"[OK] Thresholds saved at: {thresholds_path}")
-    
-    # Save used columns
-    # Guardar columnas usadas
-    columns_path = './model/columns_used.json'
-    with open(columns_path, 'w') as f:
-        json.dump(list(X.columns), f, indent=2)
-    print(f"[OK] Columns saved at: {columns_path}")
-    
-    # Save metrics
-    # Guardar métricas
-    if metrics:
-        metrics_path = './model/metrics.json'
-        with open(metrics_path, 'w') as f:
-            json.dump(metrics, f, indent=2)
-        print(f"[OK] Metrics saved at: {metrics_path}")
+
+    # Save native model, tree export, thresholds, columns, metrics and manifest
+    # Guardar modelo nativo, exportación de árboles, umbrales, columnas, métricas y manifiesto
+    manifest = writeArtifacts(model, list(X.columns), thresholds, './model', metrics, tuning, rows, parent, curve)
+    for name in manifest["files"]:
+        print(f"[OK] Saved at: ./model/{name}")
+    print(f"[OK] Manifest saved, model version: {manifest['version']}")
     
     print("\n" + "="*60)
     print("TRAINING COMPLETED SUCCESSFULLY")
@@ -0,0 +1,203 @@
+# Flattens a trained LightGBM booster into NumPy arrays and evaluates it without lightgbm.
+# Aplana un booster LightGBM entrenado en arreglos NumPy y lo evalúa sin lightgbm.
+
+from __future__ import annotations
+import os
+import hashlib
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Missing-value handling codes used by LightGBM splits
+# Códigos de manejo de valores faltantes usados por las divisiones de LightGBM
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_CODES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+# Same zero band as LightGBM's kZeroThreshold
+# Misma banda de cero que kZeroThreshold de LightGBM
+_ZERO_THRESHOLD = 1e-35
+
+EXPORT_FORMAT = 1
+
+
+def fileSha256(path: str) -> str:
+    """Returns the hex SHA-256 of a file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TreeEnsemble:
+    """Binary LightGBM model stored as flat node arrays, evaluated level by level."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], feature_names: list[str], sigmoid: float = 1.0,
+                 source_sha256: Optional[str] = None):
+        self.feature = np.ascontiguousarray(arrays["feature"], dtype=np.int32)
+        self.threshold = np.ascontiguousarray(arrays["threshold"], dtype=np.float64)
+        self.left = np.ascontiguousarray(arrays["left"], dtype=np.int32)
+        self.right = np.ascontiguousarray(arrays["right"], dtype=np.int32)
+        self.default_left = np.ascontiguousarray(arrays["default_left"], dtype=bool)
+        self.missing_type = np.ascontiguousarray(arrays["missing_type"], dtype=np.int8)
+        self.value = np.ascontiguousarray(arrays["value"], dtype=np.float64)
+        self.roots = np.ascontiguousarray(arrays["roots"], dtype=np.int32)
+        self.max_depth = int(arrays["max_depth"])
+        self.feature_names = list(feature_names)
+        self.sigmoid = float(sigmoid)
+        self.source_sha256 = source_sha256
+        self._has_missing = bool((self.missing_type != MISSING_NONE).any())
+        # Interleaved (left, right) children and a leaf-safe feature index were precomputed
+        # Se precalcularon los hijos intercalados (izq, der) y un índice de característica seguro en hojas
+        self._children = np.ascontiguousarray(np.stack([self.left, self.right], axis=1).ravel(), dtype=np.int64)
+        self._split_feature = np.where(self.feature >= 0, self.feature, 0).astype(np.int64)
+
+    @property
+    def num_trees(self) -> int:
+        return int(self.roots.shape[0])
+
+    @property
+    def n_features_in_(self) -> int:
+        return len(self.feature_names)
+
+    def raw_score(self, X: np.ndarray, chunk_rows: int = 4096) -> np.ndarray:
+        """Sum of leaf values over all trees for each row of `X`."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_rows):
+            block = X[start:start + chunk_rows]
+            out[start:start + block.shape[0]] = self.value[self._leaves(block)].sum(axis=1)
+        return out
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # All (row, tree) pairs were walked together, one depth level per iteration;
+        # leaves point to themselves so finished pairs stay in place
+        # Se recorrieron todos los pares (fila, árbol) juntos, un nivel por iteración;
+        # las hojas apuntan a sí mismas para que los pares terminados no se muevan
+        n, width = X.shape
+        if self._has_missing:
+            return self._leaves_with_missing(X)
+        # Without missing-value handling LightGBM reads NaN as 0.0
+        # Sin manejo de faltantes LightGBM lee NaN como 0.0
+        flat_x = np.nan_to_num(X, nan=0.0, posinf=np.inf, neginf=-np.inf).ravel()
+        base = np.repeat(np.arange(n, dtype=np.int64) * width, self.num_trees)
+        cur = np.tile(self.roots, n).astype(np.int64)
+        for _ in range(self.max_depth):
+            fval = flat_x[base + self._split_feature[cur]]
+            cur = self._children[2 * cur + (fval > self.threshold[cur])]
+        return cur.reshape(n, self.num_trees)
+
+    def _leaves_with_missing(self, X: np.ndarray) -> np.ndarray:
+        # General path for splits with Zero/NaN missing-value handling
+        # Ruta general para divisiones con manejo de faltantes Zero/NaN
+        n, width = X.shape
+        flat_x = np.ascontiguousarray(X).ravel()
+        base = np.repeat(np.arange(n, dtype=np.int64) * width, self.num_trees)
+        cur = np.tile(self.roots, n).astype(np.int64)
+        for _ in range(self.max_depth):
+            fval = flat_x[base + self._split_feature[cur]]
+            thr = self.threshold[cur]
+            mt = self.missing_type[cur]
+            nan = np.isnan(fval)
+            fval = np.where(nan & (mt != MISSING_NAN), 0.0, fval)
+            is_missing = ((mt == MISSING_ZERO) & (np.abs(fval) <= _ZERO_THRESHOLD)) | ((mt == MISSING_NAN) & nan)
+            go_right = np.where(is_missing, ~self.default_left[cur], fval > thr)
+            cur = self._children[2 * cur + go_right]
+        return cur.reshape(n, self.num_trees)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probability, like Booster.predict for a binary objective."""
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * self.raw_score(X)))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p = self.predict(X)
+        return np.vstack((1.0 - p, p)).T
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            format=np.int32(EXPORT_FORMAT),
+            feature=self.feature, threshold=self.threshold,
+            left=self.left, right=self.right,
+            default_left=self.default_left, missing_type=self.missing_type,
+            value=self.value, roots=self.roots, max_depth=np.int32(self.max_depth),
+            feature_names=np.array(self.feature_names, dtype=str),
+            sigmoid=np.float64(self.sigmoid),
+            source_sha256=np.array(self.source_sha256 or "", dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TreeEnsemble":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format"]) != EXPORT_FORMAT:
+                raise ValueError(f"Unsupported tree export format in {path}")
+            arrays = {k: z[k] for k in z.files}
+        return cls(
+            arrays,
+            feature_names=[str(x) for x in arrays["feature_names"]],
+            sigmoid=float(arrays["sigmoid"]),
+            source_sha256=str(arrays["source_sha256"]) or None,
+        )
+
+
+def exportBooster(model: Any, source_sha256: Optional[str] = None) -> TreeEnsemble:
+    """Flattens an LGBMClassifier or lightgbm.Booster into a TreeEnsemble."""
+    booster = getattr(model, "booster_", model)
+    dump = booster.dump_model()
+    if dump.get("num_class", 1) != 1 or dump.get("num_tree_per_iteration", 1) != 1:
+        raise ValueError("Only binary models can be exported")
+    objective = str(dump.get("objective", ""))
+    if not objective.startswith("binary"):
+        raise ValueError(f"Unsupported objective for export: {objective}")
+    if dump.get("average_output"):
+        raise ValueError("Averaged output (random forest) models are not supported")
+    sigmoid = 1.0
+    for part in objective.split():
+        if part.startswith("sigmoid:"):
+            sigmoid = float(part.split(":", 1)[1])
+
+    feature, threshold, left, right = [], [], [], []
+    default_left, missing_type, value, roots = [], [], [], []
+    max_depth = 0
+
+    def add(node: dict, depth: int) -> int:
+        # Nodes were appended in preorder; children were patched after recursion
+        # Se agregaron los nodos en preorden; los hijos se completaron tras la recursión
+        nonlocal max_depth
+        idx = len(feature)
+        feature.append(-1); threshold.append(0.0); left.append(idx); right.append(idx)
+        default_left.append(False); missing_type.append(MISSING_NONE); value.append(0.0)
+        if "split_index" not in node:
+            value[idx] = float(node["leaf_value"])
+            max_depth = max(max_depth, depth)
+            return idx
+        if node.get("decision_type", "<=") != "<=":
+            raise ValueError("Categorical splits are not supported by the NumPy evaluator")
+        feature[idx] = int(node["split_feature"])
+        threshold[idx] = float(node["threshold"])
+        default_left[idx] = bool(node["default_left"])
+        missing_type[idx] = _MISSING_CODES[node["missing_type"]]
+        left[idx] = add(node["left_child"], depth + 1)
+        right[idx] = add(node["right_child"], depth + 1)
+        return idx
+
+    for info in dump["tree_info"]:
+        roots.append(add(info["tree_structure"], 0))
+
+    arrays = {
+        "feature": np.array(feature, dtype=np.int32),
+        "threshold": np.array(threshold, dtype=np.float64),
+        "left": np.array(left, dtype=np.int32),
+        "right": np.array(right, dtype=np.int32),
+        "default_left": np.array(default_left, dtype=bool),
+        "missing_type": np.array(missing_type, dtype=np.int8),
+        "value": np.array(value, dtype=np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": max_depth,
+    }
+    return TreeEnsemble(arrays, dump["feature_names"], sigmoid=sigmoid, source_sha256=source_sha256)
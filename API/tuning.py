@@ -0,0 +1,246 @@
+# Stratified K-fold cross-validation and successive-halving hyperparameter search for the trainer.
+# Validación cruzada estratificada K-fold y búsqueda de hiperparámetros por reducción sucesiva para el entrenador.
+#
+# Folds and trials run in a process pool; each fold is binned once into LightGBM binary Dataset
+# files (API.binning) that every worker reads, so only file paths and parameters travel between processes.
+# Los pliegues y ensayos corren en un pool de procesos; cada pliegue se agrupa una vez en archivos Dataset
+# binarios de LightGBM (API.binning) que lee cada worker, así que entre procesos solo viajan rutas y parámetros.
+
+from __future__ import annotations
+import os
+import math
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from API.binning import DatasetCache, loadSplit, trainParams
+
+# Processes used for folds and trials (0 = one per CPU, capped by the number of tasks)
+# Procesos usados para pliegues y ensayos (0 = uno por CPU, limitado por el número de tareas)
+TRAIN_WORKERS = int(os.getenv("SIDEREUS_TRAIN_WORKERS", "0"))
+
+# Sampling ranges of the search: (kind, low, high)
+# Rangos de muestreo de la búsqueda: (tipo, mínimo, máximo)
+SEARCH_SPACE = {
+    "num_leaves": ("int_log", 15, 255),
+    "learning_rate": ("log", 0.01, 0.2),
+    "min_child_samples": ("int_log", 5, 100),
+    "feature_fraction": ("uniform", 0.5, 1.0),
+    "bagging_fraction": ("uniform", 0.5, 1.0),
+    "reg_alpha": ("log", 1e-3, 10.0),
+    "reg_lambda": ("log", 1e-3, 10.0),
+}
+
+_THREADS = 1
+
+
+def sampleParams(rng: np.random.Generator, base: Dict[str, Any]) -> Dict[str, Any]:
+    """`base` with every SEARCH_SPACE entry drawn at random."""
+    params = dict(base)
+    for name, (kind, low, high) in SEARCH_SPACE.items():
+        if kind == "uniform":
+            params[name] = float(rng.uniform(low, high))
+        else:
+            value = math.exp(rng.uniform(math.log(low), math.log(high)))
+            params[name] = int(round(value)) if kind == "int_log" else float(value)
+    return params
+
+
+def foldAssignment(y: np.ndarray, groups: Optional[np.ndarray] = None, folds: int = 5,
+                   seed: int = 42) -> np.ndarray:
+    """Fold number of every row: stratified, and group-aware when `groups` is given."""
+    from sklearn.model_selection import StratifiedKFold, StratifiedGroupKFold
+
+    out = np.empty(len(y), dtype=np.int8)
+    if groups is None:
+        splits = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(np.zeros(len(y)), y)
+    else:
+        splits = StratifiedGroupKFold(n_splits=folds, shuffle=True, random_state=seed).split(np.zeros(len(y)), y, groups)
+    for k, (_, val) in enumerate(splits):
+        out[val] = k
+    return out
+
+
+def _init_worker(threads: int) -> None:
+    global _THREADS
+    _THREADS = threads
+
+
+def _fit_fold(task: tuple) -> Dict[str, Any]:
+    """Trains one (trial, fold) on its cached binned Datasets with early stopping.
+
+    When the task carries the fold's raw validation rows, their probabilities are returned as "proba".
+    """
+    import lightgbm as lgb
+
+    trial, params, fold, rounds, train_path, valid_path, x_val = task
+    t0 = time.perf_counter()
+    train, valid = loadSplit(train_path, valid_path)
+    args, _ = trainParams(dict(params, n_jobs=_THREADS))
+    args["metric"] = ["auc", "average_precision"]
+    booster = lgb.train(args, train, num_boost_round=rounds, valid_sets=[valid],
+                        callbacks=[lgb.early_stopping(50, first_metric_only=True, verbose=False)])
+    best = booster.best_score["valid_0"]
+    out = {
+        "trial": trial,
+        "fold": int(fold),
+        "rounds": int(rounds),
+        "auc": float(best["auc"]),
+        "avg_precision": float(best["average_precision"]),
+        "best_iteration": int(booster.best_iteration or rounds),
+        "val_size": int(valid.num_data()),
+        "fit_s": time.perf_counter() - t0,
+    }
+    if x_val is not None:
+        out["proba"] = booster.predict(x_val, num_threads=_THREADS)
+    return out
+
+
+class _Runner:
+    """Runs fold tasks in a spawn pool (or in-process with one worker) over cached fold Datasets."""
+
+    def __init__(self, X, y: np.ndarray, groups: Optional[np.ndarray], folds: int, seed: int,
+                 workers: Optional[int], tasks: int, cache: Optional[DatasetCache] = None):
+        cpus = os.cpu_count() or 1
+        workers = TRAIN_WORKERS if workers is None else workers
+        self.workers = max(1, min(tasks, workers if workers > 0 else cpus))
+        # Each process got an equal share of the cores so LightGBM threads do not oversubscribe them
+        # Cada proceso recibió una parte igual de los núcleos para que los hilos de LightGBM no los saturen
+        self.threads = max(1, cpus // self.workers)
+        self._own = cache is None
+        self.cache = DatasetCache() if cache is None else cache
+        # Every fold was assigned and binned once here (or found in the cache); workers only read the files
+        # Cada pliegue se asignó y agrupó una vez aquí (o se encontró en la caché); los workers solo leen los archivos
+        t0 = time.perf_counter()
+        name = f"cv{folds}-s{seed}-{'g' if groups is not None else 's'}"
+        self.assignment = self.cache.array(f"{name}.folds", lambda: foldAssignment(y, groups, folds, seed))
+        columns = list(getattr(X, "columns", [f"f{i}" for i in range(X.shape[1])]))
+        self.matrix = X.to_numpy() if hasattr(X, "to_numpy") else X
+        self.paths = [
+            self.cache.splitPaths(f"{name}-f{k}", self.matrix, y, np.flatnonzero(self.assignment != k),
+                                  np.flatnonzero(self.assignment == k), columns)
+            for k in range(folds)
+        ]
+        self.dataset_s = time.perf_counter() - t0
+        self._pool = None
+        if self.workers > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # Workers were spawned, not forked, so no OpenMP state is inherited from the parent
+            # Los workers se crearon con spawn, no fork, para no heredar estado OpenMP del padre
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self.threads,))
+        else:
+            _init_worker(self.threads)
+
+    def task(self, trial: int, params: Dict[str, Any], fold: int, rounds: int, predict: bool = False) -> tuple:
+        x_val = np.asarray(self.matrix[self.assignment == fold]) if predict else None
+        return (trial, params, fold, rounds) + self.paths[fold] + (x_val,)
+
+    def run(self, tasks: List[tuple]) -> List[Dict[str, Any]]:
+        if self._pool is None:
+            return [_fit_fold(t) for t in tasks]
+        return list(self._pool.map(_fit_fold, tasks))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._own:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _summary(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    auc = np.array([r["auc"] for r in results])
+    ap = np.array([r["avg_precision"] for r in results])
+    return {
+        "auc_mean": float(auc.mean()),
+        "auc_std": float(auc.std()),
+        "avg_precision_mean": float(ap.mean()),
+        "avg_precision_std": float(ap.std()),
+        "best_iteration_median": int(np.median([r["best_iteration"] for r in results])),
+        "folds": sorted(({k: v for k, v in r.items() if k not in ("trial", "proba")} for r in results),
+                        key=lambda r: r["fold"]),
+    }
+
+
+def crossValidate(X, y: np.ndarray, params: Dict[str, Any], groups: Optional[np.ndarray] = None,
+                  folds: int = 5, workers: Optional[int] = None, cache: Optional[DatasetCache] = None,
+                  seed: int = 42, oof: bool = False) -> Dict[str, Any]:
+    """K-fold metrics of one parameter set, folds trained in parallel.
+
+    With `oof`, report["oof"] holds every row's out-of-fold probability (an array, popped before saving).
+    """
+    t0 = time.perf_counter()
+    rounds = int(params.get("n_estimators", 500))
+    with _Runner(X, y, groups, folds, seed, workers, folds, cache) as runner:
+        results = runner.run([runner.task(0, params, k, rounds, predict=oof) for k in range(folds)])
+        report = {"mode": "cv", "folds": folds, "grouped": groups is not None,
+                  "workers": runner.workers, "threads_per_worker": runner.threads}
+        dataset_s = runner.dataset_s
+        if oof:
+            report["oof"] = np.empty(len(y), dtype=np.float64)
+            for r in results:
+                report["oof"][runner.assignment == r["fold"]] = r["proba"]
+    report["params"] = dict(params)
+    report["cv"] = _summary(results)
+    report["timings"] = {"total_s": time.perf_counter() - t0, "datasets_s": dataset_s,
+                         "fit_s": sum(r["fit_s"] for r in results)}
+    return report
+
+
+def searchParams(X, y: np.ndarray, base: Dict[str, Any], groups: Optional[np.ndarray] = None,
+                 trials: int = 16, folds: int = 5, eta: int = 3, min_rounds: int = 100,
+                 max_rounds: int = 900, seed: int = 42, workers: Optional[int] = None,
+                 cache: Optional[DatasetCache] = None) -> Dict[str, Any]:
+    """Random search pruned by successive halving on the boosting-round budget.
+
+    Every rung scores the surviving trials with K-fold CV at `min_rounds * eta**rung` rounds
+    and keeps the best 1/eta by mean AUC; the last rung reports the winner's folds.
+    """
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    candidates = [dict(base)] + [sampleParams(rng, base) for _ in range(max(trials - 1, 0))]
+    history: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(candidates))}
+    rungs = []
+    alive = list(range(len(candidates)))
+    rounds = min_rounds
+    with _Runner(X, y, groups, folds, seed, workers, len(candidates) * folds, cache) as runner:
+        dataset_s = runner.dataset_s
+        while True:
+            r0 = time.perf_counter()
+            results = runner.run([runner.task(i, candidates[i], k, rounds) for i in alive for k in range(folds)])
+            by_trial: Dict[int, list] = {i: [] for i in alive}
+            for r in results:
+                by_trial[r["trial"]].append(r)
+            scores = {i: float(np.mean([r["auc"] for r in rs])) for i, rs in by_trial.items()}
+            for i in alive:
+                history[i].append({"rounds": rounds, "auc_mean": scores[i]})
+            rungs.append({"rounds": rounds, "trials": len(alive), "wall_s": time.perf_counter() - r0,
+                          "fit_s": sum(r["fit_s"] for r in results)})
+            ranked = sorted(alive, key=lambda i: (-scores[i], i))
+            if len(alive) == 1 or rounds >= max_rounds:
+                best, best_results = ranked[0], by_trial[ranked[0]]
+                break
+            alive = ranked[:max(1, math.ceil(len(alive) / eta))]
+            rounds = min(rounds * eta, max_rounds)
+        report = {"mode": "search", "folds": folds, "grouped": groups is not None,
+                  "workers": runner.workers, "threads_per_worker": runner.threads,
+                  "trials": len(candidates), "eta": eta}
+    summary = _summary(best_results)
+    # Winner kept the median early-stopping round count of its last rung
+    # El ganador conservó la mediana de rondas de parada temprana de su último escalón
+    report["params"] = dict(candidates[best], n_estimators=max(summary["best_iteration_median"], 1))
+    report["best_trial"] = best
+    report["cv"] = summary
+    report["history"] = [{"trial": i, "params": {k: candidates[i][k] for k in SEARCH_SPACE}, "rungs": history[i]}
+                         for i in range(len(candidates))]
+    report["timings"] = {"total_s": time.perf_counter() - t0, "datasets_s": dataset_s, "rungs": rungs}
+    return report
@@ -4,8 +4,10 @@ from pathlib import Path
 from os import getenv as get_env
 from dotenv import load_dotenv
 
+import time
 from flask import (
     Flask,
+    g,
     render_template,
     request,
     jsonify,
@@ -13,8 +15,21 @@ from flask import (
 )
 
 from lang import LANG
-from API.entry import ExoplanetEntry
-from API.analyse import calculateDisposition as model_calculateDisposition
+from API.entry import ExoplanetEntry, DatasetType
+from API.catalog import CatalogStore
+from API.sky import getSkyIndex, builtSkyIndex, MAX_RADIUS_DEG
+from API.crossmatch import getCrossmatch, builtCrossmatch
+from API.explorer import getCatalogTable, builtCatalogTable
+from API.thresholds import getThresholdCurve, builtThresholdCurve
+from API import metrics
+from API.analyse import (
+    predictDisposition as model_predictDisposition,
+    calculateDispositions as model_calculateDispositions,
+    getBatchingStats as model_getBatchingStats,
+    getCacheStats as model_getCacheStats,
+    activeModelInfo as model_activeModelInfo,
+    startModelWatcher as model_startModelWatcher,
+)
 
 load_dotenv()
 ROOT_DIR = Path(__file__).resolve().parent
@@ -31,6 +46,30 @@ app = Flask(
 def _set_lang():
     LANG.detect_from_request(request, fallback="en")
 
+# Vigila el modelo desde el proceso que atiende / Watch the model from the serving process
+@app.before_request
+def _start_watcher():
+    model_startModelWatcher()
+
+# Marca el inicio de la petición / Mark request start
+@app.before_request
+def _start_timer():
+    g.t0 = time.perf_counter()
+
+# Cuenta peticiones, errores y latencia / Count requests, errors and latency
+@app.after_request
+def _record_request(response):
+    endpoint = request.endpoint or "unknown"
+    t0 = getattr(g, "t0", None)
+    if t0 is not None:
+        metrics.observe("sidereus_request_seconds", time.perf_counter() - t0, endpoint=endpoint)
+    metrics.inc("sidereus_requests_total", endpoint=endpoint, status=response.status_code)
+    if response.status_code >= 400:
+        kind = getattr(g, "error_type", None) or f"http_{response.status_code}"
+        metrics.inc("sidereus_errors_total", endpoint=endpoint, type=kind)
+    metrics.maybeFlush()
+    return response
+
 # Mezcla profunda / Deep merge
 def _deep_merge(base: dict, override: dict) -> dict:
     out = dict(base)
@@ -223,7 +262,8 @@ def precisionPage():
 @app.route("/thresholds")
 def thresholdsPage():
     thresholds = read_json_from_model("thresholds.json", default={})
-    return render_template("thresholds.html", thresholds=thresholds)
+    has_oof = (MODEL_DIR / "oof_predictions.npz").exists()
+    return render_template("thresholds.html", thresholds=thresholds, has_oof=has_oof)
 
 
 @app.route("/endpoints")
@@ -238,56 +278,333 @@ def endpoints():
 
 
 REQUIRED_MIN_KEYS = {"orbital_period", "transit_duration", "transit_depth"}
+MAX_BATCH_ITEMS = int(get_env("MAX_BATCH_ITEMS", "10000"))
+CATALOG_STORE = CatalogStore()
+MAX_CONE_RESULTS = int(get_env("MAX_CONE_RESULTS", "1000"))
+MAX_CONE_POSITIONS = int(get_env("MAX_CONE_POSITIONS", "1000"))
+
+
+def _error(message: str, status: int, kind: str):
+    # Error type was recorded for /metrics / Se registró el tipo de error para /metrics
+    g.error_type = kind
+    return jsonify(error=message), status
+
+
+def _collect_cache_stats():
+    st = model_getCacheStats()
+    metrics.setCounter("sidereus_cache_hits_total", st["hits"])
+    metrics.setCounter("sidereus_cache_misses_total", st["misses"])
+    metrics.setCounter("sidereus_cache_evictions_total", st["evictions"])
+    metrics.setGauge("sidereus_cache_entries", st["entries"])
+
+
+metrics.addCollector(_collect_cache_stats)
+
+
+def _prepare_payload(raw) -> tuple[dict | None, str | None]:
+    # Payload was normalized and validated / Se normalizó y validó el payload
+    if not isinstance(raw, dict):
+        return None, "Payload must be a JSON object"
+
+    with metrics.stage("normalize_payload"):
+        payload = normalize_payload_dual_numeric(raw)
+    with metrics.stage("canonicalize_keys"):
+        payload = _canonicalize_keys(payload)
+
+    present = {k for k in REQUIRED_MIN_KEYS if payload.get(k) is not None}
+    if len(present) < 2:
+        return None, "Insuficientes parámetros: envía al menos dos de orbital_period, transit_duration, transit_depth"
+    return payload, None
 
 
 @app.route("/api/health")
 def health():
     meta = {
         "has_model_pkl": (MODEL_DIR / "model_lgb.pkl").exists(),
+        "has_manifest": (MODEL_DIR / "manifest.json").exists(),
         "has_columns": (MODEL_DIR / "columns_used.json").exists(),
         "has_thresholds": (MODEL_DIR / "thresholds.json").exists(),
         "has_metrics": (MODEL_DIR / "metrics.json").exists(),
+        "has_oof_store": (MODEL_DIR / "oof_predictions.npz").exists(),
         "lang_loaded": LANG.available_languages(),
         "lang_code": LANG.code,
+        "batching": model_getBatchingStats(),
+        "cache": model_getCacheStats(),
+        "catalog_store": CATALOG_STORE.stats(),
     }
+    # Shared structures were reported only once built; a liveness probe never builds them
+    # Las estructuras compartidas se reportaron solo ya construidas; una sonda de vida nunca las construye
+    for name, built in (("sky_index", builtSkyIndex), ("crossmatch", builtCrossmatch),
+                        ("catalog_table", builtCatalogTable), ("threshold_curve", builtThresholdCurve)):
+        shared = built()
+        meta[name] = shared.stats() if shared is not None else None
+    try:
+        meta.update(model_activeModelInfo())
+    except Exception as e:
+        meta["model_error"] = str(e)
     return jsonify(meta), 200
 
 
+@app.route("/metrics")
+def metricsPage():
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/calculateDisposition", methods=["POST"])
 def calculateDisposition():
     try:
         if not request.is_json:
-            return jsonify(error="Content-Type must be application/json"), 400
-
-        raw = request.get_json(silent=True)
-        if not isinstance(raw, dict):
-            return jsonify(error="Payload must be a JSON object"), 400
+            return _error("Content-Type must be application/json", 400, "content_type")
 
-        payload = normalize_payload_dual_numeric(raw)
-        payload = _canonicalize_keys(payload)
+        with metrics.stage("get_json"):
+            raw = request.get_json(silent=True)
+        payload, msg = _prepare_payload(raw)
+        if msg is not None:
+            return _error(msg, 400, "validation")
 
-        present = {k for k in REQUIRED_MIN_KEYS if payload.get(k) is not None}
-        if len(present) < 2:
-            msg = "Insuficientes parámetros: envía al menos dos de orbital_period, transit_duration, transit_depth"
-            return jsonify(error=msg), 400
-
-        entry_or_dict = _make_entry_or_dict(payload)
+        with metrics.stage("make_entry"):
+            entry_or_dict = _make_entry_or_dict(payload)
         out = None
         try:
-            out = model_calculateDisposition(entry_or_dict)
+            out = model_predictDisposition(entry_or_dict)
         except TypeError:
-            out = model_calculateDisposition(payload)
+            out = model_predictDisposition(payload)
 
         result = _coerce_model_output(out)
+        result["model_version"] = getattr(out, "model_version", None)
         result["__received_keys__"] = sorted([k for k in payload.keys() if payload[k] is not None])
 
         if "disposition" in result:
+            label = getattr(getattr(out, "disposition", None), "value", result["disposition"])
+            metrics.inc("sidereus_predictions_total", endpoint="single", disposition=label)
             return jsonify(result), 200
 
-        return jsonify(error="Model returned unexpected result"), 500
+        return _error("Model returned unexpected result", 500, "unexpected_output")
+
+    except Exception as e:
+        return _error(str(e), 500, type(e).__name__)
+
+
+@app.route("/api/calculateDispositions", methods=["POST"])
+def calculateDispositions():
+    try:
+        if not request.is_json:
+            return _error("Content-Type must be application/json", 400, "content_type")
+
+        with metrics.stage("get_json"):
+            raw = request.get_json(silent=True)
+        items = raw.get("items") if isinstance(raw, dict) else raw
+        if not isinstance(items, list):
+            return _error("Payload must be a JSON array or an object with an 'items' array", 400, "validation")
+        if len(items) > MAX_BATCH_ITEMS:
+            return _error(f"Too many items: at most {MAX_BATCH_ITEMS} per request", 413, "too_many_items")
+
+        # Items were validated in one pass; invalid ones keep their error
+        # Se validaron los items en una pasada; los inválidos conservan su error
+        results: list[dict] = [{} for _ in items]
+        entries, positions = [], []
+        for i, item in enumerate(items):
+            payload, msg = _prepare_payload(item)
+            if msg is not None:
+                results[i] = {"index": i, "error": msg}
+                continue
+            with metrics.stage("make_entry"):
+                entry = _make_entry_or_dict(payload)
+            # A payload that could not become an entry was reported on its item, not scored as empty
+            # Un payload que no pudo convertirse en entrada se informó en su item, sin puntuarlo como vacío
+            if not isinstance(entry, ExoplanetEntry):
+                results[i] = {"index": i, "error": "Payload could not be converted into an entry"}
+                continue
+            entries.append(entry)
+            positions.append(i)
+
+        # Valid items were scored with a single model call
+        # Se puntuaron los items válidos con una sola llamada al modelo
+        outputs = model_calculateDispositions(entries)
+        for i, out in zip(positions, outputs):
+            result = _coerce_model_output(out)
+            result["index"] = i
+            result["model_version"] = out.model_version
+            results[i] = result
+            metrics.inc("sidereus_predictions_total", endpoint="batch", disposition=out.disposition.value)
+
+        n_errors = len(items) - len(positions)
+        if n_errors:
+            metrics.inc("sidereus_errors_total", n_errors, endpoint="calculateDispositions", type="item_validation")
+        version = outputs[0].model_version if outputs else None
+        return jsonify(results=results, count=len(items), errors=n_errors, model_version=version), 200
+
+    except Exception as e:
+        return _error(str(e), 500, type(e).__name__)
+
+
+def _position(item: dict, default_radius) -> tuple:
+    # One cone was validated: RA in [0, 360], Dec in [-90, 90], 0 < radius <= 180 degrees
+    # Se validó un cono: RA en [0, 360], Dec en [-90, 90], 0 < radio <= 180 grados
+    if item.get("ra") is None or item.get("dec") is None:
+        raise ValueError("ra and dec are required")
+    ra = float(item["ra"])
+    dec = float(item["dec"])
+    radius = float(item.get("radius", default_radius))
+    if not (0.0 <= ra <= 360.0 and -90.0 <= dec <= 90.0):
+        raise ValueError("ra must be in [0, 360] and dec in [-90, 90] degrees")
+    if not 0.0 < radius <= MAX_RADIUS_DEG:
+        raise ValueError(f"radius must be in (0, {MAX_RADIUS_DEG:g}] degrees")
+    return ra, dec, radius
+
+
+@app.route("/api/cone", methods=["GET", "POST"])
+def coneSearch():
+    try:
+        # Single cone from the query string, or many from {"positions": [...]} in one request
+        # Un cono desde la URL, o muchos desde {"positions": [...]} en una sola petición
+        bulk = request.method == "POST"
+        if bulk:
+            body = request.get_json(silent=True) or {}
+            positions = body.get("positions") if isinstance(body, dict) else None
+            if not isinstance(positions, list) or not positions:
+                return _error("Send {\"positions\": [{\"ra\": .., \"dec\": .., \"radius\": ..}, ...]}", 400, "bad_payload")
+            if len(positions) > MAX_CONE_POSITIONS:
+                return _error(f"At most {MAX_CONE_POSITIONS} positions per request", 413, "too_many_items")
+            options = body
+        else:
+            positions = [request.args]
+            options = request.args
+        try:
+            limit = min(max(int(options.get("limit", 100)), 1), MAX_CONE_RESULTS)
+        except (TypeError, ValueError):
+            return _error("limit must be an integer", 400, "bad_limit")
+        predict = str(options.get("predict", "1")).lower() not in ("0", "false", "no")
+        try:
+            cones = [_position(p, options.get("radius", 0.1)) for p in positions]
+        except (KeyError, TypeError, ValueError) as e:
+            return _error(f"Invalid position: {e}", 400, "bad_position")
+
+        match = getCrossmatch()
+        index = match.index
+        with metrics.stage("cone_search"):
+            found = index.cones([c[0] for c in cones], [c[1] for c in cones], [c[2] for c in cones], limit)
+
+        # Matched rows were scored together, each with its own catalog one-hot
+        # Las filas encontradas se puntuaron juntas, cada una con el one-hot de su catálogo
+        predictions, version = {}, None
+        rows = sorted({int(i) for r, _ in found for i in r})
+        if predict and rows:
+            outputs = model_calculateDispositions(
+                [index.data.entry(i) for i in rows], [DatasetType(int(index.data.datasets[i])) for i in rows]
+            )
+            predictions = dict(zip(rows, outputs))
+            version = outputs[0].model_version
+        results = []
+        for (ra, dec, radius), (r, sep) in zip(cones, found):
+            preds = [predictions[int(i)] for i in r] if predict else None
+            results.append({"ra": ra, "dec": dec, "radius": radius, "count": len(r),
+                            "matches": index.describe(r, sep, preds, match)})
+        if not bulk:
+            return jsonify(dict(results[0], model_version=version)), 200
+        return jsonify(results=results, count=len(results), model_version=version), 200
+
+    except ValueError as e:
+        return _error(str(e), 400, "bad_request")
+    except Exception as e:
+        return _error(str(e), 500, type(e).__name__)
+
+
+@app.route("/api/catalog")
+def catalogQuery():
+    try:
+        # Filtered, sorted page of the in-memory catalogs; predict=1 scores only the returned rows
+        # Página filtrada y ordenada de los catálogos en memoria; predict=1 puntúa solo las filas devueltas
+        table = getCatalogTable()
+        try:
+            with metrics.stage("catalog_query"):
+                rows, page = table.query(request.args)
+        except ValueError as e:
+            return _error(str(e), 400, "bad_query")
+
+        version = None
+        if str(request.args.get("predict", "0")).lower() in ("1", "true", "yes") and len(rows):
+            data = table.data
+            outputs = model_calculateDispositions(
+                [data.entry(i) for i in rows.tolist()], [DatasetType(int(data.datasets[i])) for i in rows.tolist()]
+            )
+            for item, out in zip(page["rows"], outputs):
+                item["disposition"] = out.disposition.value
+                item["probability"] = out.probability
+            version = outputs[0].model_version
+        return jsonify(dict(page, model_version=version)), 200
+
+    except Exception as e:
+        return _error(str(e), 500, type(e).__name__)
+
+
+@app.route("/api/thresholds/sweep")
+def thresholdsSweep():
+    try:
+        # Precision, recall and FPR came from the stored out-of-fold curve; the model was not called
+        # Precisión, recall y FPR salieron de la curva fuera de pliegue guardada; no se llamó al modelo
+        try:
+            curve, version = getThresholdCurve(str(MODEL_DIR))
+        except FileNotFoundError as e:
+            return _error(str(e), 404, "no_oof_store")
+        try:
+            with metrics.stage("threshold_sweep"):
+                result = curve.sweep(request.args)
+        except ValueError as e:
+            return _error(str(e), 400, "bad_query")
+        return jsonify(dict(result, model_version=version)), 200
+
+    except Exception as e:
+        return _error(str(e), 500, type(e).__name__)
+
+
+@app.route("/api/catalog/changes")
+def catalogChanges():
+    try:
+        limit = min(max(int(request.args.get("limit", 1)), 1), 100)
+    except ValueError:
+        return _error("limit must be an integer", 400, "bad_limit")
+    return jsonify(changes=CATALOG_STORE.changes(limit), store=CATALOG_STORE.stats()), 200
+
+
+@app.route("/api/catalog/<dataset>/<path:ident>")
+def catalogEntry(dataset: str, ident: str):
+    try:
+        ds = DatasetType.__members__.get(dataset.upper())
+        if ds is None or ds == DatasetType.UNKNOWN:
+            return _error(f"Unknown dataset: {dataset}", 400, "unknown_dataset")
+
+        # Store was rebuilt in the background when the model version changed
+        # Se reconstruyó el almacén en segundo plano cuando cambió la versión del modelo
+        version = model_activeModelInfo().get("model_version")
+        rebuilding = CATALOG_STORE.ensureFresh(version)
+        matches = CATALOG_STORE.lookup(ds, ident)
+        if not matches:
+            if rebuilding and not CATALOG_STORE.meta():
+                return _error("Catalog store is being built, retry shortly", 503, "store_building")
+            # Rows dropped by a refresh answered with their tombstone
+            # Las filas eliminadas por una actualización respondieron con su lápida
+            removed = CATALOG_STORE.removed(ds, ident)
+            if removed:
+                g.error_type = "removed"
+                return jsonify(error=f"{ident} was removed from {ds.name}", removed=removed[0]), 410
+            return _error(f"{ident} not found in {ds.name}", 404, "not_found")
+
+        store_version = CATALOG_STORE.meta().get("model_version")
+        result = dict(matches[0])
+        if len(matches) > 1:
+            result["matches"] = matches
+        result["model_version"] = store_version
+        result["stale"] = store_version != version
+        # Rows of other missions matched to this one were listed by identifier
+        # Se listaron por identificador las filas de otras misiones emparejadas con esta
+        match = getCrossmatch()
+        rows = match.find(ds, ident)
+        result["linked"] = match.linked(rows[0]) if rows else []
+        return jsonify(result), 200
 
     except Exception as e:
-        return jsonify(error=str(e)), 500
+        return _error(str(e), 500, type(e).__name__)
 
 
 if __name__ == "__main__":
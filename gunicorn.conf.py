@@ -0,0 +1,26 @@
+# gunicorn settings read automatically from the working directory (see Procfile).
+# Configuración de gunicorn leída automáticamente desde el directorio de trabajo (ver Procfile).
+
+import os
+
+from API import metrics
+from API.analyse import startModelWatcher
+
+
+def on_starting(server):
+    # Snapshots were scoped to this master, and those of an earlier master were removed before the workers publish
+    # Las instantáneas se limitaron a este maestro y se eliminaron las de uno anterior antes de que publiquen los workers
+    metrics.setScope(os.getpid())
+    metrics.clearSnapshots()
+
+
+def post_fork(server, worker):
+    # Each worker polled for new model artifacts from the start, not from its first request
+    # Cada worker vigiló los artefactos del modelo desde el inicio, no desde su primera petición
+    startModelWatcher()
+
+
+def on_exit(server):
+    # The snapshot directory of this master was removed when it stopped
+    # Se eliminó el directorio de instantáneas de este maestro al detenerse
+    metrics.clearSnapshots()
@@ -1,2 +1,13 @@
 from app import app as application
+from API.analyse import warmUp
+from API.crossmatch import getCrossmatch
+from API.explorer import getCatalogTable
+
+# Model was loaded and warmed up at import; with gunicorn --preload this runs once
+# in the master and the workers share its memory copy-on-write after fork
+# Se cargó y calentó el modelo al importar; con gunicorn --preload esto ocurre una vez
+# en el maestro y los workers comparten su memoria copy-on-write tras el fork
+warmUp()
+getCrossmatch()
+getCatalogTable()
 app = application